@@ -1,5 +1,6 @@
 from django import forms
-from utils.country_parser import parse_country_file
+from utils.countries import COUNTRIES_CHOICES
+from utils.image_header import validate_product_image
 
 from  .base_form_helper  import BaseFormMeasurements
 from ..utils.product_category_utils import (get_product_category_choices,
@@ -127,29 +128,32 @@ class PricingAndInventoryForm(forms.Form):
 
 
 class ImageAndMediaForm(forms.Form):
-    primary_image = forms.ImageField(
+    primary_image = forms.FileField(
         label="Upload primary image (required)",
+        validators=[validate_product_image],
         widget=forms.ClearableFileInput(attrs={
             "id": "primary-image",
-            "accept": "image/*",
+            "accept": "image/jpeg,image/png,image/webp",
             "aria-describedby": "primary-image-description"
         })
     )
 
-    side_image1 = forms.ImageField(
+    side_image1 = forms.FileField(
         label="Upload side image 1 (required)",
+        validators=[validate_product_image],
         widget=forms.ClearableFileInput(attrs={
             "id": "side-image1",
-            "accept": "image/*",
+            "accept": "image/jpeg,image/png,image/webp",
             "aria-describedby": "side-image1-description",
         })
     )
 
-    side_image2 = forms.ImageField(
+    side_image2 = forms.FileField(
         label="Upload side image 2 (required)",
+        validators=[validate_product_image],
         widget=forms.ClearableFileInput(attrs={
             "id": "side-image2",
-            "accept": "image/*",
+            "accept": "image/jpeg,image/png,image/webp",
             "aria-describedby": "side-image2-description"
         })
     )
@@ -284,7 +288,7 @@ class NutritionForm(forms.Form):
     
 class AdditionalInformationForm(forms.Form):
     OPTIONS = [("n", "No"), ("y", "Yes")]
-    COUNTRIES_CHOICES = parse_country_file("data/countries.txt")
+    COUNTRIES_CHOICES = COUNTRIES_CHOICES
 
     manufacturer = forms.CharField(label="Manufacturer title*", min_length=4, 
                             max_length=40, 
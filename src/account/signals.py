@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+from django_q.models import Schedule
+
+
+CLEANUP_SCHEDULE_NAME = "Clean up abandoned product uploads"
+
+
+@receiver(post_migrate)
+def schedule_wizard_upload_cleanup(sender, app_config=None, using="default", **kwargs):
+    """
+    Creates (or updates) the django-q schedule that runs `cleanup_wizard_uploads`, once django-q's
+    tables exist, so the clean up runs wherever the cluster does without being added by hand.
+    """
+    if app_config is None or app_config.label != "django_q":
+        return
+
+    Schedule.objects.using(using).update_or_create(
+        name=CLEANUP_SCHEDULE_NAME,
+        defaults={
+            "func": "account.utils.temp_uploads.cleanup_wizard_uploads",
+            "schedule_type": Schedule.MINUTES,
+            "minutes": settings.WIZARD_UPLOAD_CLEANUP_INTERVAL,
+            "repeats": -1,
+        },
+    )
@@ -1,2 +1,359 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django_q.models import Schedule
+from time import time
+from unittest.mock import patch
+from io import BytesIO
+from PIL import Image
 
+import hashlib
+import os
+import shutil
+import tempfile
+
+from .signals import CLEANUP_SCHEDULE_NAME
+from .utils.temp_uploads import cleanup_wizard_uploads, delete_expired_entries, get_session_upload_dir, remove_session_upload_dir
+from .utils.thumbnails import get_or_create_thumbnail, get_thumbnail_urls
+from .utils.utils import get_temp_file_hash, move_file_to_storage, save_file_temporarily
+from .views_helpers import save_images
+
+
+def create_png_bytes(colour="green", size=(10, 10)):
+    buffer = BytesIO()
+    Image.new("RGB", size, colour).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class SaveUploadedImagesTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.storage    = FileSystemStorage(location=self.media_root)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_temporary_file_is_named_after_its_hash(self):
+        """Test that the upload is hashed while it is written to the temporary file"""
+
+        image_bytes    = create_png_bytes()
+        temp_file_path = save_file_temporarily(SimpleUploadedFile("apple.PNG", image_bytes))
+
+        self.assertEqual(get_temp_file_hash(temp_file_path), hashlib.sha256(image_bytes).hexdigest())
+        self.assertTrue(temp_file_path.endswith(".png"))
+
+        with open(temp_file_path, "rb") as file:
+            self.assertEqual(file.read(), image_bytes)
+
+        shutil.rmtree(os.path.dirname(temp_file_path))
+
+    def test_temporary_file_is_moved_into_storage(self):
+        """Test that the temporary file and its directory are gone once the file is in storage"""
+
+        image_bytes    = create_png_bytes()
+        temp_file_path = save_file_temporarily(SimpleUploadedFile("apple.png", image_bytes))
+
+        name = move_file_to_storage(temp_file_path, "product_images/apple.png", self.storage)
+
+        self.assertEqual(name, "product_images/apple.png")
+        self.assertFalse(os.path.exists(os.path.dirname(temp_file_path)))
+
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), image_bytes)
+
+    def test_moved_file_gets_the_upload_permissions(self):
+        """Test that FILE_UPLOAD_PERMISSIONS is applied to a file that was moved rather than saved"""
+
+        temp_file_path = save_file_temporarily(SimpleUploadedFile("apple.png", create_png_bytes()))
+        storage        = FileSystemStorage(location=self.media_root, file_permissions_mode=0o644)
+
+        name = move_file_to_storage(temp_file_path, "product_images/apple.png", storage)
+
+        self.assertEqual(os.stat(storage.path(name)).st_mode & 0o777, 0o644)
+
+    def test_missing_temporary_file_raises_error(self):
+        """Test that moving a temporary file that no longer exists raises an error"""
+
+        with self.assertRaises(FileNotFoundError):
+            move_file_to_storage("/does/not/exist.png", "product_images/apple.png", self.storage)
+
+    def test_save_images_names_the_images_after_their_hash(self):
+        """Test that the wizard's three images are stored under names built from their hashes"""
+
+        images          = {colour: create_png_bytes(colour) for colour in ("green", "red", "yellow")}
+        temp_file_paths = {key: save_file_temporarily(SimpleUploadedFile(f"{colour}.png", image_bytes))
+                           for key, (colour, image_bytes) in zip(("primary_image", "side_image1", "side_image2"), images.items())}
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            paths = save_images(temp_file_paths)
+
+        for path, image_bytes in zip(paths, images.values()):
+            self.assertTrue(path.startswith(f"product_images/{hashlib.sha256(image_bytes).hexdigest()[:32]}_"))
+            self.assertTrue(path.endswith(".png"))
+            self.assertTrue(self.storage.exists(path))
+
+    def test_same_image_can_be_uploaded_for_several_slots(self):
+        """Test that a temporary file shared by two slots is moved once and copied for the other slot"""
+
+        image_bytes    = create_png_bytes()
+        temp_file_path = save_file_temporarily(SimpleUploadedFile("apple.png", image_bytes))
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            main_path, side_path_1, side_path_2 = save_images(dict.fromkeys(("primary_image", "side_image1", "side_image2"), temp_file_path))
+
+        self.assertNotEqual(main_path, side_path_1)
+        self.assertEqual(side_path_1, side_path_2)
+
+        for path in (main_path, side_path_1):
+            with self.storage.open(path) as file:
+                self.assertEqual(file.read(), image_bytes)
+
+    def test_stored_file_is_reused_when_the_temporary_file_is_gone(self):
+        """Test that an image already in storage under its hashed name doesn't need its temporary file"""
+
+        self.storage.save("product_images/apple.png", SimpleUploadedFile("apple.png", create_png_bytes()))
+
+        self.assertEqual(move_file_to_storage("/does/not/exist.png", "product_images/apple.png", self.storage), "product_images/apple.png")
+
+    def test_save_images_needs_three_images(self):
+        """Test that a missing side image raises an error"""
+
+        with self.assertRaises(ValueError):
+            save_images({"primary_image": "/tmp/apple.png", "side_image1": "/tmp/pear.png"})
+
+
+class ReviewThumbnailTest(TestCase):
+
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp()
+        self.user      = get_user_model().objects.create_user(username="egbie", email="egbie@example.com", password="password", is_staff=True)
+
+        self.temp_file_paths = {
+            field: save_file_temporarily(SimpleUploadedFile(f"{field}.png", create_png_bytes(colour, size=(1200, 600))))
+            for field, colour in (("primary_image", "green"), ("side_image1", "red"), ("side_image2", "yellow"))
+        }
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["temp_file_paths"] = self.temp_file_paths
+        session.save()
+
+        settings_override = self.settings(THUMBNAIL_CACHE_DIR=self.cache_dir, THUMBNAIL_SIZE=100)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        for temp_file_path in self.temp_file_paths.values():
+            shutil.rmtree(os.path.dirname(temp_file_path), ignore_errors=True)
+
+    def get_thumbnail(self, url):
+        response = self.client.get(url)
+        content  = b"".join(response.streaming_content) if response.status_code == 200 else b""
+        return response, content
+
+    def test_thumbnail_is_a_downscaled_jpeg(self):
+        """Test that the signed url serves a JPEG no larger than THUMBNAIL_SIZE"""
+
+        response, content = self.get_thumbnail(get_thumbnail_urls(self.temp_file_paths)[0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+
+        with Image.open(BytesIO(content)) as thumbnail:
+            self.assertEqual(thumbnail.format, "JPEG")
+            self.assertEqual(thumbnail.size, (100, 50))
+
+    def test_thumbnail_is_only_created_once(self):
+        """Test that the cached thumbnail is served without opening the original again"""
+
+        url = get_thumbnail_urls(self.temp_file_paths)[0]
+        self.get_thumbnail(url)
+
+        with patch("PIL.Image.open") as mock_open:
+            response, _ = self.get_thumbnail(url)
+
+        self.assertEqual(response.status_code, 200)
+        mock_open.assert_not_called()
+
+    def test_non_staff_users_are_refused(self):
+        """Test that a logged in user who isn't staff can't view the thumbnails"""
+
+        self.user.is_staff = False
+        self.user.save()
+
+        response, _ = self.get_thumbnail(get_thumbnail_urls(self.temp_file_paths)[0])
+        self.assertEqual(response.status_code, 403)
+
+    def test_review_only_shows_thumbnails_to_staff(self):
+        """Test that the review step doesn't link to thumbnails a user who isn't staff can't view"""
+
+        session = self.client.session
+        session.update({f"step{step}_completed": True for step in range(1, 9)})
+        session.save()
+
+        response = self.client.get(reverse("view_review"))
+        self.assertContains(response, "/thumbnails/")
+
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.client.get(reverse("view_review"))
+        self.assertNotContains(response, "/thumbnails/")
+        self.assertContains(response, "The image was uploaded", count=3)
+
+    def test_tampered_token_is_not_found(self):
+        """Test that a url whose signature doesn't match is refused"""
+
+        url = get_thumbnail_urls(self.temp_file_paths)[0]
+        response, _ = self.get_thumbnail(url.replace("/thumbnails/", "/thumbnails/x"))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_expired_token_is_not_found(self):
+        """Test that a url older than THUMBNAIL_URL_MAX_AGE is refused"""
+
+        url = get_thumbnail_urls(self.temp_file_paths)[0]
+
+        with self.settings(THUMBNAIL_URL_MAX_AGE=-1):
+            response, _ = self.get_thumbnail(url)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_token_for_a_replaced_upload_is_not_found(self):
+        """Test that a url made for an image that was since re-uploaded is refused"""
+
+        url = get_thumbnail_urls(self.temp_file_paths)[0]
+
+        session = self.client.session
+        session["temp_file_paths"] = {**self.temp_file_paths, "primary_image": self.temp_file_paths["side_image1"]}
+        session.save()
+
+        response, _ = self.get_thumbnail(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_upload_that_cant_be_decoded_is_not_found(self):
+        """Test that an upload Pillow can't read gives a 404 rather than a server error"""
+
+        url = get_thumbnail_urls(self.temp_file_paths)[0]
+
+        with open(self.temp_file_paths["primary_image"], "r+b") as file:
+            file.truncate(40)
+
+        response, _ = self.get_thumbnail(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_uploads_have_no_url(self):
+        """Test that an image that wasn't uploaded, or no longer exists, is given no url"""
+
+        urls = get_thumbnail_urls({"primary_image": self.temp_file_paths["primary_image"], "side_image1": "/does/not/exist.png"})
+
+        self.assertIsNotNone(urls[0])
+        self.assertEqual(urls[1:], [None, None])
+
+    def test_thumbnail_is_named_after_the_hash_and_size(self):
+        """Test that the thumbnails of the same image at different sizes are cached separately"""
+
+        temp_file_path = self.temp_file_paths["primary_image"]
+
+        small = get_or_create_thumbnail(temp_file_path, size=50, cache_dir=self.cache_dir)
+        large = get_or_create_thumbnail(temp_file_path, size=200, cache_dir=self.cache_dir)
+
+        self.assertNotEqual(small, large)
+        self.assertTrue(os.path.basename(small).startswith(get_temp_file_hash(temp_file_path)))
+
+
+class WizardUploadCleanupTest(TestCase):
+
+    def setUp(self) -> None:
+        self.upload_root    = tempfile.mkdtemp()
+        self.thumbnail_root = tempfile.mkdtemp()
+
+        settings_override = self.settings(WIZARD_UPLOAD_ROOT=self.upload_root, THUMBNAIL_CACHE_DIR=self.thumbnail_root,
+                                          WIZARD_UPLOAD_MAX_AGE=60, WIZARD_UPLOAD_CLEANUP_BATCH_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.upload_root, ignore_errors=True)
+        shutil.rmtree(self.thumbnail_root, ignore_errors=True)
+
+    def create_upload_dir(self, size, age=0):
+        upload_dir = tempfile.mkdtemp(prefix="session_", dir=self.upload_root)
+
+        with open(os.path.join(upload_dir, "apple.png"), "wb") as file:
+            file.write(b"x" * size)
+
+        os.utime(upload_dir, (time() - age, time() - age))
+        return upload_dir
+
+    def test_session_keeps_a_single_upload_directory(self):
+        """Test that every upload of a session goes in the same directory, recorded with its creation time"""
+
+        session    = {}
+        upload_dir = get_session_upload_dir(session)
+
+        self.assertEqual(get_session_upload_dir(session), upload_dir)
+        self.assertEqual(os.path.dirname(upload_dir), self.upload_root)
+        self.assertIn("temp_upload_dir_created", session)
+
+        for colour in ("green", "red"):
+            save_file_temporarily(SimpleUploadedFile(f"{colour}.png", create_png_bytes(colour)), upload_dir)
+
+        self.assertEqual(len(os.listdir(upload_dir)), 2)
+
+    def test_upload_directory_is_removed_with_the_session_keys(self):
+        """Test that clearing the wizard deletes the uploads left in the session's directory"""
+
+        session    = {}
+        upload_dir = get_session_upload_dir(session)
+        save_file_temporarily(SimpleUploadedFile("apple.png", create_png_bytes()), upload_dir)
+
+        remove_session_upload_dir(session)
+
+        self.assertFalse(os.path.exists(upload_dir))
+        self.assertEqual(session, {})
+
+    def test_directory_outside_the_upload_root_is_never_removed(self):
+        """Test that a session pointing at another directory doesn't get it deleted"""
+
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir, True)
+
+        remove_session_upload_dir({"temp_upload_dir": other_dir})
+
+        self.assertTrue(os.path.isdir(other_dir))
+
+    def test_only_expired_directories_are_deleted_in_batches(self):
+        """Test that every expired directory is deleted, batch after batch, and the fresh one is kept"""
+
+        expired = [self.create_upload_dir(size=100, age=120) for _ in range(5)]
+        fresh   = self.create_upload_dir(size=100)
+
+        self.assertEqual(delete_expired_entries(self.upload_root, max_age=60, batch_size=2), (5, 500))
+
+        self.assertFalse(any(os.path.exists(upload_dir) for upload_dir in expired))
+        self.assertTrue(os.path.isdir(fresh))
+
+    def test_cleanup_reports_the_bytes_reclaimed(self):
+        """Test that the task deletes expired uploads and thumbnails and reports what it reclaimed"""
+
+        self.create_upload_dir(size=300, age=120)
+
+        thumbnail = os.path.join(self.thumbnail_root, "apple_320.jpeg")
+        with open(thumbnail, "wb") as file:
+            file.write(b"x" * 50)
+        os.utime(thumbnail, (time() - 120, time() - 120))
+
+        self.assertEqual(cleanup_wizard_uploads(), {"upload_dirs_deleted": 1, "thumbnails_deleted": 1, "bytes_reclaimed": 350})
+
+    def test_cleanup_is_scheduled(self):
+        """Test that the clean up is scheduled with django-q once its tables are migrated"""
+
+        schedule = Schedule.objects.get(name=CLEANUP_SCHEDULE_NAME)
+
+        self.assertEqual(schedule.func, "account.utils.temp_uploads.cleanup_wizard_uploads")
+        self.assertEqual(schedule.schedule_type, Schedule.MINUTES)
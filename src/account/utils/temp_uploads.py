@@ -0,0 +1,163 @@
+from django.conf import settings
+from os.path import join
+from time import time
+
+import logging
+import os
+import shutil
+import tempfile
+
+
+logger = logging.getLogger("custom_logger")
+
+
+# The session keys of the directory holding the session's pending uploads and when it was created
+SESSION_UPLOAD_DIR_KEY     = "temp_upload_dir"
+SESSION_UPLOAD_CREATED_KEY = "temp_upload_dir_created"
+
+
+def get_session_upload_dir(session):
+    """
+    Returns the directory the add-product wizard keeps the session's uploads in, creating it if needed.
+
+    Each session has a single directory under WIZARD_UPLOAD_ROOT, recorded in the session with the time
+    it was created. Its modification time is refreshed on every upload, so the janitor (see
+    `cleanup_wizard_uploads`) only deletes the uploads of wizards that have been abandoned.
+    """
+    upload_dir = session.get(SESSION_UPLOAD_DIR_KEY)
+
+    if not upload_dir or not os.path.isdir(upload_dir) or not _is_inside(upload_dir, settings.WIZARD_UPLOAD_ROOT):
+        os.makedirs(settings.WIZARD_UPLOAD_ROOT, exist_ok=True)
+
+        upload_dir = tempfile.mkdtemp(prefix="session_", dir=settings.WIZARD_UPLOAD_ROOT)
+        session[SESSION_UPLOAD_DIR_KEY]     = upload_dir
+        session[SESSION_UPLOAD_CREATED_KEY] = time()
+    else:
+        os.utime(upload_dir)
+
+    return upload_dir
+
+
+def remove_session_upload_dir(session):
+    """Deletes the session's upload directory, with any uploads left in it, and forgets it."""
+
+    upload_dir = session.pop(SESSION_UPLOAD_DIR_KEY, None)
+    session.pop(SESSION_UPLOAD_CREATED_KEY, None)
+
+    # the path comes from the session, never delete anything outside the upload root
+    if upload_dir and _is_inside(upload_dir, settings.WIZARD_UPLOAD_ROOT):
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+def remove_temp_files(temp_file_paths):
+    """Deletes uploads that have been replaced, ignoring any that are already gone."""
+
+    for temp_file_path in temp_file_paths:
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+def get_size(path):
+    """Returns the size in bytes of a file, or of all the files in a directory."""
+
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    size = 0
+
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                size += os.path.getsize(join(directory, file_name))
+            except OSError:
+                # deleted while the directory was being measured
+                pass
+    return size
+
+
+def delete_expired_entries(root, max_age, batch_size=100, now=None):
+    """
+    Deletes the files and directories directly inside `root` that haven't been modified for `max_age` seconds.
+
+    The entries are deleted in batches of `batch_size`, the directory is listed again for each batch,
+    so a root holding a very large number of entries is never loaded into memory all at once.
+
+    Returns:
+        tuple: The number of entries deleted and the bytes reclaimed.
+    """
+    if not os.path.isdir(root):
+        return 0, 0
+
+    cutoff  = (now or time()) - max_age
+    deleted = reclaimed = 0
+    failed  = set()
+
+    while True:
+        with os.scandir(root) as entries:
+            batch = []
+
+            for entry in entries:
+                if entry.path in failed:
+                    continue
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        batch.append(entry.path)
+                except FileNotFoundError:
+                    continue
+
+                if len(batch) >= batch_size:
+                    break
+
+        if not batch:
+            return deleted, reclaimed
+
+        for path in batch:
+            try:
+                size = get_size(path)
+
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                # removed by someone else, e.g the wizard was completed
+                continue
+            except OSError as e:
+                logger.warning(f"The expired upload <{path}> couldn't be deleted: {e}")
+                failed.add(path)
+                continue
+
+            deleted   += 1
+            reclaimed += size
+
+
+def cleanup_wizard_uploads():
+    """
+    Deletes the uploads of abandoned add-product wizards and their thumbnails, run by django-q every
+    WIZARD_UPLOAD_CLEANUP_INTERVAL minutes (see `account.signals`).
+
+    Returns:
+        dict: The number of directories and files deleted and the bytes reclaimed.
+    """
+    max_age    = settings.WIZARD_UPLOAD_MAX_AGE
+    batch_size = settings.WIZARD_UPLOAD_CLEANUP_BATCH_SIZE
+
+    upload_dirs, upload_bytes    = delete_expired_entries(settings.WIZARD_UPLOAD_ROOT,  max_age, batch_size)
+    thumbnails,  thumbnail_bytes = delete_expired_entries(settings.THUMBNAIL_CACHE_DIR, max_age, batch_size)
+
+    report = {
+        "upload_dirs_deleted": upload_dirs,
+        "thumbnails_deleted": thumbnails,
+        "bytes_reclaimed": upload_bytes + thumbnail_bytes,
+    }
+
+    logger.info(f"Deleted {upload_dirs} abandoned upload directories and {thumbnails} thumbnails, "
+                f"reclaiming {report['bytes_reclaimed']} bytes", extra=report)
+    return report
+
+
+def _is_inside(path, root):
+    root = os.path.realpath(root)
+    return os.path.commonpath([os.path.realpath(path), root]) == root and os.path.realpath(path) != root
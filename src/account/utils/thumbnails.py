@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from os.path import join
+
+from utils.lazy_import import lazy_import
+from .utils import get_temp_file_hash
+
+import os
+import tempfile
+
+
+Image = lazy_import("PIL.Image")
+
+
+# The images of the add-product wizard that are shown on the review step, see `add_images_and_media`
+WIZARD_IMAGE_FIELDS = ("primary_image", "side_image1", "side_image2")
+
+THUMBNAIL_SALT = "account.thumbnail"
+
+
+def sign_thumbnail_token(field, temp_file_path):
+    """
+    Returns a signed token for the thumbnail of one of the wizard's pending uploads.
+
+    The token only holds the image's field and the hash of its bytes, the file itself is
+    looked up in the session of whoever requests the thumbnail, so a token is useless
+    outside the session it was made for and a re-upload gives a different token.
+    """
+    return signing.dumps({"field": field, "hash": get_temp_file_hash(temp_file_path)}, salt=THUMBNAIL_SALT)
+
+
+def load_thumbnail_token(token, max_age=None):
+    """
+    Returns the field and hash held by a token from `sign_thumbnail_token`.
+
+    Raises:
+        signing.BadSignature: If the token was tampered with.
+        signing.SignatureExpired: If the token is older than `max_age` seconds (THUMBNAIL_URL_MAX_AGE by default).
+    """
+    max_age = max_age if max_age is not None else settings.THUMBNAIL_URL_MAX_AGE
+    data    = signing.loads(token, salt=THUMBNAIL_SALT, max_age=max_age)
+    return data["field"], data["hash"]
+
+
+def get_thumbnail_urls(temp_file_paths):
+    """
+    Returns a thumbnail url for each of the wizard's images, or None for an image that wasn't uploaded.
+
+    Args:
+        temp_file_paths (dict): The `temp_file_paths` stored in the session by the images and media step.
+    """
+    urls = []
+
+    for field in WIZARD_IMAGE_FIELDS:
+        temp_file_path = temp_file_paths.get(field)
+
+        if temp_file_path and os.path.isfile(temp_file_path):
+            urls.append(reverse("review_thumbnail", kwargs={"token": sign_thumbnail_token(field, temp_file_path)}))
+        else:
+            urls.append(None)
+    return urls
+
+
+def get_or_create_thumbnail(temp_file_path, size=None, cache_dir=None):
+    """
+    Returns the path of a downscaled JPEG copy of the image, creating it the first time.
+
+    Thumbnails are cached on disk under the hash of the original and the size, so each upload
+    is only decoded and resized once however many times the review page is loaded. A thumbnail
+    is written to a temporary file and renamed into place, so a thumbnail being created by another
+    request is never served half written.
+
+    Args:
+        temp_file_path (str): An upload saved by `save_file_temporarily`.
+        size (int): The longest side of the thumbnail in pixels (THUMBNAIL_SIZE by default).
+        cache_dir (str): Where thumbnails are kept (THUMBNAIL_CACHE_DIR by default).
+
+    Raises:
+        FileNotFoundError: If the upload no longer exists.
+        PIL.UnidentifiedImageError: If the upload isn't an image.
+        OSError: If the upload can't be decoded, e.g it is truncated.
+    """
+    size           = size or settings.THUMBNAIL_SIZE
+    cache_dir      = cache_dir or settings.THUMBNAIL_CACHE_DIR
+    thumbnail_path = join(cache_dir, f"{get_temp_file_hash(temp_file_path)}_{size}.jpeg")
+
+    if os.path.isfile(thumbnail_path):
+        return thumbnail_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with Image.open(temp_file_path) as image:
+
+        # lets the JPEG decoder downscale while decoding instead of decoding the full-size photo
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        image = image.convert("RGB")
+
+        file_descriptor, partial_path = tempfile.mkstemp(suffix=".jpeg", dir=cache_dir)
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as partial_file:
+                image.save(partial_file, format="JPEG", quality=80, optimize=True)
+            os.replace(partial_path, thumbnail_path)
+        except Exception:
+            os.remove(partial_path)
+            raise
+
+    return thumbnail_path
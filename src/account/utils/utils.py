@@ -1,8 +1,13 @@
-from os.path import splitext, join
+from os.path import basename, splitext, join
 from pathlib import Path
 from time import time
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
 from django.utils import timezone
 
+import hashlib
+import os
 import tempfile
 
 
@@ -14,25 +19,95 @@ def upload_to(file, destination_folder):
             destination.write(chunk)
             
 
-def save_file_temporarily(uploaded_file):
+def save_file_temporarily(uploaded_file, temp_dir=None):
     """
-    Save the uploaded file temporarily using a local temporary directory.
+    Save the uploaded file temporarily in `temp_dir`, or a new temporary directory if none is given.
+    
+    The file is hashed (sha256) while its chunks are written, and is then renamed
+    to `<hash><extension>` so the hash can be read back from the path later (see
+    `get_temp_file_hash`) without reading the file again.
     """
     
-    temp_dir       = tempfile.mkdtemp()
-    temp_file_path = join(temp_dir, uploaded_file.name)
+    temp_dir                        = temp_dir or tempfile.mkdtemp()
+    file_descriptor, temp_file_path = tempfile.mkstemp(suffix=".part", dir=temp_dir)
+    file_hash                       = hashlib.sha256()
     
-    with open(temp_file_path, 'wb+') as temp_file:
+    with os.fdopen(file_descriptor, 'wb') as temp_file:
         for chunk in uploaded_file.chunks():
+            file_hash.update(chunk)
             temp_file.write(chunk)
     
-    return temp_file_path
+    hashed_file_path = join(temp_dir, f"{file_hash.hexdigest()}{splitext(uploaded_file.name)[1].lower()}")
+    os.replace(temp_file_path, hashed_file_path)
+    return hashed_file_path
+
+
+def get_temp_file_hash(temp_file_path):
+    """Returns the sha256 hash of a file saved by `save_file_temporarily`."""
+    return splitext(basename(temp_file_path))[0]
+
+
+def move_file_to_storage(temp_file_path, name, storage):
+    """
+    Moves a temporary file into storage under `name` and returns the name it was stored under.
+
+    With a `FileSystemStorage` on the same disk the file is only renamed, otherwise it is copied
+    a chunk at a time, so the file is never held in memory whatever its size. If a file with the same
+    name is already stored (the names are built from the file's hash, so it is the same image) the
+    stored file is re-used and the temporary file deleted.
+    
+    Raises:
+        FileNotFoundError: If the temporary file doesn't exist and nothing is stored under `name`.
+    """
+    if storage.exists(name):
+        _remove_file(temp_file_path)
+    
+    elif not os.path.isfile(temp_file_path):
+        raise FileNotFoundError(f"The temporary file <{temp_file_path}> was not found")
+    
+    elif isinstance(storage, FileSystemStorage):
+        stored_path = storage.path(name)
+        os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+        file_move_safe(temp_file_path, stored_path)
+        
+        # the temporary file was created private (0600), apply FILE_UPLOAD_PERMISSIONS as `storage.save` would
+        if storage.file_permissions_mode is not None:
+            os.chmod(stored_path, storage.file_permissions_mode)
+        
+    else:
+        with open(temp_file_path, "rb") as temp_file:
+            name = storage.save(name, File(temp_file))
+        os.remove(temp_file_path)
+    
+    _remove_empty_directory(os.path.dirname(temp_file_path))
+    return name
+
 
+def copy_stored_file(stored_name, name, storage):
+    """
+    Copies a file that is already in storage under a new `name`, a chunk at a time, and returns
+    the name it was stored under. Nothing is copied if a file is already stored under `name`.
+    """
+    if storage.exists(name):
+        return name
+    
+    with storage.open(stored_name, "rb") as stored_file:
+        return storage.save(name, stored_file)
 
-def get_saved_temp_file(temp_file_path):
-    with open(temp_file_path, 'rb') as file:
-        file_bytes = file.read()
-        return file_bytes
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_empty_directory(directory):
+    try:
+        os.rmdir(directory)
+    except OSError:
+        # not empty, or already removed
+        pass
 
 
 def create_unique_file_name(original_name):
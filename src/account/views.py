@@ -3,13 +3,19 @@ from django.urls                     import reverse
 from django.conf                     import settings
 from django.contrib.auth.decorators  import login_required
 from django.contrib                  import messages
-
-from account.utils.utils  import save_file_temporarily
+from django.core                     import signing
+from django.core.exceptions          import PermissionDenied
+from django.http                     import FileResponse, Http404
+from django.views.decorators.http    import require_GET
+from PIL                             import UnidentifiedImageError
+
+from account.utils.utils         import get_temp_file_hash, save_file_temporarily
+from account.utils.temp_uploads  import get_session_upload_dir, remove_temp_files
+from account.utils.thumbnails    import WIZARD_IMAGE_FIELDS, get_or_create_thumbnail, get_thumbnail_urls, load_thumbnail_token
 from utils.custom_errors  import EmptyProductFormError, EmptyMediaAndImagesError
 
 
-from .views_helpers import (get_base64_images_from_session, 
-                            handle_form,
+from .views_helpers import (handle_form,
                             save_images,
                             get_category,
                             create_product_variations,
@@ -30,6 +36,11 @@ from .forms.forms   import (  BasicFormDescription,
 
 from product.models import Product, Category, Brand, Shipping, ProductVariation, Manufacturer
 
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
 
 # Create your views here.
 
@@ -102,10 +113,14 @@ def add_images_and_media(request):
                 
                 file_fields     = ['primary_image', 'side_image1', 'side_image2', 'primary_video']
                 temp_file_paths = {}
+                upload_dir      = get_session_upload_dir(request.session)
                 
                 for field in file_fields:
                     if field in request.FILES:
-                        temp_file_paths[field]     = save_file_temporarily(request.FILES[field])
+                        temp_file_paths[field]     = save_file_temporarily(request.FILES[field], upload_dir)
+                
+                # the uploads being replaced would otherwise stay on disk until the wizard is abandoned
+                remove_temp_files(set(initial_data.values()) - set(temp_file_paths.values()))
                 request.session["temp_file_paths"]  = temp_file_paths
               
                 
@@ -179,15 +194,55 @@ def view_review(request):
     context["nutrition_data"]              = request.session.get("nutrition", {})        
     context["additional_information_data"] = request.session.get("additional_information", {}) 
     
-    try:
-        context["image_and_media_data"] = get_base64_images_from_session(image_and_media_session)
-    except ValueError as e:
-        print(e)
+    context["image_and_media_data"] = get_thumbnail_urls(image_and_media_session)
+    
+    # the thumbnails are only served to staff (see `review_thumbnail`), other users are only shown which images were uploaded
+    context["can_view_thumbnails"]  = request.user.is_staff
+    
+    if not any(context["image_and_media_data"]):
+        logger.error("The product images couldn't be found for the review")
         messages.error(request, "Something went wrong and your images couldn't be found. Please upload again and then submit again")
-        # return redirect(reverse("images_and_media_form"))
     
     return redirect_to_incomplete_step(request, "account/product-management/add-new-product/review-and-submit.html", context=context)
  
+
+
+@require_GET
+@login_required(login_url=settings.LOGIN_URL, redirect_field_name='next')
+def review_thumbnail(request, token):
+    """
+    Serves a thumbnail of one of the images uploaded in the add-product wizard.
+
+    The urls are made by `get_thumbnail_urls` for the review step, are signed and expire after
+    THUMBNAIL_URL_MAX_AGE seconds. Only staff can view them and only for the uploads in their own session.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    
+    try:
+        field, file_hash = load_thumbnail_token(token)
+    except signing.BadSignature:
+        raise Http404("The thumbnail link is invalid or has expired")
+    
+    temp_file_path = request.session.get("temp_file_paths", {}).get(field)
+    
+    if field not in WIZARD_IMAGE_FIELDS or not temp_file_path or get_temp_file_hash(temp_file_path) != file_hash:
+        raise Http404("The image is no longer part of the product being added")
+    
+    try:
+        thumbnail_path = get_or_create_thumbnail(temp_file_path)
+        thumbnail_file = open(thumbnail_path, "rb")
+    except (UnidentifiedImageError, OSError) as e:
+        # the upload was removed, or it can't be decoded e.g it is truncated or not really an image
+        logger.warning(f"The thumbnail of <{temp_file_path}> couldn't be created: {e}")
+        raise Http404("The image is no longer part of the product being added")
+    
+    response = FileResponse(thumbnail_file, content_type="image/jpeg")
+    
+    # the content of a url never changes (it is named after the image's hash) but it is private to the user
+    response["Cache-Control"] = f"private, max-age={settings.THUMBNAIL_URL_MAX_AGE}"
+    return response
+ 
  
  
 @login_required(login_url=settings.LOGIN_URL, redirect_field_name='next')
@@ -213,9 +268,7 @@ def process_and_save_product_form(request):
         raise EmptyMediaAndImagesError("No images were found. Please ensure that there are images associated with this product")
     
     
-    images = get_base64_images_from_session(image_and_media_session)
-    
-    main_image_path, side_image_1_path, side_image_2_path = save_images(images)
+    main_image_path, side_image_1_path, side_image_2_path = save_images(image_and_media_session)
     
     is_featured   = True  if merged_context.get("is_featured_item", "").lower() == "y"   else False
     is_discounted = True  if merged_context.get("select_discount", "").lower()  == "yes" else False
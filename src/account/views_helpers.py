@@ -4,13 +4,18 @@ from django.urls import resolve, reverse
 from django.contrib import messages
 from typing import List
 
-from .utils.utils import create_timestamped_directory, get_saved_temp_file,  upload_to
-from utils.converter import encode_image_bytes_to_base64, convert_decimal_to_float
+from .utils.utils import copy_stored_file, create_timestamped_directory, get_temp_file_hash, move_file_to_storage, upload_to
+from .utils.temp_uploads import remove_session_upload_dir
+from utils.converter import convert_decimal_to_float
 from product.models import Product, ProductVariation, Shipping
-from utils.converter import decode_base64_to_image_bytes
-from utils.generator import generate_random_image_filename
+from utils.generator import generate_hashed_image_filename
 from utils.validator import validate_required_keys, validate_instance_of
 
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
 
 def handle_form(request, form_class, session_key, next_url_name, template_name, current_step, checkbox_fields_to_store=set()):
     """
@@ -197,47 +202,6 @@ def save_file_with_timestamped_directory(file, base_folder, create_unique_name_f
     return full_file_path
 
 
-def get_base64_images_from_session(session_dict):
-    """
-    Retrieve and encode images from a session dictionary in Base64 format.
-
-    Args:
-        session_dict (dict): A dictionary where keys are image names and values are file paths.
-
-    Returns:
-        list: A list of Base64 encoded image strings.
-
-    Raises:
-        ValueError: If the session_dict is empty.
-        TypeError: If session_dict is not a dictionary.
-        FileNotFoundError: If a file path is invalid.
-    """
-    images = []
-
-   
-    if not session_dict:
-        raise ValueError("The session dictionary cannot be empty.")
-    
-    if not isinstance(session_dict, dict):
-        raise TypeError("The session dictionary should be a dictionary.")
-    
-   
-    for _, file_path in session_dict.items():
-        try:
-            image_bytes = get_saved_temp_file(file_path)
-            if image_bytes:
-                encoded_image = encode_image_bytes_to_base64(image_bytes)
-                images.append(encoded_image)
-        except FileNotFoundError:
-            print(f"File not found: {file_path}")
-        except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
-
-    return images
-
-
-
- 
 def get_category(context):
     
     NOT_APPLICABLE  = "N/A"
@@ -252,41 +216,51 @@ def get_category(context):
     
     
     
-def save_images(images):
+def save_images(temp_file_paths):
+    """
+    Moves the main image and the two side images uploaded in the wizard from their temporary
+    files into storage and returns their paths in storage.
+    
+    The files are moved (or copied a chunk at a time) rather than read, so the memory used
+    doesn't grow with the size of the images. The same image uploaded for two of the slots
+    shares one temporary file, which is moved for the first slot and copied from storage for the other.
+
+    Args:
+        temp_file_paths (dict): The `temp_file_paths` stored in the session by the images and media step.
+    
+    Raises:
+        ValueError: If one of the three images is missing.
+        FileNotFoundError: If one of the temporary files no longer exists.
+    """
     BASE_FOLDER = "product_images"
+    IMAGE_KEYS  = ("primary_image", "side_image1", "side_image2")
+    IMAGE_TYPES = ("main_image", "side_image", "side_image")
     
-    # Extract images from the context (base64 to image byte objects)
-    if len(images) != 3:
+    if not all(temp_file_paths.get(key) for key in IMAGE_KEYS):
         raise ValueError("Expected three images, but received a different number.")
     
-    main_image, side_image_1, side_image_2 = extract_images(images)
+    # Name every image before any is moved, the extension is read from the temporary file
+    images       = [(temp_file_paths[key], get_hashed_image_filename(temp_file_paths[key], image_type, BASE_FOLDER))
+                    for key, image_type in zip(IMAGE_KEYS, IMAGE_TYPES)]
+    stored_names = {}
+    image_paths  = []
+    fs           = FileSystemStorage()
     
     # Save images to storage and return paths
-    fs = FileSystemStorage()
-    
-    main_image_path   = save_image_to_storage(main_image,   "main_image", BASE_FOLDER, fs)
-    side_image_1_path = save_image_to_storage(side_image_1, "side_image", BASE_FOLDER, fs)
-    side_image_2_path = save_image_to_storage(side_image_2, "side_image", BASE_FOLDER, fs)
+    for temp_file_path, filename in images:
+        if temp_file_path in stored_names:
+            image_paths.append(copy_stored_file(stored_names[temp_file_path], filename, fs))
+            continue
+        
+        stored_names[temp_file_path] = move_file_to_storage(temp_file_path, filename, fs)
+        image_paths.append(stored_names[temp_file_path])
     
-    return main_image_path, side_image_1_path, side_image_2_path
+    return tuple(image_paths)
 
 
-def extract_images(images):
-    
-    try:
-        main_image   = decode_base64_to_image_bytes(images[0])
-        side_image_1 = decode_base64_to_image_bytes(images[1])
-        side_image_2 = decode_base64_to_image_bytes(images[2])
-        return main_image, side_image_1, side_image_2
-    except Exception as e:
-        raise ValueError(f"Error decoding images: {str(e)}")
-
-
-def save_image_to_storage(image, image_type, folder, fs):
-    # Generate a random filename and save the image to storage
-    filename = generate_random_image_filename(image_type, image, folder)
-    image_path = fs.save(filename, image)
-    return image_path
+def get_hashed_image_filename(temp_file_path, image_type, folder):
+    # Name the image after the hash taken while it was uploaded
+    return generate_hashed_image_filename(image_type, temp_file_path, get_temp_file_hash(temp_file_path), folder)
 
 
 
@@ -457,6 +431,10 @@ def clear_product_request(request):
         - "nutrition"
         - "additional_information"
         - "image_and_media_data"
+        - "temp_file_paths"
+
+    The session's upload directory is deleted along with any uploads left in it
+    (e.g the video, which isn't saved with the product).
 
     Args:
         request: HttpRequest object containing session data.
@@ -473,8 +451,11 @@ def clear_product_request(request):
         "nutrition",
         "additional_information",
         "image_and_media_data",
+        "temp_file_paths",
     ]
     
     for key in keys_to_clear:
         if key in request.session:
             del request.session[key]
+    
+    remove_session_upload_dir(request.session)
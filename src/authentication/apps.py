@@ -7,5 +7,3 @@ class AuthenticationConfig(AppConfig):
 
     def ready(self) -> None:
         import authentication.signals
-      
-  
\ No newline at end of file
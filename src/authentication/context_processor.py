@@ -1,4 +1,5 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
 from authentication.forms.register_form import RegisterForm
 from authentication.forms.login_form import LoginForm
@@ -7,9 +8,16 @@ from authentication.forms.login_form import LoginForm
 # Create your views here.
 
 def render_authentication_forms(request):
-    return {"register_form": RegisterForm(), "login_form": LoginForm()}
-                  
-                  
-
-
-
+    """
+    Adds the (unbound) register and login forms used by the authentication modals to every template.
+    
+    The forms are lazy, they are only created if a template uses them. The widgets rendered in
+    `partials/register.html` and `partials/login.html` are fragment cached for `auth_forms_cache_timeout`
+    seconds, so most pages never create them at all. The CSRF token sits outside the cached fragments
+    and is rendered for each request.
+    """
+    return {
+        "register_form": SimpleLazyObject(RegisterForm), 
+        "login_form": SimpleLazyObject(LoginForm),
+        "auth_forms_cache_timeout": settings.AUTH_FORMS_CACHE_TIMEOUT,
+    }
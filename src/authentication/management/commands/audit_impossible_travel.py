@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import UserBaseLineData
+from utils.batch_distance_calculator import score_impossible_travel
+from utils.distance_calculator import DEFAULT_ESCALATION_MARGIN
+
+import numpy as np
+
+
+AIRPLANE_SPEED_KMH = 900
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-scores the stored user baseline data for impossible travel. Each user's records are compared "
+        "in the order they were created and any record that implies travelling faster than --max-speed "
+        "since the user's previous record is reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-speed", type=float, default=AIRPLANE_SPEED_KMH, help="The maximum possible speed in km/h")
+        parser.add_argument("--margin", type=float, default=DEFAULT_ESCALATION_MARGIN, help="Speeds within this fraction of --max-speed are re-checked with the geodesic formula")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="The number of records loaded and scored at a time")
+
+    def handle(self, *args, **options):
+        max_speed  = options["max_speed"]
+        margin     = options["margin"]
+        chunk_size = options["chunk_size"]
+
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        records = (UserBaseLineData.objects
+                   .filter(latitude__isnull=False, longitude__isnull=False)
+                   .order_by("user_id", "created_on", "id")
+                   .values_list("id", "user_id", "latitude", "longitude", "created_on")
+                   )
+
+        total_scored  = 0
+        total_flagged = 0
+        previous      = None
+        chunk         = []
+
+        for record in records.iterator(chunk_size=chunk_size):
+            chunk.append(record)
+
+            if len(chunk) == chunk_size:
+                scored, flagged = self._score_chunk(chunk, previous, max_speed, margin)
+                total_scored   += scored
+                total_flagged  += flagged
+                previous        = chunk[-1]
+                chunk           = []
+
+        if chunk:
+            scored, flagged = self._score_chunk(chunk, previous, max_speed, margin)
+            total_scored   += scored
+            total_flagged  += flagged
+
+        self.stdout.write(self.style.SUCCESS(f"Scored {total_scored} journeys, {total_flagged} flagged as impossible travel"))
+
+    def _score_chunk(self, chunk, previous, max_speed, margin):
+        """
+        Scores every record in the chunk against the record before it. The last record of the previous chunk
+        is carried over so a user whose records are split across two chunks is still compared.
+        """
+        rows = [previous] + chunk if previous else chunk
+
+        ids, user_ids, latitudes, longitudes, created_on = zip(*rows)
+
+        user_ids   = np.asarray(user_ids)
+        latitudes  = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        timestamps = np.array([timestamp.timestamp() for timestamp in created_on], dtype=np.float64)
+
+        # a journey is a pair of consecutive records belonging to the same user
+        same_user = user_ids[1:] == user_ids[:-1]
+        starts    = np.flatnonzero(same_user)
+        ends      = starts + 1
+
+        if not len(starts):
+            return 0, 0
+
+        scores = score_impossible_travel(latitudes[starts], longitudes[starts], timestamps[starts],
+                                         latitudes[ends], longitudes[ends], timestamps[ends],
+                                         max_speed_kmh=max_speed,
+                                         borderline_margin=margin,
+                                         )
+
+        for index in np.flatnonzero(scores.is_impossible):
+            end = ends[index]
+            self.stdout.write(
+                f"Record {ids[end]} (user {user_ids[end]}): {scores.distances_km[index]:.1f} km in "
+                f"{scores.hours[index]:.2f} hours implies {scores.speeds_kmh[index]:.0f} km/h "
+                f"since record {ids[starts[index]]}"
+            )
+
+        return len(starts), int(scores.is_impossible.sum())
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.db.utils import ConnectionHandler
+
+from fruit_and_veg.db_connections import CONNECTION_MODES, NEW_CONNECTION_PER_REQUEST, get_connection_settings
+
+from statistics import mean, quantiles
+from time import perf_counter
+
+
+# the keys set by `get_connection_settings`, removed from the configured database before each mode is applied
+CONNECTION_KEYS = ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "DISABLE_SERVER_SIDE_CURSORS")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the database connection overhead of a request for each DB_CONNECTION_MODE. Each simulated "
+        "request runs a single `SELECT 1` between the connection handling Django does when a request starts and finishes. "
+        "Point it at a local Postgres with --host and --port to leave the network out of the numbers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="How many requests are simulated per mode")
+        parser.add_argument("--database", default="default", help="The database whose settings are used. Defaults to default")
+        parser.add_argument("--host", help="Overrides the database host")
+        parser.add_argument("--port", help="Overrides the database port")
+        parser.add_argument("--modes", nargs="+", choices=CONNECTION_MODES, default=list(CONNECTION_MODES), help="The modes to compare")
+
+    def handle(self, *args, **options):
+        timings = {}
+
+        for mode in options["modes"]:
+            try:
+                database = self._get_database_settings(mode, options)
+            except ImproperlyConfigured as e:
+                self.stdout.write(self.style.WARNING(f"Skipping {mode}: {e}"))
+                continue
+
+            try:
+                timings[mode] = self._simulate_requests(database, options["requests"])
+            except DatabaseError as e:
+                raise CommandError(f"Couldn't run the {mode} benchmark: {e}")
+
+        self.stdout.write(f"{'mode':<12} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'speed-up':>10}")
+
+        baseline = timings.get(NEW_CONNECTION_PER_REQUEST)
+
+        for mode, timing in timings.items():
+            percentiles = quantiles(timing, n=20)
+            speed_up    = f"{mean(baseline) / mean(timing):>9.1f}x" if baseline else f"{'-':>10}"
+            self.stdout.write(f"{mode:<12} {mean(timing):>10.2f} {percentiles[9]:>10.2f} {percentiles[18]:>10.2f} {speed_up}")
+
+    def _get_database_settings(self, mode:str, options:dict) -> dict:
+        database = {key: value for key, value in settings.DATABASES[options["database"]].items() if key not in CONNECTION_KEYS}
+        mode_settings = get_connection_settings(mode,
+                                                conn_max_age=settings.DB_CONN_MAX_AGE,
+                                                pool_min_size=settings.DB_POOL_MIN_SIZE,
+                                                pool_max_size=settings.DB_POOL_MAX_SIZE,
+                                                pool_timeout=settings.DB_POOL_TIMEOUT,
+                                                )
+
+        # the mode's options replace the configured ones they clash with
+        options_without_pool = {key: value for key, value in database.get("OPTIONS", {}).items() if key not in ("pool", "prepare_threshold")}
+        database["OPTIONS"]  = {**options_without_pool, **mode_settings.pop("OPTIONS", {})}
+        database.update(mode_settings)
+
+        if options["host"]:
+            database["HOST"] = options["host"]
+        if options["port"]:
+            database["PORT"] = options["port"]
+        return database
+
+    def _simulate_requests(self, database:dict, total_requests:int) -> list:
+        # a handler of its own keeps the benchmark's connections apart from the command's connections
+        connection = ConnectionHandler({"default": database})["default"]
+        timings    = []
+
+        try:
+            # the first request pays for anything that is only set up once per process
+            for request in range(total_requests + 1):
+                started_at = perf_counter()
+
+                # what `django.db.close_old_connections` does on the request_started and request_finished signals
+                connection.close_if_unusable_or_obsolete()
+
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+
+                connection.close_if_unusable_or_obsolete()
+
+                if request:
+                    timings.append((perf_counter() - started_at) * 1000)
+        finally:
+            connection.close()
+
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+        return timings
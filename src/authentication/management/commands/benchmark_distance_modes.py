@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from utils.distance_calculator import DISTANCE_MODES, GEODESIC, calculate_distance
+
+import timeit
+
+
+# (latitude, longitude) pairs covering short, medium, long and nearly antipodal distances
+COORDINATE_PAIRS = [
+    ((51.5074, -0.1278), (51.4545, -2.5879)),      # London -> Bristol
+    ((51.5074, -0.1278), (48.8566, 2.3522)),       # London -> Paris
+    ((40.7128, -74.0060), (51.5074, -0.1278)),     # New York -> London
+    ((40.7128, -74.0060), (34.0522, -118.2437)),   # New York -> Los Angeles
+    ((-33.8688, 151.2093), (51.5074, -0.1278)),    # Sydney -> London
+    ((0.0, 0.0), (0.5, 179.7)),                    # nearly antipodal
+]
+
+
+class Command(BaseCommand):
+    help = "Compares the speed and accuracy of the distance modes in utils.distance_calculator"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000, help="How many times each coordinate pair is measured per mode")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        calls      = iterations * len(COORDINATE_PAIRS)
+
+        expected = [calculate_distance(*start, *end, mode=GEODESIC) for start, end in COORDINATE_PAIRS]
+
+        timings = {}
+        errors  = {}
+
+        for mode in DISTANCE_MODES:
+
+            def run():
+                for start, end in COORDINATE_PAIRS:
+                    calculate_distance(*start, *end, mode=mode)
+
+            # best of 3 to reduce the noise from other processes
+            timings[mode] = min(timeit.repeat(run, number=iterations, repeat=3)) / calls * 1_000_000
+
+            errors[mode] = max(
+                abs(calculate_distance(*start, *end, mode=mode) - distance) / distance
+                for (start, end), distance in zip(COORDINATE_PAIRS, expected)
+            )
+
+        self.stdout.write(f"{'mode':<10} {'us/call':>10} {'speed-up':>10} {'max error':>12}")
+
+        for mode in DISTANCE_MODES:
+            speed_up = timings[GEODESIC] / timings[mode]
+            self.stdout.write(f"{mode:<10} {timings[mode]:>10.2f} {speed_up:>9.1f}x {errors[mode]:>11.5%}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.country_parser import build_country_module
+
+import os
+import utils
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles the country file into the Python module imported by utils.countries. "
+        "Run it whenever static/data/countries.txt changes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source",
+                            default="data/countries.txt",
+                            help="The static path of the country file. Defaults to data/countries.txt",
+                            )
+        parser.add_argument("--output",
+                            default=os.path.join(os.path.dirname(utils.__file__), "country_data.py"),
+                            help="Where to write the module. Defaults to utils/country_data.py",
+                            )
+
+    def handle(self, *args, **options):
+        source      = options["source"]
+        output_path = options["output"]
+
+        try:
+            total_countries = build_country_module(source, output_path)
+        except FileNotFoundError:
+            raise CommandError(f"The file <{source}> was not found")
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total_countries} countries to {output_path}"))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.geo_location import build_geo_location_table, GeoLocationTableError
+
+import csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles a CSV file of CIDR ranges into the offline geo-location table used at login. "
+        "The CSV must have a header row with the columns: network, city, region, country, loc, timezone, org"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", help="Path to the CSV file containing the CIDR ranges")
+        parser.add_argument("--output", 
+                            default=settings.GEOIP_DATABASE_PATH, 
+                            help="Where to write the table. Defaults to settings.GEOIP_DATABASE_PATH",
+                            )
+
+    def handle(self, *args, **options):
+        csv_file    = options["csv_file"]
+        output_path = options["output"]
+        
+        try:
+            with open(csv_file, newline="", encoding="utf-8") as file:
+                total_ranges = build_geo_location_table(csv.DictReader(file), output_path)
+        except FileNotFoundError:
+            raise CommandError(f"The file <{csv_file}> was not found")
+        except GeoLocationTableError as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total_ranges} ranges to {output_path}"))
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.import_time import (build_import_budget,
+                               check_import_budget,
+                               get_total_import_time_ms,
+                               load_import_budget,
+                               measure_import_times,
+                               save_import_budget,
+                               )
+
+import os
+
+
+# Used when the budget is created for the first time with --update. The last five are imported lazily
+# (see utils.lazy_import) and must stay out of start up
+DEFAULT_BUDGET_MODULES = [
+    "django",
+    "django_q",
+    "django_ckeditor_5",
+    "phonenumber_field",
+    "phonenumbers",
+    "google.generativeai",
+    "geopy",
+    "device_detector",
+    "requests",
+    "urllib3",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures what a worker imports before it can answer its first request with `python -X importtime` "
+        "and fails if the start up time or any module in the budget file is over budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget",
+                            default=settings.IMPORT_TIME_BUDGET_FILE,
+                            help="The budget file. Defaults to settings.IMPORT_TIME_BUDGET_FILE",
+                            )
+        parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the fastest time of each module is kept")
+        parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to report")
+        parser.add_argument("--update", action="store_true", help="Write the measured times (plus --headroom) as the new budget")
+        parser.add_argument("--headroom", type=float, default=0.25, help="The fraction added to each measured time by --update")
+
+    def handle(self, *args, **options):
+        budget_file = options["budget"]
+
+        try:
+            times = measure_import_times(repeat=options["repeat"], env=os.environ.copy(), cwd=str(settings.BASE_DIR))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self._report(times, options["top"])
+
+        if options["update"]:
+            modules = load_import_budget(budget_file)["modules"] if os.path.exists(budget_file) else DEFAULT_BUDGET_MODULES
+            save_import_budget(budget_file, build_import_budget(times, modules, headroom=options["headroom"]))
+            self.stdout.write(self.style.SUCCESS(f"Wrote the import time budget to {budget_file}"))
+            return
+
+        try:
+            budget = load_import_budget(budget_file)
+        except FileNotFoundError:
+            raise CommandError(f"The budget file <{budget_file}> was not found, create it with --update")
+
+        overruns = check_import_budget(times, budget)
+
+        if overruns:
+            raise CommandError("Start up is over budget:\n  " + "\n  ".join(overruns))
+
+        self.stdout.write(self.style.SUCCESS("Start up is within budget"))
+
+    def _report(self, times:dict, top:int) -> None:
+        self.stdout.write(f"Start up imported {len(times)} modules in {get_total_import_time_ms(times):.0f}ms\n")
+        self.stdout.write(f"{'cumulative':>12} {'self':>10}  module")
+
+        slowest = sorted(times.values(), key=lambda time: time.cumulative_us, reverse=True)[:top]
+
+        for time in slowest:
+            self.stdout.write(f"{time.cumulative_us / 1000:>10.1f}ms {time.self_us / 1000:>8.1f}ms  {time.name}")
+        self.stdout.write("")
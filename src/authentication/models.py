@@ -821,4 +821,25 @@ class UserBaseLineData(BaseModel):
             return cls.objects.filter(user=user).first()
     
     def __str__(self) -> str:
-        return f"Baseline data:{self.user}, ip:{self.client_ip_address}, success:{self.is_successful})"
\ No newline at end of file
+        return f"Baseline data:{self.user}, ip:{self.client_ip_address}, success:{self.is_successful})"
+
+
+class QueuedEmail(models.Model):
+    """
+    An email waiting to be sent, see `utils.email_dispatcher`.
+
+    Each email is saved here before anything is queued with django-q, so it survives the web process
+    or the worker dying, and is deleted once a worker has sent it. `claimed_on` is set while a worker
+    is sending it, an email whose claim is older than EMAIL_CLAIM_TIMEOUT is sent again.
+    """
+    to_email   = models.EmailField(max_length=254)
+    message    = models.TextField()
+    created_on = models.DateTimeField(auto_now_add=True)
+    claimed_on = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name        = "Queued email"
+        verbose_name_plural = "Queued emails"
+
+    def __str__(self) -> str:
+        return f"Email to {self.to_email} queued on {self.created_on}"
@@ -1,6 +1,5 @@
 from django.db.models.signals import pre_delete, pre_save
 from django.dispatch import receiver
-from dotenv import load_dotenv
 from os import getenv
 
 from .models import BanUser, UserBaseLineData
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+from unittest.mock import patch
+
+from authentication.context_processor import render_authentication_forms
+from authentication.forms.login_form import LoginForm
+
+import re
+
+
+class AuthenticationFormsContextTest(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_forms_are_not_created_unless_a_template_uses_them(self):
+        with patch("authentication.context_processor.LoginForm") as login_form, \
+             patch("authentication.context_processor.RegisterForm") as register_form:
+            render_authentication_forms(self.factory.get("/"))
+        
+        login_form.assert_not_called()
+        register_form.assert_not_called()
+    
+    def test_widgets_are_rendered_from_the_fragment_cache(self):
+        """Test that once the widgets have been rendered the form isn't created again"""
+        
+        first_html = render_to_string("partials/login.html", request=self.factory.get("/"))
+        
+        with patch("authentication.context_processor.LoginForm", side_effect=LoginForm) as login_form:
+            second_html = render_to_string("partials/login.html", request=self.factory.get("/"))
+        
+        login_form.assert_not_called()
+        self.assertIn('type="password"', second_html)
+        self.assertIn('type="password"', first_html)
+    
+    def test_csrf_token_is_rendered_for_each_request(self):
+        """Test that the cached fragments don't freeze the CSRF token of the first request"""
+        
+        first_request, second_request = self.factory.get("/"), self.factory.get("/")
+        
+        first_html  = render_to_string("partials/login.html", request=first_request)
+        second_html = render_to_string("partials/login.html", request=second_request)
+        
+        first_token  = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', first_html).group(1)
+        second_token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', second_html).group(1)
+        
+        self.assertNotEqual(first_token, second_token)
+        self.assertNotEqual(first_request.META["CSRF_COOKIE"], second_request.META["CSRF_COOKIE"])
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+
+from authentication.models import UserBaseLineData
+from utils.batch_distance_calculator import haversine_distances, score_impossible_travel
+from utils.distance_calculator import calculate_distance, is_travel_impossible
+
+import numpy as np
+
+
+NEW_YORK    = (40.7128, -74.0060)
+LONDON      = (51.5074, -0.1278)
+LOS_ANGELES = (34.0522, -118.2437)
+PARIS       = (48.8566, 2.3522)
+
+
+class BatchTravelScoringTest(TestCase):
+
+    def test_haversine_is_close_to_the_geodesic_distance(self):
+        """Test that the vectorised haversine distance is within 0.5% of the geodesic distance"""
+
+        distances = haversine_distances([NEW_YORK[0], LONDON[0]], [NEW_YORK[1], LONDON[1]],
+                                        [LOS_ANGELES[0], PARIS[0]], [LOS_ANGELES[1], PARIS[1]])
+
+        expected = [calculate_distance(*NEW_YORK, *LOS_ANGELES), calculate_distance(*LONDON, *PARIS)]
+        np.testing.assert_allclose(distances, expected, rtol=0.005)
+
+    def test_batch_matches_the_single_pair_check(self):
+        """Test that the batch flags agree with is_travel_impossible for every journey"""
+
+        start     = datetime(2025, 1, 18, 12, 0)
+        journeys  = [
+            (NEW_YORK, LONDON, timedelta(hours=1)),      # impossible
+            (NEW_YORK, LONDON, timedelta(hours=8)),      # possible
+            (LONDON, PARIS, timedelta(minutes=10)),      # impossible
+            (LONDON, PARIS, timedelta(hours=2)),         # possible
+            (LONDON, LONDON, timedelta(0)),              # instantaneous, impossible
+        ]
+
+        scores = score_impossible_travel(
+            lat1=[origin[0] for origin, _, _ in journeys],
+            lon1=[origin[1] for origin, _, _ in journeys],
+            timestamps1=[start] * len(journeys),
+            lat2=[destination[0] for _, destination, _ in journeys],
+            lon2=[destination[1] for _, destination, _ in journeys],
+            timestamps2=[start + duration for _, _, duration in journeys],
+            max_speed_kmh=900,
+        )
+
+        for index, (origin, destination, duration) in enumerate(journeys):
+            expected = is_travel_impossible(
+                {"latitude": origin[0], "longitude": origin[1], "timestamp": start},
+                {"latitude": destination[0], "longitude": destination[1], "timestamp": start + duration},
+                900,
+            )
+            self.assertEqual(bool(scores.is_impossible[index]), expected)
+
+    def test_borderline_speeds_are_refined_with_geodesic(self):
+        """Test that only journeys close to the maximum speed are recalculated with the geodesic formula"""
+
+        geodesic_km = calculate_distance(*NEW_YORK, *LONDON)
+        start       = np.datetime64("2025-01-18T12:00:00")
+
+        # the first journey takes exactly as long as the maximum speed allows, the second is far slower
+        borderline_seconds = int(geodesic_km / 900 * 3600)
+        scores = score_impossible_travel(
+            lat1=[NEW_YORK[0]] * 2, lon1=[NEW_YORK[1]] * 2, timestamps1=[start] * 2,
+            lat2=[LONDON[0]] * 2, lon2=[LONDON[1]] * 2,
+            timestamps2=[start + np.timedelta64(borderline_seconds, "s"), start + np.timedelta64(2, "D")],
+            max_speed_kmh=900,
+        )
+
+        self.assertEqual(scores.refined.tolist(), [True, False])
+        self.assertAlmostEqual(scores.distances_km[0], geodesic_km)
+
+    def test_arrays_must_have_the_same_length(self):
+        """Test that mismatched arrays are rejected"""
+
+        with self.assertRaises(ValueError):
+            score_impossible_travel([1, 2], [1, 2], [0, 0], [1], [1], [0], max_speed_kmh=900)
+
+
+class AuditImpossibleTravelCommandTest(TestCase):
+
+    def setUp(self) -> None:
+        self.User = get_user_model()
+
+    def _create_baseline(self, user, coordinates, created_on):
+        baseline = UserBaseLineData.objects.create(user=user,
+                                                   client_ip_address="hashed__81.2.69.160",
+                                                   latitude=coordinates[0],
+                                                   longitude=coordinates[1],
+                                                   timezone="Europe/London",
+                                                   )
+        UserBaseLineData.objects.filter(pk=baseline.pk).update(created_on=created_on)
+        return baseline
+
+    def test_records_implying_impossible_travel_are_flagged(self):
+        """Test that consecutive records of the same user are compared, including across chunk boundaries"""
+
+        now        = timezone.now()
+        traveller  = self.User.objects.create_user(username="traveller", email="traveller@example.com", password="password")
+        commuter   = self.User.objects.create_user(username="commuter", email="commuter@example.com", password="password")
+
+        self._create_baseline(traveller, NEW_YORK, now)
+        impossible = self._create_baseline(traveller, LONDON, now + timedelta(hours=1))
+        self._create_baseline(commuter, LONDON, now)
+        self._create_baseline(commuter, PARIS, now + timedelta(hours=3))
+
+        output = StringIO()
+        call_command("audit_impossible_travel", chunk_size=1, stdout=output)
+        output = output.getvalue()
+
+        self.assertIn(f"Record {impossible.pk} (user {traveller.pk})", output)
+        self.assertIn("Scored 2 journeys, 1 flagged as impossible travel", output)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from authentication.models import QueuedEmail
+from utils.email_dispatcher import queue_email, send_queued_emails
+from utils.hooks import process_email_batch_result
+from utils.send_email import send_email_batch
+from utils.tasks import send_registration_email
+
+
+def create_message(to_email, email_template="email_assets/registration/registration.html"):
+    return {
+        "subject": "Welcome",
+        "from_email": "admin@example.com",
+        "to_email": to_email,
+        "email_template": email_template,
+        "text_template": "email_assets/registration/registration.txt",
+        "context": {"username": "user", "verification_url": "https://example.com/verify/"},
+    }
+
+
+class QueueEmailTest(TestCase):
+
+    def test_email_is_saved_before_its_task_is_queued(self):
+        """Test that the email is in the outbox and its task is only queued once it has been committed"""
+
+        with patch("utils.email_dispatcher.async_task") as mock_async_task:
+            with self.captureOnCommitCallbacks() as callbacks:
+                queued_email_id = queue_email(create_message("user@example.com"))
+
+                mock_async_task.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        self.assertTrue(queued_email_id)
+        self.assertTrue(QueuedEmail.objects.filter(pk=queued_email_id, to_email="user@example.com").exists())
+        mock_async_task.assert_called_once_with(send_queued_emails, hook=process_email_batch_result)
+
+    def test_waiting_emails_are_sent_in_batches(self):
+        """Test that one task sends up to the batch size over a single connection and deletes what it sent"""
+
+        for index in range(3):
+            queue_email(create_message(f"user{index}@example.com"))
+
+        with patch("django.core.mail.backends.locmem.EmailBackend.open") as open_connection:
+            self.assertEqual(send_queued_emails(batch_size=2), [True, True])
+
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual([email.to for email in mail.outbox], [["user0@example.com"], ["user1@example.com"]])
+        self.assertEqual(list(QueuedEmail.objects.values_list("to_email", flat=True)), ["user2@example.com"])
+
+        self.assertEqual(send_queued_emails(), [True])
+        self.assertEqual(send_queued_emails(), [])
+
+    @override_settings(EMAIL_CLAIM_TIMEOUT=60)
+    def test_emails_claimed_by_a_dead_worker_are_sent_once_the_claim_expires(self):
+        """Test that a claimed email is left alone until its claim expires and is then sent again"""
+
+        queue_email(create_message("user@example.com"))
+        QueuedEmail.objects.update(claimed_on=timezone.now())
+
+        self.assertEqual(send_queued_emails(), [])
+
+        QueuedEmail.objects.update(claimed_on=timezone.now() - timedelta(seconds=61))
+
+        self.assertEqual(send_queued_emails(), [True])
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_send_email_helper_reports_the_email_as_queued(self):
+        """Test that the callers get a truthy value back, they show an error when it isn't"""
+
+        self.assertTrue(send_registration_email("Welcome", "admin@example.com", SimpleNamespace(email="user@example.com", username="user"),
+                                                "https://example.com/verify/"))
+
+
+class SendEmailBatchTest(SimpleTestCase):
+
+    def test_batch_is_sent_over_a_single_connection(self):
+        """Test that every email in the batch is sent without opening a connection per email"""
+
+        messages = [create_message(f"user{index}@example.com") for index in range(3)]
+
+        with patch("django.core.mail.backends.locmem.EmailBackend.open") as open_connection:
+            results = send_email_batch(messages)
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual([email.to for email in mail.outbox], [["user0@example.com"], ["user1@example.com"], ["user2@example.com"]])
+
+    def test_a_failing_email_does_not_stop_the_rest_of_the_batch(self):
+        """Test that each email gets its own result"""
+
+        messages = [create_message("user0@example.com"),
+                    create_message("user1@example.com", email_template="email_assets/does-not-exist.html"),
+                    create_message("user2@example.com"),
+                    ]
+
+        results = send_email_batch(messages)
+
+        self.assertTrue(results[0])
+        self.assertTrue(results[1].startswith("Failed to send email"))
+        self.assertTrue(results[2])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_every_result_is_reported_through_the_email_hook(self):
+        self.assertEqual(process_email_batch_result([True, "Failed to send email: timed out", False]), [True, False, False])
@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+
+from authentication.views_helper import get_cached_geo_location_or_from_ip
+from utils.geo_location import GeoLocationTable, GeoLocationTableError, build_geo_location_table
+
+import os
+import tempfile
+
+
+ROWS = [
+    {"network": "81.2.69.0/24", "city": "London", "region": "England", "country": "GB",
+     "loc": "51.5142,-0.0931", "timezone": "Europe/London", "org": "AS20712 Andrews & Arnold Ltd"},
+    {"network": "8.8.8.0/24", "city": "Mountain View", "region": "California", "country": "US",
+     "loc": "37.4056,-122.0775", "timezone": "America/Los_Angeles", "org": "AS15169 Google LLC"},
+    {"network": "2001:4860::/32", "city": "Mountain View", "region": "California", "country": "US",
+     "loc": "37.4056,-122.0775", "timezone": "America/Los_Angeles", "org": "AS15169 Google LLC"},
+]
+
+
+class GeoLocationTableTest(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir   = tempfile.TemporaryDirectory()
+        self.table_path = os.path.join(self.temp_dir.name, "geoip.bin")
+        build_geo_location_table(ROWS, self.table_path)
+        self.table = GeoLocationTable(self.table_path)
+
+    def tearDown(self) -> None:
+        self.table.close()
+        self.temp_dir.cleanup()
+
+    def test_table_contains_all_ranges(self):
+        """Test that every network in the source rows is written to the table"""
+        self.assertEqual(len(self.table), len(ROWS))
+
+    def test_ipv4_lookup_returns_ipinfo_shaped_dictionary(self):
+        """Test that an IPv4 address inside a range returns the same keys as the ipinfo.io API"""
+
+        location = self.table.lookup("81.2.69.160")
+
+        self.assertEqual(location, {
+            "ip": "81.2.69.160",
+            "city": "London",
+            "region": "England",
+            "country": "GB",
+            "loc": "51.5142,-0.0931",
+            "timezone": "Europe/London",
+            "org": "AS20712 Andrews & Arnold Ltd",
+        })
+
+    def test_range_boundaries_are_inclusive(self):
+        """Test that the first and last address of a network are both found"""
+        self.assertEqual(self.table.lookup("8.8.8.0")["city"], "Mountain View")
+        self.assertEqual(self.table.lookup("8.8.8.255")["city"], "Mountain View")
+
+    def test_ipv6_lookup(self):
+        """Test that IPv6 addresses are resolved"""
+        self.assertEqual(self.table.lookup("2001:4860:4860::8888")["country"], "US")
+
+    def test_ip_outside_of_every_range_returns_none(self):
+        """Test that addresses in the gaps between ranges aren't matched to a neighbouring range"""
+        self.assertIsNone(self.table.lookup("8.8.9.1"))
+        self.assertIsNone(self.table.lookup("1.1.1.1"))
+        self.assertIsNone(self.table.lookup("2001:db8::1"))
+
+    def test_overlapping_networks_are_rejected(self):
+        """Test that a table cannot be built when a network overlaps another"""
+
+        rows = ROWS + [{"network": "81.2.0.0/16", "city": "Elsewhere"}]
+        with self.assertRaises(GeoLocationTableError):
+            build_geo_location_table(rows, os.path.join(self.temp_dir.name, "overlap.bin"))
+
+    def test_invalid_file_is_rejected(self):
+        """Test that a file without the table header cannot be opened"""
+
+        invalid_path = os.path.join(self.temp_dir.name, "invalid.bin")
+        with open(invalid_path, "wb") as file:
+            file.write(b"not a geo-location table")
+
+        with self.assertRaises(GeoLocationTableError):
+            GeoLocationTable(invalid_path)
+
+
+class GetCachedGeoLocationTest(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir   = tempfile.TemporaryDirectory()
+        self.table_path = os.path.join(self.temp_dir.name, "geoip.bin")
+        build_geo_location_table(ROWS, self.table_path)
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+        self.temp_dir.cleanup()
+
+    def test_local_table_is_used_without_calling_the_api(self):
+        """Test that an ip found in the offline table never reaches the ipinfo.io API"""
+
+        with override_settings(GEOIP_DATABASE_PATH=self.table_path, GEOIP_REMOTE_FALLBACK=True):
+            with patch("authentication.views_helper._get_location_from_ip") as remote_lookup:
+                location = get_cached_geo_location_or_from_ip("81.2.69.160")
+
+        remote_lookup.assert_not_called()
+        self.assertEqual(location["city"], "London")
+        self.assertIn("timestamp", location)
+
+    def test_api_is_only_called_when_the_ip_is_missing_from_the_table(self):
+        """Test that the remote API is used as a fallback for unknown ips"""
+
+        remote_location = {"ip": "1.1.1.1", "loc": "-33.8688,151.2093", "city": "Sydney"}
+
+        with override_settings(GEOIP_DATABASE_PATH=self.table_path, GEOIP_REMOTE_FALLBACK=True):
+            with patch("authentication.views_helper._get_location_from_ip", return_value=remote_location) as remote_lookup:
+                location = get_cached_geo_location_or_from_ip("1.1.1.1")
+
+        remote_lookup.assert_called_once_with("1.1.1.1")
+        self.assertEqual(location["city"], "Sydney")
+
+    def test_api_is_not_called_when_the_fallback_is_disabled(self):
+        """Test that disabling the fallback keeps lookups completely offline"""
+
+        with override_settings(GEOIP_DATABASE_PATH=self.table_path, GEOIP_REMOTE_FALLBACK=False):
+            with patch("authentication.views_helper._get_location_from_ip") as remote_lookup:
+                location = get_cached_geo_location_or_from_ip("1.1.1.1")
+
+        remote_lookup.assert_not_called()
+        self.assertIsNone(location)
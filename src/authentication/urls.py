@@ -14,5 +14,6 @@ urlpatterns = [
      path("login/", view=views.user_login, name="login"),
      path("logout", views.user_logout, name="logout"),
      path("forgotten_password/", view=views.forgotten_password, name="forgotten_password"),
+     path("login/timings/", view=views.login_timings, name="login_timings"),
     
 ]
\ No newline at end of file
@@ -23,6 +23,8 @@ from .forms.passwords.forgotten_password import ForgottenPasswordForm
 from .forms.passwords.new_password import NewPasswordForm
 from .views_helper import send_verification_email, get_client_ip_address, get_cached_geo_location_or_from_ip
 from utils.utils import hash_ip
+from utils.timing import Span, Trace, get_timing_histograms
+from utils.decorators import is_authorised
 from utils.tasks import (send_registration_email, 
                                       resend_expired_verification_email, 
                                       send_forgotten_password_verification_email
@@ -30,10 +32,8 @@ from utils.tasks import (send_registration_email,
 
 import logging
 
-from dotenv import load_dotenv
 from os import getenv
 
-load_dotenv()
 
 logger = logging.getLogger('custom_logger')
 
@@ -119,10 +119,19 @@ def user_login(request):
             bool: True if the user is authenticated and active, otherwise False.
         """
         
+        with Trace("login") as trace:
+            is_valid, msg = _validate_user_login(data)
+            trace.annotate(outcome="success" if is_valid else "rejected")
+        return is_valid, msg
+    
+    def _validate_user_login(data:dict):
+        
         email            = data.get("email")
         password         = data.get("password")
         user_device_info = data.get("userDeviceInfo")
-        user             = authenticate(request, email=email, password=password)
+        
+        with Span("authenticate"):
+            user = authenticate(request, email=email, password=password)
         
         if not user:
             logger.warning(f"Failed login attempt for user with email: {email}")
@@ -133,22 +142,29 @@ def user_login(request):
         if not status_ok:
             return False, error_msg
     
-        ip_address     = get_client_ip_address(request)
-        baseline_data  = get_user_baseline_data(ip_address, user)
+        ip_address = get_client_ip_address(request)
+        
+        with Span("get_user_baseline_data"):
+            baseline_data = get_user_baseline_data(ip_address, user)
         
         if not baseline_data:
             logger.error("Baseline data not found for IP: %s", ip_address)
             return False, "Baseline data missing."
         
-        is_supicious_login, msg = is_suspicious_login(ip_address, extract_coordinates(baseline_data))
+        with Span("is_suspicious_login"):
+            is_supicious_login, msg = is_suspicious_login(ip_address, extract_coordinates(baseline_data))
+            
         if is_supicious_login:
             handle_suspicious_login(user, user_device_info, ip_address)
             return False, msg
         
-        process_user_device(user, user_device_info, request, ip_address, baseline_data)        
+        with Span("process_user_device"):
+            process_user_device(user, user_device_info, request, ip_address, baseline_data)        
        
         messages.success(request, "Welcome back, you have successfully logged in.")
-        login(request, user)
+        
+        with Span("login"):
+            login(request, user)
         return True, ''
         
     return validate_json_and_respond(request,
@@ -433,3 +449,17 @@ def check_session(request):
         return JsonResponse({"IS_LOGGED_IN": True}, status=200)
     return JsonResponse({"IS_LOGGED_IN": False}, status=200)
 
+
+@is_authorised
+def login_timings(request):
+    """
+    Returns the aggregated duration histograms of each login stage recorded by this worker process.
+    
+    Only available to admins. Every login also writes its individual stage timings as a structured
+    log record, use this view for the distribution (p50/p95/p99) of each stage.
+
+    Returns:
+        JsonResponse: The histograms keyed by `login.<stage>`.
+    """
+    histograms = {name: histogram for name, histogram in get_timing_histograms().items() if name.startswith("login.")}
+    return JsonResponse(histograms, status=200)
@@ -1,6 +1,5 @@
 from django.conf import settings
 from django.contrib import messages
-from django.core.cache import cache
 from django.conf import settings
 from django.utils import timezone
 from django.http import HttpRequest
@@ -8,25 +7,32 @@ from django.http import HttpRequest
 from authentication.models import UserBaseLineData, UserDevice, User
 from utils.generator import generate_token, generate_verification_url
 from utils.validator import is_ip_address_valid
-from utils.custom_errors import IPAddressError
+from utils.custom_errors import IPAddressError, CircuitBreakerOpenError
 from utils.validator import validate_required_keys
 from utils.distance_calculator import is_travel_impossible
 from utils.utils import get_device, hash_ip
+from utils.geo_location import get_geo_location_table
+from utils.http_client import get_http_client
+from utils.lazy_import import lazy_import
+from utils.stampede_cache import get_or_compute
+from utils.timing import Span
 from utils.tasks import notify_user_of_suspicious_login, notify_user_of_different_browser_login
 
 from os import getenv
-from dotenv import load_dotenv
 
-import requests
 import logging
 
 
 
 logger = logging.getLogger('custom_logger')
 
+# logged on every lookup, sampled through settings.LOG_SAMPLE_RATES
+geo_location_logger = logging.getLogger('custom_logger.geo_location')
+
+
+# only needed when the ipinfo.io fallback fails, see `utils.lazy_import`
+requests = lazy_import("requests")
 
-# Enables the `.env` file to be loaded
-load_dotenv()
 
 def send_verification_email(request, user, subject, follow_up_message, send_func, generate_verification_url_func=None, **kwargs):
     """
@@ -85,8 +91,8 @@ def send_verification_email(request, user, subject, follow_up_message, send_func
         return email_sent
 
     except Exception as e:
-        print(e)
-        print(verification_url)
+        logger.error(f"Failed to send the verification email to <{user.email}>: {e}")
+        logger.debug(f"The verification url sent to <{user.email}> was {verification_url}")
         messages.error(request, "An unexpected error occurred while sending the email. Please try again later.")
         return False
 
@@ -197,6 +203,13 @@ def get_cached_geo_location_or_from_ip(ip_address):
     the geo-location, stored and then returned to the user. If the 
     geo-location cannot be retrieve a value of None is returned.
     
+    The offline geo-location table is always tried first, the ipinfo.io API
+    is only called when the ip is not in the table and `GEOIP_REMOTE_FALLBACK`
+    is enabled. The lookup is cached with `utils.stampede_cache`, so concurrent
+    logins from the same ip share a single lookup, an expiring location is
+    refreshed by one request while the others keep using it, and an ip whose
+    location couldn't be found isn't looked up again for a few minutes.
+    
     Args:
         ip_address (str): The ip address that will be used to return the geo-location.
     
@@ -210,27 +223,58 @@ def get_cached_geo_location_or_from_ip(ip_address):
         
         - None if the geo-location cannot be retrieved using the ip-address
     """
-    key              = f"client_ip_geo_location_{ip_address}"
-    ONE_HOUR_IN_SECS = 3600
-    geo_location     = cache.get(key)
-    
-    if geo_location:
-        print("Getting from cache...")
-        return geo_location
+    return get_or_compute(f"client_ip_geo_location_{ip_address}",
+                          lambda: _lookup_geo_location(ip_address),
+                          timeout=settings.GEOIP_CACHE_TIMEOUT,
+                          stale_timeout=settings.GEOIP_CACHE_STALE_TIMEOUT,
+                          negative_timeout=settings.GEOIP_NEGATIVE_CACHE_TIMEOUT,
+                          )
+
+
+def _lookup_geo_location(ip_address):
+    """
+    Looks up the geo-location for the ip address, first in the offline table and then
+    (if enabled) with the ipinfo.io API. Returns None if the location couldn't be found.
+    """
+    current_geo_location = _get_location_from_local_table(ip_address)
     
-    current_geo_location = _get_location_from_ip(ip_address)
-    print("Retrieving geo-location data from a new request...")
+    if not current_geo_location and settings.GEOIP_REMOTE_FALLBACK:
+        current_geo_location = _get_location_from_ip(ip_address)
+        geo_location_logger.info(f"Retrieved the geo-location of {ip_address} from the ipinfo.io API")
         
     if not current_geo_location:
         logger.error(f"The current geo location for the {ip_address} couldn't be retrieved")
         return None
         
     current_geo_location["timestamp"] = timezone.now()
-        
-    cache.set(key=key, value=current_geo_location, timeout=ONE_HOUR_IN_SECS)
     return current_geo_location
 
 
+def _get_location_from_local_table(ip_address):
+    """
+    Takes either IPV4 or IPV6 ip address and returns the geolocation data using the offline
+    geo-location table found at `settings.GEOIP_DATABASE_PATH`.
+    
+    Args:
+        ip_address (str): An ipv4 or ipv6 address that will be used to retrieve the location data.
+        
+    :Raises
+        Raise `IPAddressError` if the ip address provided is invalid.
+    
+    :Returns
+        Returns a dictionary containing the same keys as the ipinfo.io API (ip, city, region, country, loc, org, timezone)
+        or None if the table is missing or doesn't contain the ip address.
+    """
+    if not is_ip_address_valid(ip_address):
+        raise IPAddressError(f"The ip address <{ip_address}> does not appear to be an IPv4 or IPv6 address")
+    
+    table = get_geo_location_table(settings.GEOIP_DATABASE_PATH)
+    
+    if table is None:
+        return None
+    return table.lookup(ip_address)
+
+
 def _get_location_from_ip(ip_address):
     """
     Takes either IPV4 or IPV6 ip address and returns the geolocation data using the ipinfo.io API
@@ -264,15 +308,24 @@ def _get_location_from_ip(ip_address):
     
     URL = f"https://ipinfo.io/{ip_address}?token={API_KEY}"
     
+    client = get_http_client("ipinfo.io",
+                             connect_timeout=settings.GEOIP_API_CONNECT_TIMEOUT,
+                             read_timeout=settings.GEOIP_API_READ_TIMEOUT,
+                             failure_threshold=settings.GEOIP_API_FAILURE_THRESHOLD,
+                             reset_timeout=settings.GEOIP_API_RESET_TIMEOUT,
+                             )
+    
     try:
                      
-        response = requests.get(URL)
+        response = client.get(URL)
 
         if not response.ok:
             raise IPAddressError(f"Failed to retrieve location for IP address <{ip_address}>. API returned status code {response.status_code}.")
         
         location = response.json()
         return location
+    except CircuitBreakerOpenError as e:
+        raise IPAddressError(f"Skipped fetching data for IP address <{ip_address}>: {e}")
     except requests.exceptions.RequestException as e:
         raise IPAddressError(f"An error occurred while attempting to fetch data for IP address <{ip_address}>: {e}")
 
@@ -380,6 +433,7 @@ def process_user_device(user:User, user_device_info:dict, request:HttpRequest, i
     return True
 
 
+@Span("notify_user_of_suspicious_login")
 def handle_suspicious_login(user:User, user_device_info:dict, ip_address:str):
     """Notify user of a suspicious login attempt."""
     
@@ -389,6 +443,7 @@ def handle_suspicious_login(user:User, user_device_info:dict, ip_address:str):
     notify_user_of_suspicious_login(subject, user, user_device_info, ip_address)
 
 
+@Span("notify_user_of_different_browser_login")
 def handle_different_browser_login(user:User, user_device_info:dict, ip_address:str):
     """Notify user of a login from a different browser."""
     
@@ -0,0 +1,89 @@
+from collections import namedtuple
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from category.models import AllDepartmentsModel
+
+
+DEPARTMENTS_VERSION_KEY = "departments_version"
+
+Department = namedtuple("Department", ["id", "name", "description"])
+
+
+class DepartmentCache:
+    """
+    A versioned cache of the department list shown in the navigation menu.
+
+    Departments rarely change but are rendered on every page, so the list is materialised once as
+    plain tuples and shared between workers through the cache under a version token. Each process
+    also keeps its own copy and only checks the shared version every `check_interval` seconds, so
+    between checks a page render costs neither a query nor a cache read.
+
+    Saving or deleting a department replaces the version with a new token (see `category.signals`),
+    which makes every process reload the list at its next check. The lists cached under old tokens
+    are never read again and expire after DEPARTMENTS_CACHE_TIMEOUT seconds.
+    """
+
+    def __init__(self, check_interval:float = 30) -> None:
+        self.check_interval = check_interval
+        self._version       = None
+        self._departments   = ()
+        self._checked_at    = None
+        self._lock          = Lock()
+
+    def get(self) -> tuple:
+        """Returns the departments ordered by name, as a tuple of `Department` tuples."""
+
+        if self._checked_at is not None and monotonic() - self._checked_at < self.check_interval:
+            return self._departments
+
+        with self._lock:
+            version = _get_version()
+
+            if version != self._version:
+                self._departments = _load_departments(version)
+                self._version     = version
+            self._checked_at = monotonic()
+            return self._departments
+
+    def invalidate(self) -> None:
+        """Replaces the shared version so every process reloads the departments, starting with this one."""
+
+        # a new random token rather than `incr`, which isn't atomic on every backend, so two processes
+        # invalidating at the same time can never both end up on a version one of them has already cached
+        cache.set(DEPARTMENTS_VERSION_KEY, _new_version(), timeout=None)
+
+        with self._lock:
+            self._checked_at = None
+
+
+def _get_version() -> str:
+    version = cache.get(DEPARTMENTS_VERSION_KEY)
+
+    if version is None:
+        cache.add(DEPARTMENTS_VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(DEPARTMENTS_VERSION_KEY)
+    return version
+
+
+def _new_version() -> str:
+    # the version key can be culled from the cache, a random token means a list cached under an
+    # old version is never mistaken for the current one
+    return uuid4().hex
+
+
+def _load_departments(version:str) -> tuple:
+    key         = f"departments_v{version}"
+    departments = cache.get(key)
+
+    if departments is None:
+        departments = tuple(Department(*values) for values in AllDepartmentsModel.get_all_departments().values_list("id", "name", "description"))
+        cache.set(key, departments, timeout=getattr(settings, "DEPARTMENTS_CACHE_TIMEOUT", 60 * 60 * 24))
+    return departments
+
+
+department_cache = DepartmentCache(check_interval=getattr(settings, "DEPARTMENTS_VERSION_CHECK_INTERVAL", 30))
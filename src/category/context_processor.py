@@ -1,9 +1,9 @@
 
-from category.models import AllDepartmentsModel
+from category.cache import department_cache
 
 
 def get_all_departments(request):
-    departments = AllDepartmentsModel.get_all_departments()
+    departments = department_cache.get()
     return {
         "departments": departments
-    }
\ No newline at end of file
+    }
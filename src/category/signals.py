@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+from .cache import department_cache
+from .models import AllDepartmentsModel
+
+
+@receiver(post_save, sender=AllDepartmentsModel)
+@receiver(post_delete, sender=AllDepartmentsModel)
+def invalidate_departments_receiver(sender, instance, *args, **kwargs):
+    # bump the version once the change is committed, bumped before a process could reload the
+    # old list under the new version and keep serving it until the next change
+    transaction.on_commit(department_cache.invalidate)
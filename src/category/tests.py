@@ -1,3 +1,92 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from category.cache import DEPARTMENTS_VERSION_KEY, DepartmentCache, department_cache
+from category.context_processor import get_all_departments
+from category.models import AllDepartmentsModel
+
+
+class DepartmentCacheTest(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        department_cache.invalidate()
+        
+        AllDepartmentsModel.objects.create(name="Vegetables")
+        AllDepartmentsModel.objects.create(name="Fruits")
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_departments_are_ordered_plain_tuples(self):
+        departments = get_all_departments(RequestFactory().get("/"))["departments"]
+        
+        self.assertIsInstance(departments, tuple)
+        self.assertEqual([department.name for department in departments], ["Fruits", "Vegetables"])
+        self.assertNotIsInstance(departments[0], AllDepartmentsModel)
+    
+    def test_departments_are_only_queried_once(self):
+        department_cache.get()
+        
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                department_cache.get()
+    
+    def test_saving_a_department_refreshes_the_list(self):
+        department_cache.get()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            AllDepartmentsModel.objects.create(name="Dairy")
+        
+        self.assertEqual([department.name for department in department_cache.get()], ["Dairy", "Fruits", "Vegetables"])
+    
+    def test_deleting_a_department_refreshes_the_list(self):
+        department_cache.get()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            AllDepartmentsModel.objects.filter(name="Fruits").first().delete()
+        
+        self.assertEqual([department.name for department in department_cache.get()], ["Vegetables"])
+    
+    def test_other_processes_pick_up_a_change_at_their_next_check(self):
+        """Test that a process with its own copy reloads once the shared version has been bumped"""
+        
+        other_process = DepartmentCache(check_interval=0)
+        other_process.get()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            AllDepartmentsModel.objects.create(name="Bakery")
+        
+        self.assertIn("Bakery", [department.name for department in other_process.get()])
+    
+    def test_version_is_only_bumped_once_the_change_is_committed(self):
+        """Test that a process reloading before the commit can't cache the old list under the new version"""
+        
+        other_process = DepartmentCache(check_interval=0)
+        other_process.get()
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            AllDepartmentsModel.objects.create(name="Bakery")
+        
+        with self.assertNumQueries(0):
+            other_process.get()
+        
+        for callback in callbacks:
+            callback()
+        
+        self.assertIn("Bakery", [department.name for department in other_process.get()])
+    
+    def test_invalidating_replaces_the_version_with_a_new_token(self):
+        """Test that the version is set to a fresh token rather than incremented, which isn't atomic on every backend"""
+        
+        version = cache.get(DEPARTMENTS_VERSION_KEY)
+        department_cache.invalidate()
+        
+        self.assertNotIn(cache.get(DEPARTMENTS_VERSION_KEY), (None, version))
+    
+    def test_process_copy_is_served_between_version_checks(self):
+        other_process = DepartmentCache(check_interval=60)
+        other_process.get()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(len(other_process.get()), 2)
@@ -1,4 +1,8 @@
-import google.generativeai as genai
+from utils.lazy_import import lazy_import
+
+
+# the Gemini client is large and only needed when the FAQ bot answers a question
+genai = lazy_import("google.generativeai")
 
 
 def setup_generative_model(api_key, system_instruction="", model_type="gemini-1.5-flash"):
@@ -0,0 +1,68 @@
+from importlib.util import find_spec
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+# How the database connections of a worker are managed, see `get_connection_settings`
+NEW_CONNECTION_PER_REQUEST = "none"
+PERSISTENT                 = "persistent"
+POOL                       = "pool"
+PGBOUNCER                  = "pgbouncer"
+
+CONNECTION_MODES = (NEW_CONNECTION_PER_REQUEST, PERSISTENT, POOL, PGBOUNCER)
+
+
+def get_connection_settings(mode:str = PERSISTENT,
+                            conn_max_age:int = 60,
+                            pool_min_size:int = 2,
+                            pool_max_size:int = 10,
+                            pool_timeout:float = 10,
+                            ) -> dict:
+    """
+    Returns the connection related keys of a `DATABASES` entry for the given mode.
+
+    Modes:
+        none        Opens (and closes) a connection, with its TLS handshake, for every request.
+        persistent  Keeps each thread's connection open for `conn_max_age` seconds and checks it is
+                    still usable before it is re-used (`CONN_HEALTH_CHECKS`). Suits gunicorn's sync
+                    workers and serverless functions that are re-used between invocations.
+        pool        Shares a psycopg (3) connection pool of `pool_min_size` to `pool_max_size` connections
+                    between the threads of a worker, waiting up to `pool_timeout` seconds for a free one.
+                    Suits threaded workers. Needs the `psycopg[pool]` package.
+        pgbouncer   For connecting through pgbouncer (or a provider's pooler, e.g Supabase on port 6543) in
+                    transaction pooling mode. Consecutive transactions may run on different server connections,
+                    so server-side cursors and prepared statements, which outlive a transaction, are turned off.
+
+    Raises:
+        ImproperlyConfigured: If the mode is unknown or the pool is requested without psycopg's pool installed.
+
+    Example usage:
+        >>> DATABASES = {"default": {"ENGINE": "django.db.backends.postgresql", ..., **get_connection_settings("persistent")}}
+    """
+    if mode == NEW_CONNECTION_PER_REQUEST:
+        return {"CONN_MAX_AGE": 0}
+
+    if mode == PERSISTENT:
+        return {"CONN_MAX_AGE": conn_max_age, "CONN_HEALTH_CHECKS": True}
+
+    if mode == POOL:
+
+        # checked without importing psycopg, the settings are loaded on every cold start
+        if find_spec("psycopg") is None or find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured("The database connection pool needs psycopg 3 and its pool, install `psycopg[pool]`")
+
+        # Django hands connections back to the pool at the end of each request, they can't also be persistent
+        return {
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": {"pool": {"min_size": pool_min_size, "max_size": pool_max_size, "timeout": pool_timeout}},
+        }
+
+    if mode == PGBOUNCER:
+        connection_settings = {"CONN_MAX_AGE": conn_max_age, "CONN_HEALTH_CHECKS": True, "DISABLE_SERVER_SIDE_CURSORS": True}
+
+        # psycopg 3 prepares frequently run queries on the server, psycopg2 never does
+        if find_spec("psycopg") is not None:
+            connection_settings["OPTIONS"] = {"prepare_threshold": None}
+        return connection_settings
+
+    raise ImproperlyConfigured(f"Unknown DB_CONNECTION_MODE <{mode}>, expected one of {', '.join(CONNECTION_MODES)}")
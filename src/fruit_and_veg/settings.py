@@ -14,8 +14,11 @@ from pathlib import Path
 from os.path import join
 from dotenv import load_dotenv
 from os import getenv
+from tempfile import gettempdir
 import logging
 
+from fruit_and_veg.db_connections import PERSISTENT, get_connection_settings
+
 # Enables the `.env` file to be loaded
 load_dotenv(override=True)
 
@@ -138,6 +141,19 @@ EMAIL_USE_TLS       = getenv('EMAIL_USE_TLS')
 EMAIL_HOST_USER     = getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = getenv('EMAIL_HOST_PASSWORD')
 
+# Emails are saved to an outbox (see `utils.email_dispatcher`) and a django-q worker sends up to EMAIL_BATCH_SIZE
+# of them over one SMTP connection. An email claimed by a worker that died is sent again after EMAIL_CLAIM_TIMEOUT
+# seconds, which is kept below the cluster's `retry` (see Q_CLUSTER) so the retried task can pick it up.
+EMAIL_BATCH_SIZE    = int(getenv('EMAIL_BATCH_SIZE', 50))
+EMAIL_CLAIM_TIMEOUT = int(getenv('EMAIL_CLAIM_TIMEOUT', 60))
+
+# Newsletter sends (see `python manage.py send_newsletter`). Subscriptions are read NEWSLETTER_CHUNK_SIZE at a time,
+# each email is recorded as it is sent, the checkpoint is advanced every NEWSLETTER_BATCH_SIZE emails and at most NEWSLETTER_RATE_LIMIT emails are sent a second.
+# With --async each batch is its own django-q task, so a batch (BATCH_SIZE / RATE_LIMIT seconds) must fit in Q_CLUSTER's timeout
+NEWSLETTER_CHUNK_SIZE = int(getenv('NEWSLETTER_CHUNK_SIZE', 500))
+NEWSLETTER_BATCH_SIZE = int(getenv('NEWSLETTER_BATCH_SIZE', 50))
+NEWSLETTER_RATE_LIMIT = float(getenv('NEWSLETTER_RATE_LIMIT', 10))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -169,6 +185,17 @@ else:
     DB_PORT     = getenv("DB_PORT")
    
    
+# How database connections are managed, see fruit_and_veg/db_connections.py. One of
+#   persistent : (default) connections are re-used for DB_CONN_MAX_AGE seconds and health checked before re-use
+#   pool       : threads share a psycopg pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections, needs psycopg[pool]
+#   pgbouncer  : persistent connections to pgbouncer (or e.g Supabase's pooler on port 6543) in transaction mode
+#   none       : a new connection for every request
+DB_CONNECTION_MODE = getenv("DB_CONNECTION_MODE", PERSISTENT).strip().lower()
+DB_CONN_MAX_AGE    = int(getenv("DB_CONN_MAX_AGE", 60))
+DB_POOL_MIN_SIZE   = int(getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE   = int(getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT    = float(getenv("DB_POOL_TIMEOUT", 10))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -177,6 +204,12 @@ DATABASES = {
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
         'PORT': DB_PORT,
+        **get_connection_settings(DB_CONNECTION_MODE,
+                                  conn_max_age=DB_CONN_MAX_AGE,
+                                  pool_min_size=DB_POOL_MIN_SIZE,
+                                  pool_max_size=DB_POOL_MAX_SIZE,
+                                  pool_timeout=DB_POOL_TIMEOUT,
+                                  ),
     }
 }
 
@@ -204,15 +237,28 @@ AUTH_PASSWORD_VALIDATORS = [
 
 
 
+# The default cache keeps recently used entries in each worker's memory in front of the shared cache,
+# see utils/cache_backends.py. The shared cache is file based unless SHARED_CACHE_BACKEND is set e.g
+# django.core.cache.backends.redis.RedisCache or django.core.cache.backends.db.DatabaseCache
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': CACHES_DIR,
+        'BACKEND': 'utils.cache_backends.TwoTierCache',
+        'TIMEOUT': 86400,  # Cache timeout in seconds 24 hours
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,    # Maximum number of entries kept in each worker's memory
+            'LOCAL_TIMEOUT': 60,          # Maximum number of seconds an entry is served from memory
+            'VERSION_CHECK_INTERVAL': 1,  # How often a worker checks if another worker has written to a key it holds
+        },
+    },
+    'shared': {
+        'BACKEND': getenv('SHARED_CACHE_BACKEND') or 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': getenv('SHARED_CACHE_LOCATION') or CACHES_DIR,
         'TIMEOUT': 86400,  # Cache timeout in seconds 24 hours
         'OPTIONS': {
             'MAX_ENTRIES': 4000,  # Maximum number of cache entries
         },
-    }
+    },
 }
 
 
@@ -368,6 +414,82 @@ CKEDITOR_5_CONFIGS = {
 API_KEY = getenv("API_KEY")
 
 
+# The most a worker may spend importing modules before it answers its first request, in milliseconds,
+# overall and per module. Checked by `python manage.py check_import_time`, refreshed with its --update flag.
+IMPORT_TIME_BUDGET_FILE = join(BASE_DIR, "import_time_budget.json")
+
+
+# Offline geo-location table used to turn a client ip into a location at login/registration.
+# Build it from a CSV of CIDR ranges with `python manage.py build_geo_location_table <csv file>`.
+# When an ip isn't found in the table the ipinfo.io API is used instead, unless the fallback is turned off.
+GEOIP_DATABASE_PATH   = getenv("GEOIP_DATABASE_PATH") or join(BASE_DIR, "geoip", "geoip.bin")
+GEOIP_REMOTE_FALLBACK = getenv("GEOIP_REMOTE_FALLBACK", "True").strip().title() in ["True", "1"]
+
+# Bounds for the ipinfo.io fallback. Requests that take longer than the timeouts (in seconds) are abandoned
+# and after GEOIP_API_FAILURE_THRESHOLD consecutive failures the API isn't called for GEOIP_API_RESET_TIMEOUT seconds
+GEOIP_API_CONNECT_TIMEOUT   = float(getenv("GEOIP_API_CONNECT_TIMEOUT", 2))
+GEOIP_API_READ_TIMEOUT      = float(getenv("GEOIP_API_READ_TIMEOUT", 3))
+GEOIP_API_FAILURE_THRESHOLD = 5
+GEOIP_API_RESET_TIMEOUT     = 30
+
+# Looked up locations are cached for GEOIP_CACHE_TIMEOUT seconds and may be served for another
+# GEOIP_CACHE_STALE_TIMEOUT seconds while they are being refreshed. An ip whose location couldn't
+# be found isn't looked up again for GEOIP_NEGATIVE_CACHE_TIMEOUT seconds.
+GEOIP_CACHE_TIMEOUT          = 3600
+GEOIP_CACHE_STALE_TIMEOUT    = 600
+GEOIP_NEGATIVE_CACHE_TIMEOUT = 300
+
+
+# Parsed user-agents are kept in a per-process LRU cache of USER_AGENT_CACHE_SIZE entries.
+# Set USER_AGENT_SHARED_CACHE_TIMEOUT (in seconds) to also share them between workers through the default cache.
+USER_AGENT_CACHE_SIZE           = int(getenv("USER_AGENT_CACHE_SIZE", 1024))
+USER_AGENT_SHARED_CACHE_TIMEOUT = int(getenv("USER_AGENT_SHARED_CACHE_TIMEOUT", 0)) or None
+
+# The local IP address of the machine is resolved when a worker starts and re-resolved in the background every N seconds
+LOCAL_IP_REFRESH_INTERVAL = int(getenv("LOCAL_IP_REFRESH_INTERVAL", 300))
+
+# The testimonial carousel shows up to TESTIMONIAL_CAROUSEL_SIZE approved testimonials, cached for
+# TESTIMONIAL_CACHE_TIMEOUT seconds or until a testimonial is approved, edited or deleted
+TESTIMONIAL_CAROUSEL_SIZE = 10
+TESTIMONIAL_CACHE_TIMEOUT = 60 * 60
+
+# How often (in seconds) each process checks whether the cached department menu has changed,
+# and how long (in seconds) each version of the menu is kept in the shared cache
+DEPARTMENTS_VERSION_CHECK_INTERVAL = 30
+DEPARTMENTS_CACHE_TIMEOUT          = 60 * 60 * 24
+
+# How long (in seconds) the rendered widgets of the login and register modals are cached for
+AUTH_FORMS_CACHE_TIMEOUT = 60 * 60
+
+# The review step of the add-product wizard shows the uploaded images as thumbnails THUMBNAIL_SIZE pixels on
+# their longest side. The thumbnails are made once and kept in THUMBNAIL_CACHE_DIR, and their signed urls
+# expire after THUMBNAIL_URL_MAX_AGE seconds.
+THUMBNAIL_SIZE        = 320
+THUMBNAIL_CACHE_DIR   = getenv("THUMBNAIL_CACHE_DIR") or join(gettempdir(), "product_thumbnails")
+THUMBNAIL_URL_MAX_AGE = 60 * 10
+
+# The add-product wizard keeps each session's uploads in a directory under WIZARD_UPLOAD_ROOT until the product
+# is saved. Every WIZARD_UPLOAD_CLEANUP_INTERVAL minutes a django-q task deletes the directories (and thumbnails)
+# untouched for WIZARD_UPLOAD_MAX_AGE seconds, WIZARD_UPLOAD_CLEANUP_BATCH_SIZE at a time.
+WIZARD_UPLOAD_ROOT                = getenv("WIZARD_UPLOAD_ROOT") or join(gettempdir(), "product_wizard_uploads")
+WIZARD_UPLOAD_MAX_AGE             = 60 * 60 * 24
+WIZARD_UPLOAD_CLEANUP_INTERVAL    = 60
+WIZARD_UPLOAD_CLEANUP_BATCH_SIZE  = 100
+
+# When a product is saved its images are resized to each of PRODUCT_IMAGE_VARIANT_WIDTHS (in pixels) in each of
+# PRODUCT_IMAGE_VARIANT_FORMATS by a django-q task, see product/image_variants.py, and served with `srcset`.
+PRODUCT_IMAGE_VARIANT_WIDTHS  = (320, 640, 1024, 1600)
+PRODUCT_IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+PRODUCT_IMAGE_VARIANT_QUALITY = 80
+
+# The images uploaded for a product are checked from their header before they are saved: only these formats are
+# accepted and neither side may be longer than PRODUCT_IMAGE_MAX_DIMENSION pixels, nor the image have more than
+# PRODUCT_IMAGE_MAX_PIXELS pixels, so an image too large to resize is rejected before it is ever decoded
+PRODUCT_IMAGE_UPLOAD_FILE_TYPES = ['jpeg', 'png', 'webp']
+PRODUCT_IMAGE_MAX_DIMENSION     = 8000
+PRODUCT_IMAGE_MAX_PIXELS        = 40_000_000
+
+
 STATICFILES_FINDERS = [
     'django.contrib.staticfiles.finders.FileSystemFinder',
     'django.contrib.staticfiles.finders.AppDirectoriesFinder',
@@ -381,9 +503,23 @@ STATICFILES_FINDERS = [
 COMPRESS_ENABLED = True 
 
 
+# Records from custom_logger are put on a bounded queue and written by a background thread, so logging never
+# blocks a request, see utils/structured_logging.py. The log file has one JSON record per line.
+# LOG_SAMPLE_RATES keeps only a fraction of the DEBUG and INFO records of noisy loggers (and their children).
+LOG_QUEUE_SIZE   = 10000
+LOG_SAMPLE_RATES = {
+    'custom_logger.geo_location': float(getenv("LOG_GEO_LOCATION_SAMPLE_RATE", 0.1)),
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'utils.structured_logging.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'formatters': {
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
@@ -393,6 +529,9 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'utils.structured_logging.JSONFormatter',
+        },
     },
     'handlers': {
         'console': {
@@ -403,7 +542,14 @@ LOGGING = {
             'level': 'DEBUG',  
             'class': 'logging.FileHandler',
             'filename': 'app.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'utils.structured_logging.NonBlockingQueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'maxsize': LOG_QUEUE_SIZE,
+            'respect_handler_level': True,
+            'filters': ['sampling'],
         },
     },
     'loggers': {
@@ -413,7 +559,7 @@ LOGGING = {
             'propagate': True,
         },
         'custom_logger': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'DEBUG', 
             'propagate': False,
         },
@@ -0,0 +1,52 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from fruit_and_veg.db_connections import get_connection_settings
+
+
+class ConnectionSettingsTest(SimpleTestCase):
+
+    def test_persistent_connections_are_health_checked(self):
+        """Test that persistent connections are checked before they are re-used"""
+
+        self.assertEqual(get_connection_settings("persistent", conn_max_age=30), {"CONN_MAX_AGE": 30, "CONN_HEALTH_CHECKS": True})
+
+    def test_new_connection_per_request(self):
+        """Test that the `none` mode closes the connection at the end of every request"""
+
+        self.assertEqual(get_connection_settings("none"), {"CONN_MAX_AGE": 0})
+
+    def test_pool_is_configured_when_psycopg_pool_is_installed(self):
+        """Test that the pool mode uses Django's psycopg pool and no persistent connections"""
+
+        with patch("fruit_and_veg.db_connections.find_spec", return_value=object()):
+            connection_settings = get_connection_settings("pool", pool_min_size=1, pool_max_size=4, pool_timeout=5)
+
+        self.assertEqual(connection_settings["CONN_MAX_AGE"], 0)
+        self.assertEqual(connection_settings["OPTIONS"], {"pool": {"min_size": 1, "max_size": 4, "timeout": 5}})
+
+    def test_pool_without_psycopg_pool_is_refused(self):
+        """Test that asking for the pool without psycopg's pool installed fails when the settings load"""
+
+        with patch("fruit_and_veg.db_connections.find_spec", return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                get_connection_settings("pool")
+
+    def test_pgbouncer_disables_server_side_cursors(self):
+        """Test that the pgbouncer mode turns off what doesn't survive transaction pooling"""
+
+        with patch("fruit_and_veg.db_connections.find_spec", return_value=object()):
+            connection_settings = get_connection_settings("pgbouncer")
+
+        self.assertTrue(connection_settings["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertEqual(connection_settings["OPTIONS"], {"prepare_threshold": None})
+
+        with patch("fruit_and_veg.db_connections.find_spec", return_value=None):
+            self.assertNotIn("OPTIONS", get_connection_settings("pgbouncer"))
+
+    def test_unknown_mode_is_refused(self):
+        """Test that a typo in DB_CONNECTION_MODE isn't silently ignored"""
+
+        with self.assertRaises(ImproperlyConfigured):
+            get_connection_settings("persistant")
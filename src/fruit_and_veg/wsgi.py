@@ -15,6 +15,11 @@ from whitenoise import WhiteNoise
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fruit_and_veg.settings')
 
 application = get_wsgi_application()
+
+# resolved once when the worker starts so requests never wait on the DNS lookup
+from utils.local_ip import local_ip_resolver
+local_ip_resolver.start()
+
 application = WhiteNoise(application)
 app = application
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Product, ProductVariation, Category, Brand, Manufacturer, Shipping
+from .models import Product, ProductVariation, Category, Brand, Manufacturer, Shipping, ProductImageVariant
 
 
 # Register your models here.
@@ -21,6 +21,21 @@ class ShippingStackInline(admin.StackedInline):
     extra = 1
 
 
+class ProductImageVariantTabularInline(admin.TabularInline):
+    """
+    Displays the resized copies of the product's images, which are made by a background task when
+    the product is saved and so can only be viewed here.
+    """
+    model           = ProductImageVariant
+    extra           = 0
+    can_delete      = False
+    fields          = ["image_field", "format", "width", "height", "image", "created_on"]
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class ShippingAdmin(admin.ModelAdmin):
     """
     Admin interface for the Shipping model.
@@ -78,7 +93,7 @@ class ProductModelAdmin(admin.ModelAdmin):
     
     readonly_fields = ["created_on", "modified_on"]
     list_per_page   = 25
-    inlines         = [ProductVariationStackInline, ShippingStackInline]
+    inlines         = [ProductVariationStackInline, ShippingStackInline, ProductImageVariantTabularInline]
     
     def brand_name(self, obj):
         return obj.brand
@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django_q.tasks import async_task
+from io import BytesIO
+from os.path import basename, splitext
+
+from utils.lazy_import import lazy_import
+from .models import Product, ProductImageVariant
+
+import logging
+
+
+Image    = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+
+logger = logging.getLogger("custom_logger")
+
+
+IMAGE_FIELDS = [choice.value for choice in ProductImageVariant.ImageField]
+
+VARIANT_FOLDER = "product_images/variants"
+
+PIL_FORMATS = {
+    ProductImageVariant.Format.WEBP: "WEBP",
+    ProductImageVariant.Format.JPEG: "JPEG",
+}
+
+
+def get_variant_widths(original_width, widths=None):
+    """
+    Returns the widths to resize an image to, never wider than the original.
+
+    An image narrower than the smallest width is kept at its own width, so every image has at
+    least one variant in each format.
+
+    Example:
+        >>> get_variant_widths(800, [320, 640, 1024])
+        [320, 640]
+    """
+    widths = sorted(widths or settings.PRODUCT_IMAGE_VARIANT_WIDTHS)
+    return [width for width in widths if width <= original_width] or [original_width]
+
+
+def render_variants(image_file, widths=None, formats=None, quality=None):
+    """
+    Resizes an image to each width in each format.
+
+    The image is turned the right way up from its EXIF orientation and then saved without its
+    metadata (EXIF, including any GPS position, XMP and colour profiles), which also saves a few
+    kilobytes on photos taken with a phone.
+
+    Args:
+        image_file (file): The original image, opened for reading.
+        widths (list): The widths in pixels, PRODUCT_IMAGE_VARIANT_WIDTHS by default.
+        formats (list): The `ProductImageVariant.Format` values, PRODUCT_IMAGE_VARIANT_FORMATS by default.
+        quality (int): The WebP and JPEG quality, PRODUCT_IMAGE_VARIANT_QUALITY by default.
+
+    Returns:
+        list: A `(format, width, height, bytes)` tuple for each variant.
+
+    Raises:
+        PIL.UnidentifiedImageError: If the file isn't an image.
+    """
+    formats  = formats or settings.PRODUCT_IMAGE_VARIANT_FORMATS
+    quality  = quality or settings.PRODUCT_IMAGE_VARIANT_QUALITY
+    variants = []
+
+    with Image.open(image_file) as original:
+
+        original = ImageOps.exif_transpose(original).convert("RGB")
+
+        for width in get_variant_widths(original.width, widths):
+            height  = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+            resized.info.clear()
+
+            for image_format in formats:
+                buffer = BytesIO()
+                resized.save(buffer, format=PIL_FORMATS[image_format], quality=quality, optimize=True)
+                variants.append((image_format, width, height, buffer.getvalue()))
+
+    return variants
+
+
+def get_stale_image_fields(product):
+    """
+    Returns the image fields of the product whose variants are missing or were made from a previous image.
+
+    Costs a single query, so it is cheap enough to check on every save.
+    """
+    sources = dict(product.image_variants.values_list("image_field", "source").distinct())
+    return [field for field in IMAGE_FIELDS if getattr(product, field) and sources.get(field) != getattr(product, field).name]
+
+
+def create_product_image_variants(product_id, image_fields=None):
+    """
+    Creates the resized variants of a product's images, run by django-q after the product is saved.
+
+    Only the images whose variants are missing or out of date are processed, so running the task twice
+    (or for a product whose images haven't changed) does nothing. The variants of a replaced image are
+    deleted, files included. An image that can't be read is logged and skipped without failing the
+    other images of the product.
+
+    The variants are rendered and their files written outside of any transaction, then the product
+    row is locked while the old variants are swapped for the new ones, so two tasks for the same
+    product can't both insert variants. If the swap fails the files just written are deleted.
+
+    Args:
+        product_id (int): The product's primary key.
+        image_fields (list): The image fields to process, all stale fields by default.
+
+    Returns:
+        int: The number of variants created.
+    """
+    try:
+        product = Product.objects.get(pk=product_id)
+    except Product.DoesNotExist:
+        logger.warning(f"The image variants of product <{product_id}> weren't created, the product no longer exists")
+        return 0
+
+    created = 0
+
+    for field in get_stale_image_fields(product):
+        if image_fields and field not in image_fields:
+            continue
+
+        image = getattr(product, field)
+
+        try:
+            with image.open("rb"):
+                variants = render_variants(image.file)
+        except Exception as e:
+            logger.error(f"The image variants of <{image.name}> for product <{product_id}> couldn't be created: {e}")
+            continue
+
+        name, _ = splitext(basename(image.name))
+        saved   = []
+
+        try:
+            for image_format, width, height, content in variants:
+                saved.append((image_format, width, height, default_storage.save(f"{VARIANT_FOLDER}/{name}_{width}w.{image_format}", ContentFile(content))))
+
+            created += _replace_image_variants(product_id, field, image.name, saved)
+        except BaseException:
+            _delete_files([stored_name for _, _, _, stored_name in saved])
+            raise
+
+    return created
+
+
+def _replace_image_variants(product_id, image_field, source, saved):
+    """Swaps the variants of one of the product's images for the saved ones, returns the number created."""
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().filter(pk=product_id).first()
+
+        # the product was deleted, or the image replaced or processed by another task while this one was rendering
+        if product is None or image_field not in get_stale_image_fields(product) or getattr(product, image_field).name != source:
+            transaction.on_commit(lambda: _delete_files([stored_name for _, _, _, stored_name in saved]))
+            return 0
+
+        delete_image_variants(product, image_field)
+
+        ProductImageVariant.objects.bulk_create([
+            ProductImageVariant(product=product,
+                                image_field=image_field,
+                                source=source,
+                                image=stored_name,
+                                format=image_format,
+                                width=width,
+                                height=height,
+                                )
+            for image_format, width, height, stored_name in saved
+        ])
+
+    return len(saved)
+
+
+def delete_image_variants(product, image_field):
+    """
+    Deletes the variants of one of the product's images.
+
+    Their files are deleted by the `post_delete` receiver in `product.signals`, once the transaction commits.
+    """
+    product.image_variants.filter(image_field=image_field).delete()
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            logger.warning(f"The image variant <{name}> couldn't be deleted: {e}")
+
+
+def queue_product_image_variants(product):
+    """
+    Queues `create_product_image_variants` for a product whose images have changed.
+
+    The task is queued once the transaction saving the product commits, so the worker never
+    looks for a product (or image) that isn't in the database yet.
+
+    Returns:
+        bool: True if the task will be queued.
+    """
+    stale_fields = get_stale_image_fields(product)
+
+    if not stale_fields:
+        return False
+
+    transaction.on_commit(lambda: async_task(create_product_image_variants, product.pk, stale_fields))
+    return True
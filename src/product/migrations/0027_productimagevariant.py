@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0026_product_is_live'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_field', models.CharField(choices=[('primary_image', 'Primary image'), ('side_image', 'Side image'), ('side_image_2', 'Second side image')], max_length=20)),
+                ('source', models.CharField(help_text='The stored name of the image the variant was made from', max_length=255)),
+                ('image', models.ImageField(max_length=255, upload_to='product_images/variants')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=4)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='product.product')),
+            ],
+            options={
+                'ordering': ['product', 'image_field', 'format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'image_field', 'format', 'width'), name='unique_product_image_variant')],
+            },
+        ),
+    ]
@@ -244,4 +244,39 @@ class Product(models.Model):
         return self.discount_price if self.discount else self.price      
     
     
-   
\ No newline at end of file
+   
+
+class ProductImageVariant(models.Model):
+    """
+    A resized copy of one of a product's images, made by `product.image_variants.create_product_image_variants`.
+
+    Each image is stored at several widths in several formats (e.g WebP and JPEG) so pages can let
+    the browser pick the smallest copy that fits through `srcset`, see `product/templatetags/product_images.py`.
+    """
+    
+    class ImageField(models.TextChoices):
+        PRIMARY_IMAGE = ("primary_image", "Primary image")
+        SIDE_IMAGE    = ("side_image",    "Side image")
+        SIDE_IMAGE_2  = ("side_image_2",  "Second side image")
+    
+    class Format(models.TextChoices):
+        WEBP = ("webp", "WebP")
+        JPEG = ("jpeg", "JPEG")
+    
+    product     = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="image_variants")
+    image_field = models.CharField(choices=ImageField.choices, max_length=20)
+    source      = models.CharField(max_length=255, help_text="The stored name of the image the variant was made from")
+    image       = models.ImageField(upload_to="product_images/variants", max_length=255)
+    format      = models.CharField(choices=Format.choices, max_length=4)
+    width       = models.PositiveIntegerField()
+    height      = models.PositiveIntegerField()
+    created_on  = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self) -> str:
+        return f"{self.product} - {self.image_field} - {self.width}w {self.format}"
+    
+    class Meta:
+        ordering    = ["product", "image_field", "format", "width"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "image_field", "format", "width"], name="unique_product_image_variant"),
+        ]
@@ -1,10 +1,12 @@
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.forms import ValidationError
 
 
 from utils.generator import generate_token
-from .models import Product
+from .models import Product, ProductImageVariant
+from .image_variants import queue_product_image_variants
 
 
 
@@ -16,4 +18,23 @@ def pre_save_product(sender, instance, *args, **kwargs):
         instance.upc = generate_token()
         
     if len(instance.short_description) > 255:
-        raise ValidationError("Short description cannot exceed 255 characters.")
\ No newline at end of file
+        raise ValidationError("Short description cannot exceed 255 characters.")
+
+
+@receiver(post_save, sender=Product)
+def post_save_product(sender, instance, raw=False, *args, **kwargs):
+    # fixtures are loaded with `raw`, their images may not even exist
+    if not raw:
+        queue_product_image_variants(instance)
+
+
+@receiver(post_delete, sender=ProductImageVariant)
+def post_delete_product_image_variant(sender, instance, *args, **kwargs):
+    """
+    Deletes the variant's file, whether the variant was replaced or deleted along with its product.
+
+    The file is only deleted once the delete is committed, so a rolled back transaction never
+    leaves a variant pointing at a missing file.
+    """
+    image = instance.image
+    transaction.on_commit(lambda: image.delete(save=False))
@@ -0,0 +1,69 @@
+from django import template
+from django.utils.html import format_html
+
+from product.models import ProductImageVariant
+
+
+register = template.Library()
+
+
+def get_variants(product, image_field, image_format):
+    # filtered in Python so a page listing many products can prefetch the variants with
+    # `Product.objects.prefetch_related("image_variants")` instead of querying for each product
+    source = getattr(product, image_field).name
+    return [variant for variant in product.image_variants.all()
+            if variant.image_field == image_field and variant.format == image_format and variant.source == source]
+
+
+def build_srcset(variants):
+    return ", ".join(f"{variant.image.url} {variant.width}w" for variant in variants)
+
+
+@register.simple_tag
+def image_srcset(product, image_field="primary_image", image_format=ProductImageVariant.Format.WEBP):
+    """
+    Returns the `srcset` of one of a product's images in the given format, or an empty string if its
+    variants haven't been made yet.
+
+    Example usage:
+        <img src="{{ product.primary_image.url }}" srcset="{% image_srcset product 'primary_image' 'jpeg' %}" sizes="50vw">
+    """
+    return build_srcset(get_variants(product, image_field, image_format))
+
+
+@register.simple_tag
+def product_picture(product, image_field="primary_image", sizes="100vw", alt="", css_class=""):
+    """
+    Renders a `<picture>` of one of a product's images that lets the browser pick the smallest variant
+    that fits, WebP where it is supported and JPEG otherwise. The original image is used until the
+    variants have been made.
+
+    Example usage:
+        {% load product_images %}
+        {% product_picture product "primary_image" sizes="(max-width: 768px) 100vw, 33vw" alt=product.name %}
+    """
+    image = getattr(product, image_field)
+
+    if not image:
+        return ""
+
+    jpeg_variants = get_variants(product, image_field, ProductImageVariant.Format.JPEG)
+
+    if not jpeg_variants:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', image.url, alt, css_class)
+
+    webp_variants = get_variants(product, image_field, ProductImageVariant.Format.WEBP)
+    largest       = jpeg_variants[-1]
+    webp_source   = format_html('<source type="image/webp" srcset="{}" sizes="{}">', build_srcset(webp_variants), sizes) if webp_variants else ""
+
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="lazy"></picture>',
+        webp_source,
+        largest.image.url,
+        build_srcset(jpeg_variants),
+        sizes,
+        largest.width,
+        largest.height,
+        alt,
+        css_class,
+    )
@@ -0,0 +1,188 @@
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from io import BytesIO
+from PIL import Image
+from unittest.mock import patch
+
+import shutil
+import tempfile
+
+from product.image_variants import VARIANT_FOLDER, create_product_image_variants, get_variant_widths, render_variants
+from product.models import Product, ProductImageVariant
+from product.tests.factory import ProductFactory
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_jpeg(size=(2000, 1000), colour="green", exif=None):
+    buffer = BytesIO()
+    image  = Image.new("RGB", size, colour)
+    image.save(buffer, format="JPEG", exif=exif or Image.Exif())
+    return SimpleUploadedFile("apple.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT,
+                   PRODUCT_IMAGE_VARIANT_WIDTHS=(320, 640, 4000),
+                   PRODUCT_IMAGE_VARIANT_FORMATS=("webp", "jpeg"),
+                   )
+class ProductImageVariantTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.product = ProductFactory(primary_image=create_jpeg(), side_image=create_jpeg(colour="red"), side_image_2=create_jpeg(colour="yellow"))
+
+    def test_variants_are_never_wider_than_the_original(self):
+        """Test that widths wider than the image are left out and a small image keeps its own width"""
+
+        self.assertEqual(get_variant_widths(2000, [320, 640, 4000]), [320, 640])
+        self.assertEqual(get_variant_widths(100, [320, 640]), [100])
+
+    def test_metadata_is_stripped(self):
+        """Test that the EXIF data of the original isn't copied to the variants"""
+
+        exif = Image.Exif()
+        exif[0x010F] = "Phone maker"
+
+        for image_format, _, _, content in render_variants(create_jpeg(exif=exif), widths=[320], formats=["webp", "jpeg"]):
+            with Image.open(BytesIO(content)) as variant:
+                self.assertFalse(variant.getexif(), msg=f"The {image_format} variant kept the EXIF data")
+
+    def test_variants_are_created_for_each_image_width_and_format(self):
+        """Test that the task records a variant of each image at each width in each format"""
+
+        created = create_product_image_variants(self.product.pk)
+
+        self.assertEqual(created, 3 * 2 * 2)
+
+        variant = self.product.image_variants.get(image_field="primary_image", format="webp", width=640)
+
+        self.assertEqual(variant.height, 320)
+        self.assertEqual(variant.source, self.product.primary_image.name)
+
+        with Image.open(variant.image) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (640, 320)))
+
+    def test_task_does_nothing_when_the_images_are_unchanged(self):
+        """Test that running the task again doesn't recreate the variants"""
+
+        create_product_image_variants(self.product.pk)
+
+        self.assertEqual(create_product_image_variants(self.product.pk), 0)
+
+    def test_replaced_image_gets_new_variants(self):
+        """Test that replacing an image replaces its variants and leaves the other images' variants alone"""
+
+        create_product_image_variants(self.product.pk)
+        old_variant = self.product.image_variants.filter(image_field="primary_image").first()
+        side_ids    = set(self.product.image_variants.exclude(image_field="primary_image").values_list("id", flat=True))
+
+        self.product.primary_image = create_jpeg(size=(500, 500))
+        self.product.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(create_product_image_variants(self.product.pk), 2)
+
+        self.assertFalse(old_variant.image.storage.exists(old_variant.image.name))
+        self.assertEqual(set(self.product.image_variants.exclude(image_field="primary_image").values_list("id", flat=True)), side_ids)
+        self.assertEqual(list(self.product.image_variants.filter(image_field="primary_image").values_list("width", flat=True)), [320, 320])
+
+    def test_unreadable_image_is_skipped(self):
+        """Test that an image that isn't an image is skipped without failing the others"""
+
+        self.product.side_image = SimpleUploadedFile("pear.jpg", b"not an image", content_type="image/jpeg")
+        self.product.save()
+
+        self.assertEqual(create_product_image_variants(self.product.pk), 2 * 2 * 2)
+        self.assertFalse(self.product.image_variants.filter(image_field="side_image").exists())
+
+    def test_saving_a_product_queues_the_task_after_commit(self):
+        """Test that the task is queued once the product is committed and only while its images have changed"""
+
+        with patch("product.image_variants.async_task") as mock_async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product.save()
+
+            mock_async_task.assert_called_once_with(create_product_image_variants, self.product.pk, ["primary_image", "side_image", "side_image_2"])
+
+            create_product_image_variants(self.product.pk)
+            mock_async_task.reset_mock()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product.save()
+
+            mock_async_task.assert_not_called()
+
+    def test_template_tags_emit_srcset(self):
+        """Test that the picture tag lists the WebP and JPEG variants by width"""
+
+        create_product_image_variants(self.product.pk)
+        product = Product.objects.prefetch_related("image_variants").get(pk=self.product.pk)
+
+        template = Template('{% load product_images %}{% product_picture product "primary_image" sizes="50vw" alt="Apple" %}'
+                            '|{% image_srcset product "side_image" "jpeg" %}')
+
+        with self.assertNumQueries(0):
+            picture, srcset = template.render(Context({"product": product})).split("|")
+
+        self.assertIn('<source type="image/webp"', picture)
+        self.assertIn('_320w.webp 320w', picture)
+        self.assertIn('_640w.jpeg 640w', picture)
+        self.assertIn('sizes="50vw"', picture)
+        self.assertIn('alt="Apple"', picture)
+        self.assertEqual(srcset.count("w.jpeg"), 2)
+
+    def test_picture_falls_back_on_the_original_image(self):
+        """Test that the original image is shown until its variants are made"""
+
+        picture = Template('{% load product_images %}{% product_picture product %}').render(Context({"product": self.product}))
+
+        self.assertIn(f'src="{self.product.primary_image.url}"', picture)
+        self.assertNotIn("<picture>", picture)
+
+    def test_variants_are_deleted_with_the_product(self):
+        """Test that deleting a product deletes its variant records and their files"""
+
+        create_product_image_variants(self.product.pk)
+        names = list(ProductImageVariant.objects.values_list("image", flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+
+        self.assertFalse(ProductImageVariant.objects.exists())
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_written_files_are_deleted_when_the_insert_fails(self):
+        """Test that the variant files aren't left behind when the rows can't be inserted"""
+
+        files = set(default_storage.listdir(VARIANT_FOLDER)[1]) if default_storage.exists(VARIANT_FOLDER) else set()
+
+        with patch("product.image_variants.ProductImageVariant.objects.bulk_create", side_effect=DatabaseError("insert failed")):
+            with self.assertRaises(DatabaseError):
+                create_product_image_variants(self.product.pk, ["primary_image"])
+
+        self.assertEqual(set(default_storage.listdir(VARIANT_FOLDER)[1]), files)
+        self.assertFalse(ProductImageVariant.objects.exists())
+
+    def test_variants_of_an_image_replaced_while_rendering_are_discarded(self):
+        """Test that a task doesn't record variants of an image that was replaced after it was read"""
+
+        original_render = render_variants
+
+        def render_then_replace(image_file):
+            variants = original_render(image_file)
+            Product.objects.filter(pk=self.product.pk).update(primary_image="product_images/other.jpg")
+            return variants
+
+        with patch("product.image_variants.render_variants", side_effect=render_then_replace):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(create_product_image_variants(self.product.pk, ["primary_image"]), 0)
+
+        self.assertFalse(ProductImageVariant.objects.exists())
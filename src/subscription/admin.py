@@ -3,7 +3,8 @@ from django.contrib import admin
 from .models import (NewsletterSubscription,
                      UnsubscribedNewsletterSubscription, 
                      SubscribedNewsletterSubscription,
-                     NewsletterSubscriptionHistory
+                     NewsletterSubscriptionHistory,
+                     NewsletterCampaign,
                      )
 
 # Register your models here.
@@ -58,7 +59,16 @@ class NewsletterSubscriptionHistoryAdmin(admin.ModelAdmin):
     list_filter         = ["user", "frequency", "user__username"]
 
 
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display        = ["id", "title", "subject", "status", "num_of_sent", "num_of_failed", "created_at", "completed_on"]
+    list_display_links  = ["id", "title"]
+    list_per_page       = 40
+    readonly_fields     = ["status", "last_subscription_id", "num_of_sent", "num_of_failed", "created_at", "completed_on"]
+    list_filter         = ["status"]
+
+
 admin.site.register(NewsletterSubscriptionHistory, NewsletterSubscriptionHistoryAdmin)
+admin.site.register(NewsletterCampaign, NewsletterCampaignAdmin)
 admin.site.register(NewsletterSubscription, NewsletterSubscriptionAdmin)
 admin.site.register(UnsubscribedNewsletterSubscription, UnsubscribedNewsletterSubscriptionAdmin)
 admin.site.register(SubscribedNewsletterSubscription, SubscribedNewsletterSubscriptionAdmin)
\ No newline at end of file
@@ -1,5 +1,9 @@
-from .models import NewsletterSubscription
-from .utils.sessions import set_session, get_session
+from .utils.sessions import get_session, get_subscription_status
+
+import logging
+
+
+logger = logging.getLogger('custom_logger')
 
 
 def get_subscription_session(request) -> dict:
@@ -7,39 +11,40 @@ def get_subscription_session(request) -> dict:
     A context processor that allows access to the user's newsletter 
     subscription status in any template.
     
+    The status is kept in the session and is only read from the database again
+    when the subscription changes (see `refresh_subscription_status`), so
+    a page doesn't cost any subscription queries or session writes.
+    
     Returns a dictionary containing the user's subscription session.
     """
     subscription_session  = None
     has_subscribed_before = False
     subscribed            = None
     
+    # requests that never went through the authentication middleware have no user
+    user = getattr(request, "user", None)
+    
+    if user is None or not user.is_authenticated:
+        return {
+            "subscription_session": subscription_session,
+            "has_subscribed_before": has_subscribed_before,
+            "is_subscribed": subscribed,
+        }
+    
     try:
-        
-        # get only unsubscribed field and nothing else
-        subscription = NewsletterSubscription.objects.filter(user=request.user).values("unsubscribed").first()
-        
-        if  subscription is None:
-            subscribed            = False
-            has_subscribed_before = False
-        else:
-            is_subscribed         =  subscription["unsubscribed"]
-            subscribed            = not is_subscribed
-            has_subscribed_before = True
-       
+        status = get_subscription_status(request)
     except Exception as e:
-       print(f"Error fetching subscription model object: {e}")
+       logger.error(f"Error fetching subscription model object: {e}")
           
     else:
+        subscribed            = status["is_subscribed"]
+        has_subscribed_before = status["has_subscribed_before"]
+        
         if subscribed:
             subscription_session = get_session(request, session_name="email") 
-            if not subscription_session:
-                set_session(request, "email")
-                subscription_session = get_session(request, session_name="email") 
 
     return {
         "subscription_session": subscription_session,
         "has_subscribed_before": has_subscribed_before,
         "is_subscribed": subscribed,
     }
-
-
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from subscription.models import NewsletterCampaign
+from subscription.utils.newsletter import queue_newsletter, send_newsletter
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends the newsletter to every subscriber that is due one according to their frequency. "
+        "Either create a new campaign with --title and --subject, or resume a campaign that didn't finish with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--title", help="The title of the newsletter")
+        parser.add_argument("--subject", help="The subject line of the email")
+        parser.add_argument("--content-file", help="Path to a text file containing the body of the newsletter")
+        parser.add_argument("--resume", type=int, metavar="CAMPAIGN_ID", help="Resume the campaign with this id")
+        parser.add_argument("--chunk-size", type=int, help="Subscriptions read from the database at a time")
+        parser.add_argument("--rate-limit", type=float, help="The maximum number of emails sent per second")
+        parser.add_argument("--async", 
+                            action="store_true", 
+                            dest="run_async", 
+                            help="Send the campaign with django-q, one task per batch, instead of in this process",
+                            )
+
+    def handle(self, *args, **options):
+        campaign = self._get_campaign(options)
+        
+        if options["run_async"]:
+            task_id = queue_newsletter(campaign.id, rate_limit=options["rate_limit"])
+            self.stdout.write(self.style.SUCCESS(f"Queued the first batch of campaign {campaign.id} as task {task_id}"))
+            return
+        
+        campaign = send_newsletter(campaign.id, chunk_size=options["chunk_size"], rate_limit=options["rate_limit"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Campaign {campaign.id} sent to {campaign.num_of_sent} subscribers, {campaign.num_of_failed} failed"
+        ))
+
+    def _get_campaign(self, options) -> NewsletterCampaign:
+        
+        if options["resume"]:
+            try:
+                return NewsletterCampaign.objects.get(pk=options["resume"])
+            except NewsletterCampaign.DoesNotExist:
+                raise CommandError(f"There is no campaign with the id {options['resume']}")
+        
+        if not options["title"] or not options["subject"]:
+            raise CommandError("A new campaign needs both a --title and a --subject")
+        
+        content = ""
+        
+        if options["content_file"]:
+            try:
+                with open(options["content_file"], encoding="utf-8") as file:
+                    content = file.read()
+            except FileNotFoundError:
+                raise CommandError(f"The file <{options['content_file']}> was not found")
+        
+        return NewsletterCampaign.objects.create(title=options["title"], subject=options["subject"], content=content)
@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0011_alter_newslettersubscription_subscribed_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newslettersubscription',
+            name='last_newsletter_sent_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('subject', models.CharField(max_length=255)),
+                ('content', models.TextField(blank=True)),
+                ('html_template', models.CharField(default='email_assets/newsletter.html', max_length=255)),
+                ('text_template', models.CharField(default='email_assets/newsletter.txt', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('completed', 'Completed')], default='pending', max_length=10)),
+                ('last_subscription_id', models.PositiveBigIntegerField(default=0)),
+                ('num_of_sent', models.PositiveIntegerField(default=0)),
+                ('num_of_failed', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_on', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Newsletter Campaign',
+                'verbose_name_plural': 'Newsletter Campaigns',
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from datetime import timedelta
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -37,6 +39,19 @@ class NewsletterSubscription(models.Model):
             (QUARTERLY, "Quarterly")
         ]
     
+    # How long after the last newsletter a subscriber is due the next one
+    FREQUENCY_INTERVALS = {
+        Frequency.DAILY: timedelta(days=1),
+        Frequency.WEEKLY: timedelta(weeks=1),
+        Frequency.BI_WEEKLY: timedelta(weeks=2),
+        Frequency.MONTHLY: timedelta(days=30),
+        Frequency.QUARTERLY: timedelta(days=91),
+    }
+    
+    # Scheduled sends never start at exactly the same time, without some slack a subscriber
+    # that was sent the newsletter a few minutes "late" last time would miss their next one
+    DUE_TOLERANCE = timedelta(hours=1)
+    
     title                    = models.CharField(max_length=255, default="General Newsletter") 
     user                     = models.ForeignKey(User, on_delete=models.CASCADE, related_name="newsletter_subscriptions")
     email                    = models.EmailField(max_length=255, unique=True)
@@ -47,6 +62,7 @@ class NewsletterSubscription(models.Model):
     unsubscribed_on          = models.DateTimeField(blank=True, null=True)
     reason_for_unsubscribing = models.TextField(blank=True, null=True)
     created_at               = models.DateTimeField(auto_now_add=True)
+    last_newsletter_sent_on  = models.DateTimeField(blank=True, null=True)
     
     def __str__(self) -> str:
         return f"{self.title} - {self.email}"
@@ -129,6 +145,26 @@ class NewsletterSubscription(models.Model):
         cls._is_user_instance_valid(user)
         return cls.objects.filter(user=user, email=email.lower()).first()
     
+    @classmethod
+    def get_due_subscriptions(cls, now=None):
+        """
+        Returns the subscriptions that are due a newsletter, i.e the subscriber hasn't unsubscribed
+        and has either never been sent a newsletter or was last sent one at least their frequency ago.
+
+        Args:
+            now (datetime, optional): The time to check against, defaults to the current time.
+
+        Returns:
+            QuerySet: The due subscriptions.
+        """
+        now = now or timezone.now()
+        due = Q(last_newsletter_sent_on__isnull=True)
+        
+        for frequency, interval in cls.FREQUENCY_INTERVALS.items():
+            due |= Q(frequency=frequency, last_newsletter_sent_on__lte=now - interval + cls.DUE_TOLERANCE)
+        
+        return cls.objects.exclude(unsubscribed=True).filter(due)
+    
     def unsubscribe(self):
         """
         Mark the user as unsubscribed.
@@ -173,6 +209,50 @@ class NewsletterSubscriptionHistory(models.Model):
         return f"{self.email} - {self.action} on {self.start_date}"
 
 
+class NewsletterCampaign(models.Model):
+    """
+    A single send of the newsletter to every subscriber that is due one.
+
+    The campaign doubles as the checkpoint of the send: `last_subscription_id` is advanced
+    once each batch of emails has been sent and each subscriber is stamped as soon as their
+    email has been sent, so a run that crashed can be resumed from where it stopped without
+    skipping anyone, only the email that was in-flight can be sent again.
+    """
+    
+    class Status:
+        PENDING   = "pending"
+        SENDING   = "sending"
+        COMPLETED = "completed"
+        CHOICES = [
+            (PENDING, "Pending"),
+            (SENDING, "Sending"),
+            (COMPLETED, "Completed"),
+        ]
+    
+    title                = models.CharField(max_length=255)
+    subject              = models.CharField(max_length=255)
+    content              = models.TextField(blank=True)
+    html_template        = models.CharField(max_length=255, default="email_assets/newsletter.html")
+    text_template        = models.CharField(max_length=255, default="email_assets/newsletter.txt")
+    status               = models.CharField(max_length=10, choices=Status.CHOICES, default=Status.PENDING)
+    last_subscription_id = models.PositiveBigIntegerField(default=0)
+    num_of_sent          = models.PositiveIntegerField(default=0)
+    num_of_failed        = models.PositiveIntegerField(default=0)
+    created_at           = models.DateTimeField(auto_now_add=True)
+    completed_on         = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name        = "Newsletter Campaign"
+        verbose_name_plural = "Newsletter Campaigns"
+    
+    def __str__(self) -> str:
+        return f"{self.title} - {self.status}"
+    
+    @property
+    def is_completed(self):
+        return self.status == self.Status.COMPLETED
+
+
 class UnsubscribedNewsletterSubscription(NewsletterSubscription):
     class Meta:
         proxy              = True
@@ -1,8 +1,10 @@
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.utils import timezone
 
-from .models import NewsletterSubscription
+from .models import NewsletterSubscription, SubscribedNewsletterSubscription, UnsubscribedNewsletterSubscription
+from .utils.sessions import bump_subscription_status_version
 
 
 @receiver(pre_save, sender=NewsletterSubscription)
@@ -11,3 +13,21 @@ def pre_save_newsletter(sender, instance, *args, **kwargs):
     if instance:
         instance.email = instance.email.lower()
         
+
+
+def bump_subscription_status_version_receiver(sender, instance, *args, **kwargs):
+    """
+    Refreshes the subscription status held by every session of the user whenever their
+    subscription changes, whether from the subscription views, the admin or `unsubscribe()`.
+
+    The version is only bumped once the change is committed, bumped before another session
+    could read the old status and store it under the new version.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_subscription_status_version(user_id))
+
+
+# the admin saves subscriptions through the proxy models, which send signals under their own class
+for subscription_model in (NewsletterSubscription, SubscribedNewsletterSubscription, UnsubscribedNewsletterSubscription):
+    post_save.connect(bump_subscription_status_version_receiver, sender=subscription_model)
+    post_delete.connect(bump_subscription_status_version_receiver, sender=subscription_model)
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import patch
+
+from subscription.models import NewsletterCampaign, NewsletterSubscription, NewsletterSubscriptionHistory
+from subscription.utils.newsletter import CompiledNewsletter, queue_newsletter, send_newsletter, send_newsletter_batch
+from .test_helper import create_test_user
+
+
+@override_settings(EMAIL_HOST_USER="admin@example.com", NEWSLETTER_RATE_LIMIT=0)
+class SendNewsletterTest(TestCase):
+    
+    def setUp(self):
+        self.now           = timezone.now()
+        self.subscriptions = []
+        
+        for index in range(5):
+            user = create_test_user(username=f"user{index}", email=f"user{index}@example.com")
+            self.subscriptions.append(NewsletterSubscription.objects.create(user=user, 
+                                                                            email=f"user{index}@example.com",
+                                                                            subscribed_on=self.now,
+                                                                            frequency=NewsletterSubscription.Frequency.WEEKLY,
+                                                                            ))
+        self.campaign = NewsletterCampaign.objects.create(title="Spring", subject="Spring is here", content="Fresh produce [[username]]")
+    
+    def test_newsletter_is_sent_to_every_due_subscriber(self):
+        campaign = send_newsletter(self.campaign.id, batch_size=2)
+        
+        self.assertTrue(campaign.is_completed)
+        self.assertEqual(campaign.num_of_sent, 5)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f"user{index}@example.com" for index in range(5)])
+    
+    def test_merge_fields_are_personalised_for_each_subscriber(self):
+        send_newsletter(self.campaign.id)
+        
+        email = next(email for email in mail.outbox if email.to == ["user3@example.com"])
+        self.assertIn("Hello user3", email.body)
+        self.assertIn("Fresh produce user3", email.body)
+        self.assertIn("user3@example.com", email.alternatives[0][0])
+    
+    def test_subscribers_that_are_not_due_or_unsubscribed_are_skipped(self):
+        NewsletterSubscription.objects.filter(pk=self.subscriptions[0].pk).update(last_newsletter_sent_on=self.now - timedelta(days=2))
+        NewsletterSubscription.objects.filter(pk=self.subscriptions[1].pk).update(unsubscribed=True)
+        NewsletterSubscription.objects.filter(pk=self.subscriptions[2].pk).update(last_newsletter_sent_on=self.now - timedelta(days=8))
+        
+        send_newsletter(self.campaign.id)
+        
+        recipients = {email.to[0] for email in mail.outbox}
+        self.assertNotIn("user0@example.com", recipients)
+        self.assertNotIn("user1@example.com", recipients)
+        self.assertIn("user2@example.com", recipients)
+    
+    def test_every_send_is_recorded_in_the_history(self):
+        send_newsletter(self.campaign.id, batch_size=2)
+        
+        self.assertEqual(NewsletterSubscriptionHistory.objects.filter(title="Spring", action="newsletter sent").count(), 5)
+    
+    def test_resumed_campaign_does_not_send_anyone_twice(self):
+        """Test that a campaign that crashed part way through a batch only sends to the subscribers it hadn't reached"""
+        
+        with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=[1, 1, 1, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                send_newsletter(self.campaign.id, batch_size=2)
+        
+        send_newsletter(self.campaign.id, batch_size=2)
+        
+        # user2 was reached part way through the second batch, so only the subscribers after it are sent to
+        self.assertEqual([email.to[0] for email in mail.outbox], ["user3@example.com", "user4@example.com"])
+        self.assertEqual(NewsletterSubscriptionHistory.objects.filter(action="newsletter sent").count(), 5)
+        self.assertEqual(NewsletterCampaign.objects.get(pk=self.campaign.pk).num_of_sent, 5)
+    
+    def test_redelivered_batch_task_skips_the_subscribers_it_had_reached(self):
+        with patch("subscription.utils.newsletter.async_task") as mock_async_task:
+            with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=[1, KeyboardInterrupt]):
+                with self.assertRaises(KeyboardInterrupt):
+                    send_newsletter_batch(self.campaign.id, 0, batch_size=2)
+            
+            self.assertEqual(send_newsletter_batch(self.campaign.id, 0, batch_size=2), 2)
+        
+        self.assertEqual([email.to[0] for email in mail.outbox], ["user1@example.com", "user2@example.com"])
+        mock_async_task.assert_called_once_with(send_newsletter_batch, self.campaign.id, self.subscriptions[2].pk, 2, 0)
+    
+    def test_completed_campaign_is_not_sent_again(self):
+        send_newsletter(self.campaign.id)
+        mail.outbox.clear()
+        
+        send_newsletter(self.campaign.id)
+        self.assertEqual(mail.outbox, [])
+
+    
+    def test_queued_campaign_sends_one_batch_per_task(self):
+        """Test that each task sends a single batch and queues the next one from the new checkpoint"""
+        
+        with patch("subscription.utils.newsletter.async_task") as mock_async_task:
+            queue_newsletter(self.campaign.id, batch_size=2)
+            mock_async_task.assert_called_once_with(send_newsletter_batch, self.campaign.id, 0, 2, None)
+            
+            tasks = 0
+            
+            while mock_async_task.call_args:
+                args = mock_async_task.call_args.args
+                mock_async_task.reset_mock()
+                
+                args[0](*args[1:])
+                tasks += 1
+        
+        campaign = NewsletterCampaign.objects.get(pk=self.campaign.pk)
+        
+        self.assertEqual(tasks, 3)
+        self.assertTrue(campaign.is_completed)
+        self.assertEqual(campaign.num_of_sent, 5)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f"user{index}@example.com" for index in range(5)])
+    
+    def test_batch_task_from_an_old_checkpoint_does_nothing(self):
+        """Test that a second chain of tasks stops instead of sending the campaign again"""
+        
+        NewsletterCampaign.objects.filter(pk=self.campaign.pk).update(last_subscription_id=self.subscriptions[1].pk)
+        
+        with patch("subscription.utils.newsletter.async_task") as mock_async_task:
+            self.assertEqual(send_newsletter_batch(self.campaign.id, 0, batch_size=2), 0)
+        
+        mock_async_task.assert_not_called()
+        self.assertEqual(mail.outbox, [])
+
+
+class CompiledNewsletterTest(TestCase):
+    
+    def test_merge_fields_are_escaped_in_the_html_only(self):
+        newsletter = CompiledNewsletter("email_assets/newsletter.html", "email_assets/newsletter.txt", {"title": "Spring"})
+        html, text = newsletter.render({"username": "<b>user</b>", "email": "user@example.com", "frequency": "Weekly"})
+        
+        self.assertIn("&lt;b&gt;user&lt;/b&gt;", html)
+        self.assertIn("Hello <b>user</b>", text)
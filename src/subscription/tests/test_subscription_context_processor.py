@@ -0,0 +1,121 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from subscription.context_processor import get_subscription_session
+from subscription.models import NewsletterSubscription, SubscribedNewsletterSubscription
+from subscription.utils.sessions import refresh_subscription_status
+from .test_helper import create_test_user
+
+
+class SubscriptionContextProcessorTest(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.subscription = NewsletterSubscription.objects.create(user=self.user, 
+                                                                  email=self.user.email, 
+                                                                  subscribed_on=timezone.now(),
+                                                                  unsubscribed=False,
+                                                                  )
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def create_request(self, session=None):
+        request         = RequestFactory().get("/")
+        request.user    = self.user
+        request.session = session or SessionStore()
+        return request
+    
+    def test_status_is_read_once_then_served_from_the_session(self):
+        """Test that after the first page the status costs no queries and doesn't modify the session"""
+        
+        session = SessionStore()
+        context = get_subscription_session(self.create_request(session))
+        self.assertTrue(context["is_subscribed"])
+        
+        session.modified = False
+        
+        with self.assertNumQueries(0):
+            context = get_subscription_session(self.create_request(session))
+        
+        self.assertTrue(context["is_subscribed"])
+        self.assertTrue(context["has_subscribed_before"])
+        self.assertIsNotNone(context["subscription_session"])
+        self.assertFalse(session.modified)
+    
+    def test_change_from_another_session_is_picked_up(self):
+        """Test that unsubscribing on one device refreshes the status held by the user's other sessions"""
+        
+        session = SessionStore()
+        get_subscription_session(self.create_request(session))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription.unsubscribe()
+            refresh_subscription_status(self.create_request())
+        
+        context = get_subscription_session(self.create_request(session))
+        
+        self.assertFalse(context["is_subscribed"])
+        self.assertTrue(context["has_subscribed_before"])
+    
+    def test_change_made_outside_the_views_is_picked_up(self):
+        """Test that a subscription changed from the admin (through a proxy model) refreshes the user's sessions"""
+        
+        session = SessionStore()
+        get_subscription_session(self.create_request(session))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            SubscribedNewsletterSubscription.objects.get(pk=self.subscription.pk).unsubscribe()
+        
+        self.assertFalse(get_subscription_session(self.create_request(session))["is_subscribed"])
+    
+    def test_deleted_subscription_is_picked_up(self):
+        session = SessionStore()
+        get_subscription_session(self.create_request(session))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription.delete()
+        
+        self.assertFalse(get_subscription_session(self.create_request(session))["has_subscribed_before"])
+    
+    def test_version_is_only_bumped_once_the_change_is_committed(self):
+        """Test that another session can't store the old status under the new version before the commit"""
+        
+        session = SessionStore()
+        get_subscription_session(self.create_request(session))
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.subscription.unsubscribe()
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(get_subscription_session(self.create_request(session))["is_subscribed"])
+        
+        for callback in callbacks:
+            callback()
+        
+        self.assertFalse(get_subscription_session(self.create_request(session))["is_subscribed"])
+    
+    def test_status_is_refreshed_when_the_version_is_missing_from_the_cache(self):
+        """Test that a culled version can't restart at a number matching a status stored in the session"""
+        
+        session = SessionStore()
+        get_subscription_session(self.create_request(session))
+        
+        cache.clear()
+        self.subscription.unsubscribe()
+        
+        self.assertFalse(get_subscription_session(self.create_request(session))["is_subscribed"])
+    
+    def test_anonymous_user_does_not_query_the_subscription(self):
+        request      = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        
+        with self.assertNumQueries(0):
+            context = get_subscription_session(request)
+        
+        self.assertIsNone(context["is_subscribed"])
+        self.assertFalse(context["has_subscribed_before"])
@@ -0,0 +1,290 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import escape
+from django_q.tasks import async_task
+from time import monotonic, sleep
+
+from subscription.models import NewsletterCampaign, NewsletterSubscription, NewsletterSubscriptionHistory
+
+import logging
+import re
+
+
+logger = logging.getLogger("custom_logger")
+
+
+MERGE_FIELDS = ("username", "email", "frequency")
+
+
+class CompiledNewsletter:
+    """
+    The newsletter templates rendered once per campaign, ready to be personalised for each subscriber.
+
+    Rendering a Django template for every subscriber would repeat the same work thousands of
+    times, so the templates are rendered once with a placeholder in place of each merge field
+    (e.g `[[username]]`) and split around those placeholders. Personalising the newsletter for
+    a subscriber is then just joining the pieces back together with their values.
+
+    Example usage:
+        >>> newsletter = CompiledNewsletter("email_assets/newsletter.html", "email_assets/newsletter.txt", {"content": "..."})
+        >>> html, text = newsletter.render({"username": "egbie", "email": "egbie@example.com", "frequency": "Weekly"})
+    """
+
+    _PLACEHOLDER = re.compile(r"\[\[(" + "|".join(MERGE_FIELDS) + r")\]\]")
+
+    def __init__(self, html_template:str, text_template:str, context:dict = None) -> None:
+        context = {**(context or {}), **{field: f"[[{field}]]" for field in MERGE_FIELDS}}
+
+        self._html_parts = self._PLACEHOLDER.split(get_template(html_template).render(context))
+        self._text_parts = self._PLACEHOLDER.split(get_template(text_template).render(context))
+
+    def render(self, merge_fields:dict) -> tuple[str, str]:
+        """Returns the html and text content personalised with the subscriber's merge fields."""
+
+        html_fields = {field: escape(value) for field, value in merge_fields.items()}
+        return self._join(self._html_parts, html_fields), self._join(self._text_parts, merge_fields)
+
+    @staticmethod
+    def _join(parts:list, merge_fields:dict) -> str:
+        # `re.split` with a capturing group alternates literal text (even indexes) and field names (odd indexes)
+        return "".join(part if index % 2 == 0 else str(merge_fields.get(part, "")) for index, part in enumerate(parts))
+
+
+class RateLimiter:
+    """Spaces out calls so no more than `per_second` are made each second."""
+
+    def __init__(self, per_second:float) -> None:
+        self.interval = 1 / per_second if per_second else 0
+        self._next    = monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+
+        now = monotonic()
+        if self._next > now:
+            sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+def send_newsletter(campaign_id:int,
+                    chunk_size:int = None,
+                    batch_size:int = None,
+                    rate_limit:float = None,
+                    ) -> NewsletterCampaign:
+    """
+    Sends the campaign's newsletter to every subscriber that is due one, in this process.
+
+    Due subscribers are streamed from the database in chunks (`.iterator(chunk_size=...)`) and sent
+    in batches of `batch_size` over a single SMTP connection that is kept open for the whole run.
+    Each email is recorded (a `NewsletterSubscriptionHistory` row and the subscriber's `last_newsletter_sent_on`)
+    as soon as it has been sent and the campaign's checkpoint is advanced once each batch has been sent,
+    so if the run crashes it can be resumed by calling this function again with the same campaign.
+    The subscribers already reached are no longer due, so only the email in-flight during the crash
+    can be sent twice and no subscriber is skipped.
+
+    Use `queue_newsletter` to send the campaign with django-q instead.
+
+    Args:
+        campaign_id (int): The id of the `NewsletterCampaign` to send.
+        chunk_size (int): The number of subscriptions fetched from the database at a time.
+        batch_size (int): The number of emails sent between checkpoints.
+        rate_limit (float): The maximum number of emails sent per second, 0 for no limit.
+
+    Returns:
+        NewsletterCampaign: The campaign with its final counts.
+
+    Example usage:
+        >>> campaign = NewsletterCampaign.objects.create(title="Spring", subject="Spring is here", content="...")
+        >>> send_newsletter(campaign.id)
+    """
+    chunk_size = chunk_size or settings.NEWSLETTER_CHUNK_SIZE
+    batch_size = batch_size or settings.NEWSLETTER_BATCH_SIZE
+    rate_limit = settings.NEWSLETTER_RATE_LIMIT if rate_limit is None else rate_limit
+
+    campaign = _start_campaign(campaign_id)
+
+    if campaign is None:
+        return NewsletterCampaign.objects.get(pk=campaign_id)
+
+    newsletter   = _compile_newsletter(campaign)
+    connection   = get_connection()
+    rate_limiter = RateLimiter(rate_limit)
+    checkpoint   = campaign.last_subscription_id
+    batch        = []
+
+    try:
+        for subscription in _get_pending_subscriptions(campaign).iterator(chunk_size=chunk_size):
+            batch.append(subscription)
+
+            if len(batch) >= batch_size:
+                if not _send_batch(campaign, checkpoint, batch, newsletter, connection, rate_limiter):
+                    return NewsletterCampaign.objects.get(pk=campaign.pk)
+
+                checkpoint, batch = batch[-1].pk, []
+
+        if batch and not _send_batch(campaign, checkpoint, batch, newsletter, connection, rate_limiter):
+            return NewsletterCampaign.objects.get(pk=campaign.pk)
+    finally:
+        connection.close()
+
+    return _complete_campaign(campaign)
+
+
+def queue_newsletter(campaign_id:int, batch_size:int = None, rate_limit:float = None) -> str:
+    """
+    Sends the campaign's newsletter with django-q, one task per batch (see `send_newsletter_batch`).
+
+    Each task only sends `batch_size` emails, so however many subscribers there are no task
+    runs for longer than the cluster's `timeout` (see Q_CLUSTER).
+
+    Returns:
+        str: The id of the task that sends the first batch.
+    """
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+    return async_task(send_newsletter_batch, campaign.id, campaign.last_subscription_id, batch_size, rate_limit)
+
+
+def send_newsletter_batch(campaign_id:int, checkpoint:int, batch_size:int = None, rate_limit:float = None) -> int:
+    """
+    The django-q task that sends the next batch of the campaign and then queues the task for the batch after it.
+
+    The task is given the checkpoint it was queued at and does nothing if the campaign has since moved
+    past it, so a task re-delivered by django-q after a worker died sends the rest of its batch, while a
+    second chain of tasks (e.g the campaign was queued twice) stops instead of sending everything twice.
+
+    Returns:
+        int: The number of subscribers the batch was sent to.
+    """
+    batch_size = batch_size or settings.NEWSLETTER_BATCH_SIZE
+    rate_limit = settings.NEWSLETTER_RATE_LIMIT if rate_limit is None else rate_limit
+
+    campaign = _start_campaign(campaign_id)
+
+    if campaign is None:
+        return 0
+
+    if campaign.last_subscription_id != checkpoint:
+        logger.warning(f"The newsletter campaign <{campaign.title}> has moved past subscription {checkpoint}, stopping this run")
+        return 0
+
+    batch = list(_get_pending_subscriptions(campaign)[:batch_size])
+
+    if not batch:
+        _complete_campaign(campaign)
+        return 0
+
+    connection = get_connection()
+
+    try:
+        is_checkpointed = _send_batch(campaign, checkpoint, batch, _compile_newsletter(campaign), connection, RateLimiter(rate_limit))
+    finally:
+        connection.close()
+
+    # a batch that isn't full was the last one, there is no need for a task to find that out
+    if is_checkpointed and len(batch) < batch_size:
+        _complete_campaign(campaign)
+    elif is_checkpointed:
+        async_task(send_newsletter_batch, campaign.id, batch[-1].pk, batch_size, rate_limit)
+    return len(batch)
+
+
+def _start_campaign(campaign_id:int) -> NewsletterCampaign | None:
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+
+    if campaign.is_completed:
+        logger.info(f"The newsletter campaign <{campaign}> has already been sent")
+        return None
+
+    if campaign.status != NewsletterCampaign.Status.SENDING:
+        campaign.status = NewsletterCampaign.Status.SENDING
+        campaign.save(update_fields=["status"])
+    return campaign
+
+
+def _complete_campaign(campaign:NewsletterCampaign) -> NewsletterCampaign:
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(status=NewsletterCampaign.Status.COMPLETED, completed_on=timezone.now())
+    campaign.refresh_from_db()
+
+    logger.info(f"The newsletter campaign <{campaign.title}> was sent to {campaign.num_of_sent} subscribers, {campaign.num_of_failed} failed")
+    return campaign
+
+
+def _compile_newsletter(campaign:NewsletterCampaign) -> CompiledNewsletter:
+    return CompiledNewsletter(campaign.html_template, campaign.text_template, {"title": campaign.title, "content": campaign.content})
+
+
+def _get_pending_subscriptions(campaign:NewsletterCampaign):
+    return (NewsletterSubscription.get_due_subscriptions()
+                                  .filter(pk__gt=campaign.last_subscription_id)
+                                  .select_related("user")
+                                  .only("id", "email", "frequency", "subscribed_on", "user", "user__username")
+                                  .order_by("pk")
+                                  )
+
+
+def _send_batch(campaign:NewsletterCampaign,
+                checkpoint:int,
+                batch:list,
+                newsletter:CompiledNewsletter,
+                connection,
+                rate_limiter:RateLimiter,
+                ) -> bool:
+    """Sends the batch recording each email as it goes, returns False if another run moved the checkpoint in the meantime."""
+
+    for subscription in batch:
+        rate_limiter.wait()
+
+        html_content, text_content = newsletter.render({
+            "username": subscription.user.username,
+            "email": subscription.email,
+            "frequency": subscription.get_frequency,
+        })
+
+        email = EmailMultiAlternatives(campaign.subject, text_content, settings.EMAIL_HOST_USER, [subscription.email], connection=connection)
+        email.attach_alternative(html_content, "text/html")
+
+        try:
+            # opening an already open connection is a no-op, this only reconnects after a failure
+            connection.open()
+            is_sent = bool(connection.send_messages([email]))
+        except Exception as e:
+            logger.error(f"Failed to send the newsletter <{campaign.title}> to {subscription.email}: {str(e)}")
+            connection.close()
+            is_sent = False
+
+        _record_send(campaign, subscription, is_sent)
+
+    # the checkpoint is only advanced from the checkpoint this run started the batch at, so a run that finds
+    # another one has moved it stops instead of carrying on alongside it
+    is_checkpointed = NewsletterCampaign.objects.filter(pk=campaign.pk, last_subscription_id=checkpoint).update(last_subscription_id=batch[-1].pk)
+
+    if not is_checkpointed:
+        logger.warning(f"The newsletter campaign <{campaign.title}> was moved past subscription {checkpoint} by another run, stopping this run")
+    return bool(is_checkpointed)
+
+
+def _record_send(campaign:NewsletterCampaign, subscription:NewsletterSubscription, is_sent:bool) -> None:
+    """
+    Records a single email of the campaign as soon as it has been sent (or has failed).
+
+    Stamping `last_newsletter_sent_on` means the subscriber is no longer due, so if the process dies
+    part way through a batch the batch is picked up again on resume without the subscribers it had
+    already reached, only the email in-flight during the crash can be sent twice.
+    """
+    with transaction.atomic():
+        NewsletterSubscriptionHistory.objects.create(title=campaign.title,
+                                                     user_id=subscription.user_id,
+                                                     email=subscription.email,
+                                                     action="newsletter sent" if is_sent else "newsletter failed",
+                                                     start_date=subscription.subscribed_on,
+                                                     frequency=subscription.frequency,
+                                                     )
+        NewsletterSubscription.objects.filter(pk=subscription.pk).update(last_newsletter_sent_on=timezone.now())
+        NewsletterCampaign.objects.filter(pk=campaign.pk).update(num_of_sent=F("num_of_sent") + is_sent,
+                                                                 num_of_failed=F("num_of_failed") + (not is_sent),
+                                                                 )
@@ -1,10 +1,16 @@
+from django.core.cache import cache
 from django.http import HttpRequest  
 from typing import Optional
+from uuid import uuid4
 
 
+from subscription.models import NewsletterSubscription
 from utils.generator import generate_token
 
 
+SUBSCRIPTION_STATUS_SESSION = "newsletter_status"
+
+
 
 def set_session(request, session_name: str, email: Optional[str] = None):
     """
@@ -47,4 +53,91 @@ def get_session(request, session_name:str):
         raise TypeError(f"The request must be an instance of HttpRequest - <{type(request).__name__}>")
     
     session_key = f"{request.user.id}_{session_name}"
-    return request.session.get(session_key, None)  
\ No newline at end of file
+    return request.session.get(session_key, None)
+
+
+
+def get_subscription_status_version(user_id:int) -> str:
+    """
+    Returns the version of the user's newsletter subscription status.
+
+    The version lives in the shared cache (not the session) so a change made from one
+    device is picked up by the user's sessions on every other device. If the version is
+    missing (culled, or the cache was restarted) a new random token is started, so no
+    session's stored status can match it and each one is refreshed.
+    """
+    version_key = _get_version_key(user_id)
+    version     = cache.get(version_key)
+    
+    if version is None:
+        cache.add(version_key, _new_version(), timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def bump_subscription_status_version(user_id:int) -> None:
+    """
+    Replaces the version of the user's subscription status so every one of their sessions refreshes it.
+
+    It is called whenever a subscription is saved or deleted (see `subscription.signals`), once the
+    change is committed. A new random token is set rather than using `incr`, which isn't atomic on
+    every backend, so two concurrent changes can't leave the version where it was before one of them.
+    """
+    cache.set(_get_version_key(user_id), _new_version(), timeout=None)
+
+
+def refresh_subscription_status(request) -> dict:
+    """
+    Reads the user's newsletter subscription status from the database and stores it in the session.
+
+    This is the only place the status is read from the database, the context processor serves
+    the copy in the session until its version no longer matches. Changing a subscription bumps
+    the version (see `bump_subscription_status_version`) so every session of the user refreshes,
+    the views that change it also call this so the current session shows the change straight away.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        dict: The status i.e `{"version": ..., "is_subscribed": ..., "has_subscribed_before": ...}`
+    """
+    if not isinstance(request, HttpRequest): 
+        raise TypeError(f"The request must be an instance of HttpRequest - <{type(request).__name__}>")
+    
+    user_id = request.user.id
+    version      = get_subscription_status_version(user_id)
+    subscription = NewsletterSubscription.objects.filter(user=request.user).values("unsubscribed", "email").first()
+    
+    status = {
+        "version": version,
+        "is_subscribed": subscription is not None and not subscription["unsubscribed"],
+        "has_subscribed_before": subscription is not None,
+    }
+    
+    request.session[f"{user_id}_{SUBSCRIPTION_STATUS_SESSION}"] = status
+    
+    if status["is_subscribed"] and not get_session(request, session_name="email"):
+        set_session(request, "email", email=subscription["email"])
+    return status
+    
+
+def get_subscription_status(request) -> dict:
+    """
+    Returns the user's newsletter subscription status from the session, it is only read
+    from the database (and the session only written to) when the stored version is out of date.
+    """
+    status = get_session(request, session_name=SUBSCRIPTION_STATUS_SESSION)
+    
+    version = get_subscription_status_version(request.user.id)
+    
+    if status is None or version is None or status.get("version") != version:
+        status = refresh_subscription_status(request)
+    return status
+
+
+def _get_version_key(user_id:int) -> str:
+    return f"newsletter_status_version_{user_id}"
+
+
+def _new_version() -> str:
+    return uuid4().hex
@@ -10,7 +10,7 @@ from django.utils import timezone
 
 from utils.post_json_validator import validate_json_and_respond
 from utils.validator import validate_email_address
-from .utils.sessions import set_session
+from .utils.sessions import set_session, refresh_subscription_status
 
 from .models import NewsletterSubscription, NewsletterSubscriptionHistory, SubscriptionMessage
 from .form import SubscriptionFeedBackForm
@@ -63,6 +63,7 @@ def subscribe_user(request):
                 
                 
                 set_session(request, session_name="email", email=email)
+                refresh_subscription_status(request)
                 is_valid, error_msg = True, ''
                 
                 subject = "Subject: New Subscriber Alert! 🎉"
@@ -129,6 +130,7 @@ def update_newsletter_frequency(request):
                                 action="subscribed",
                                 frequency=frequency_update,
                             )
+                            refresh_subscription_status(request)
            except NewsletterSubscription.DoesNotExist:
                 return is_valid, error_msg
             
@@ -158,6 +160,7 @@ def re_subscribe(request):
                                                          start_date=subscriber.subscribed_on,
                                                          frequency=subscriber.frequency,
                                                          )
+        refresh_subscription_status(request)
             
         # notify admin that user has unsubscribed
         subject = "Subject: Subscriber Alert! 🎉"
@@ -191,6 +194,7 @@ def unsubscribe(request):
                                                          start_date=subscriber.subscribed_on,
                                                          frequency=subscriber.frequency,
                                                          )
+            refresh_subscription_status(request)
             
             # notify admin that user has unsubscribed
             subject = "Alert a user has unsubscribed"
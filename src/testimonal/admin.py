@@ -7,6 +7,11 @@ from django.utils import timezone
 
 from .models import Testimonial, UnapprovedTestimonial, ApprovedTestimonial
 
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
 # Register your models here.
 
 class BaseTestimonial(admin.ModelAdmin):
@@ -47,7 +52,7 @@ class BaseTestimonial(admin.ModelAdmin):
     ]
     
     def save_model(self, request, obj, form, change):
-        print("Saving testimonial in admin...") 
+        logger.debug("Saving testimonial in admin...")
         super().save_model(request, obj, form, change) 
 
       
@@ -72,7 +77,7 @@ class UnapprovedTestimonialAdmin(BaseTestimonial):
         return query_set.filter(is_approved=False)
     
     def save_model(self, request, obj, form, change):
-        print("Saving testimonial in admin...") 
+        logger.debug("Saving testimonial in admin...")
         super().save_model(request, obj, form, change) 
      
             
@@ -1,20 +1,47 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from utils.stampede_cache import get_or_compute, invalidate
+
 from .models import Testimonial
 
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
+
+APPROVED_TESTIMONIALS_CACHE_KEY = "approved_testimonials"
+
 
 def get_approved_testimonials(request) -> dict:
     """
     A context processor that allows the testimonial model 
     to be accessed in any template.
     
-    The function retrieves all the approved testimonials
-    and returns them in a dictionary.
-    """
-    try:
-        approved_testimonials = Testimonial.get_approved_testimonials()
-    except Exception as e:
-         print(f"Error fetching approved testimonials: {e}")
-         approved_testimonials = Testimonial.objects.none()
+    The function retrieves the approved testimonials shown in
+    the carousel and returns them in a dictionary.
     
+    The testimonials are only loaded when a template actually uses them, and are
+    cached until a testimonial is approved, edited or deleted (see `testimonal.signals`),
+    so most pages don't make any testimonial queries.
+    """
     return {
-        "approved_testimonials": approved_testimonials  
+        "approved_testimonials": SimpleLazyObject(_get_cached_approved_testimonials)
     }
+
+
+def invalidate_approved_testimonials() -> None:
+    invalidate(APPROVED_TESTIMONIALS_CACHE_KEY)
+
+
+def _get_cached_approved_testimonials() -> list:
+    
+    try:
+        return get_or_compute(APPROVED_TESTIMONIALS_CACHE_KEY,
+                              lambda: Testimonial.get_carousel_testimonials(limit=settings.TESTIMONIAL_CAROUSEL_SIZE),
+                              timeout=settings.TESTIMONIAL_CACHE_TIMEOUT,
+                              )
+    except Exception as e:
+         logger.error(f"Error fetching approved testimonials: {e}")
+         return []
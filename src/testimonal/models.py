@@ -8,8 +8,7 @@ from django.db.models import QuerySet
 User = get_user_model()
 
 
-from utils.country_parser import parse_country_file
-COUNTRIES_CHOICES  = parse_country_file("data/countries.txt")
+from utils.countries import COUNTRIES_CHOICES
 
 # Create your models here.
 
@@ -89,6 +88,40 @@ class Testimonial(models.Model):
         """
         return cls.objects.filter(is_approved=True)
     
+    @classmethod
+    def get_carousel_testimonials(cls, limit:int) -> list[dict]:
+        """
+        Returns the approved testimonials shown in the testimonial carousel.
+        
+        Only the columns rendered by the carousel are loaded and the author is joined in the
+        same query, so the carousel never makes a query per testimonial. Featured testimonials
+        come first followed by the most recently approved.
+        
+        Params:
+            limit (int): The maximum number of testimonials to return.
+        
+        Returns:
+            A list of dictionaries with the keys `ratings`, `testimonial_text`, `user_image`,
+            `author_name`, `job_title` and `company_name`.
+        """
+        testimonials = (cls.objects.filter(is_approved=True)
+                                   .select_related("author")
+                                   .only("ratings", "testimonial_text", "user_image", "job_title", "company_name", "author__username")
+                                   .order_by("-featured", "-date_approved", "-id")[:limit]
+                        )
+        
+        return [
+            {
+                "ratings": testimonial.ratings,
+                "testimonial_text": testimonial.testimonial_text,
+                "user_image": testimonial.user_image,
+                "author_name": testimonial.author_name,
+                "job_title": testimonial.job_title,
+                "company_name": testimonial.company_name,
+            }
+            for testimonial in testimonials
+        ]
+    
 
 class Tag(models.Model):
     name = models.CharField(max_length=50)
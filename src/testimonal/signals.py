@@ -1,10 +1,17 @@
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.utils import timezone
 
-from .models import Testimonial
+from .context_processor import invalidate_approved_testimonials
+from .models import Testimonial, ApprovedTestimonial, UnapprovedTestimonial
 from utils.tasks import notify_user_of_approved_testimonial, notify_user_of_admin_response
 
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
 
 @receiver(pre_save, sender=Testimonial)
 def pre_save_testimonial(sender, instance, *args, **kwargs):
@@ -27,6 +34,25 @@ def pre_save_testimonial(sender, instance, *args, **kwargs):
             _send_notification_to_user(notify_user_of_admin_response, instance, subject)
           
 
+def invalidate_approved_testimonials_receiver(sender, instance, created=False, *args, **kwargs):
+    """
+    Clears the cached testimonial carousel when it may have changed. A new testimonial
+    waits for approval, so it can't be in the carousel yet and doesn't clear the cache.
+
+    The cache is only cleared once the change is committed, clearing it before would let a request
+    re-cache the carousel from the old rows in the meantime, and it would stay stale until the next change.
+    """
+    if created and not instance.is_approved:
+        return
+    transaction.on_commit(invalidate_approved_testimonials)
+
+
+# the admin saves testimonials through the proxy models, which send signals under their own class
+for testimonial_model in (Testimonial, ApprovedTestimonial, UnapprovedTestimonial):
+    post_save.connect(invalidate_approved_testimonials_receiver, sender=testimonial_model)
+    post_delete.connect(invalidate_approved_testimonials_receiver, sender=testimonial_model)
+
+
 def _send_notification_to_user(send_email_func, instance, subject):
     """
     Helper function to send email notifications to users with error handling.
@@ -36,11 +62,10 @@ def _send_notification_to_user(send_email_func, instance, subject):
             subject=subject,
             user=instance.author,
         )
-        print(f"Notification sent to {instance.author} regarding the approval of their testimonial.")
+        logger.info(f"Notification sent to {instance.author} regarding the approval of their testimonial.")
 
     except Exception as e:
-        # will add logger later but for now use
-        print(f"Something went wrong with sending notification to user: {instance.author}. Error - {e}")
+        logger.error(f"Something went wrong with sending notification to user: {instance.author}. Error - {e}")
 
 
 def _convert_instance_fields_to_lowercase(instance: Testimonial) -> None:
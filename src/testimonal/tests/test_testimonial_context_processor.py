@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase, override_settings
+
+from testimonal.context_processor import get_approved_testimonials
+from .test_testimonial_model import create_new_testimonial, create_new_user
+
+
+class ApprovedTestimonialsContextProcessorTest(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get("/")
+        
+        for index in range(3):
+            user        = create_new_user(username=f"user{index}", email=f"user{index}@example.com")
+            testimonial = create_new_testimonial(user, company_name=f"company {index}")
+            testimonial.is_approved = True
+            testimonial.save()
+        
+        self.unapproved = create_new_testimonial(create_new_user(username="pending", email="pending@example.com"))
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_testimonials_are_only_loaded_when_used(self):
+        with self.assertNumQueries(0):
+            get_approved_testimonials(self.request)
+    
+    def test_carousel_is_loaded_in_a_single_query_and_then_cached(self):
+        """Test that the author isn't fetched per testimonial and later pages don't query at all"""
+        
+        with self.assertNumQueries(1):
+            html = render_to_string("partials/testimonials.html", get_approved_testimonials(self.request))
+        
+        self.assertIn("User0", html)
+        
+        with self.assertNumQueries(0):
+            render_to_string("partials/testimonials.html", get_approved_testimonials(self.request))
+    
+    def test_only_approved_testimonials_are_included(self):
+        approved_testimonials = get_approved_testimonials(self.request)["approved_testimonials"]
+        
+        self.assertEqual(len(approved_testimonials), 3)
+        self.assertNotIn("Pending", [testimonial["author_name"] for testimonial in approved_testimonials])
+    
+    @override_settings(TESTIMONIAL_CAROUSEL_SIZE=2)
+    def test_number_of_testimonials_is_bounded(self):
+        self.assertEqual(len(get_approved_testimonials(self.request)["approved_testimonials"]), 2)
+    
+    def test_cache_is_invalidated_when_a_testimonial_is_approved(self):
+        self.assertEqual(len(get_approved_testimonials(self.request)["approved_testimonials"]), 3)
+        
+        self.unapproved.is_approved = True
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unapproved.save()
+        
+        self.assertEqual(len(get_approved_testimonials(self.request)["approved_testimonials"]), 4)
+    
+    def test_cache_is_only_invalidated_once_the_change_is_committed(self):
+        """Test that a request made before the approval is committed can't re-cache the old carousel"""
+        
+        get_approved_testimonials(self.request)["approved_testimonials"].__len__()
+        self.unapproved.is_approved = True
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.unapproved.save()
+        
+        self.assertEqual(len(get_approved_testimonials(self.request)["approved_testimonials"]), 3)
+        
+        for callback in callbacks:
+            callback()
+        
+        self.assertEqual(len(get_approved_testimonials(self.request)["approved_testimonials"]), 4)
+    
+    def test_new_testimonial_awaiting_approval_does_not_invalidate_the_cache(self):
+        get_approved_testimonials(self.request)["approved_testimonials"].__len__()
+        create_new_testimonial(create_new_user(username="another", email="another@example.com"))
+        
+        with self.assertNumQueries(0):
+            len(get_approved_testimonials(self.request)["approved_testimonials"])
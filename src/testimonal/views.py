@@ -6,6 +6,12 @@ from django.contrib.auth.decorators import login_required
 from .models import Testimonial, TestimonialMessages
 from .forms.testimonial.testimonial_form import TestimonialForm
 from  utils.tasks import notify_admin_of_new_testimonial
+
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
 # Create your views here.
 
 
@@ -49,10 +55,9 @@ def add_testimonial(request):
                                                      subject="A newly created testimonial has being created an awaiting your approval")
            
            if is_sent:
-               print("Email sent..")
+               logger.info("The admin was notified of the new testimonial")
            else:
-               # Add logger here later to record why
-               print("Email not sent...")
+               logger.warning("The admin couldn't be notified of the new testimonial")
            return redirect("add-testimonial")
        
     else:
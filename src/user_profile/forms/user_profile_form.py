@@ -2,7 +2,6 @@ from django import forms
 
 from user_profile.models import BillingAddress, UserProfile, ShippingAddress
 
-from utils.country_parser import parse_country_file
 
 
 
@@ -6,10 +6,9 @@ from datetime import datetime, date
 from django.contrib.auth import get_user_model
 
 from utils.generator import generate_token
-from utils.country_parser import parse_country_file
+from utils.countries import COUNTRIES_CHOICES
 
 
-COUNTRIES_CHOICES  = parse_country_file("data/countries.txt")
 
 
 
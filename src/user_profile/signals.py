@@ -1,27 +1,50 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 
 from .models import User, UserProfile, BillingAddress
 
 
 
+# Users that are known to have a profile in this process. `User` is saved on every login
+# (`last_login`) and by token and ban updates, so the profile only needs to be checked for
+# once per user instead of on every save.
+MAX_USERS_WITH_PROFILE = 10000
+_users_with_profile    = set()
+
+
 @receiver(post_save, sender=User)
 def create_user_profile_receiver(sender, instance, created, *args, **kwargs):
     
     if created:
-        UserProfile.objects.create(user=instance)
+        UserProfile.objects.get_or_create(user=instance)
+        _remember_user_has_profile(instance)
     else:
         handle_existing_user_profile(instance)
     
 
 def handle_existing_user_profile(user):
+    """
+    Creates a profile for an existing user that doesn't have one (e.g a user that was
+    created before profiles existed). The database is only checked the first time a
+    user is saved in this process, every other save is free.
+    """
+    if user.pk in _users_with_profile:
+        return
     
-    try:
-        profile = UserProfile.objects.get(user=user)
-    except UserProfile.DoesNotExist:
-        UserProfile.objects.create(user=user)
-    else:
-        profile.save()
+    UserProfile.objects.get_or_create(user=user)
+    _remember_user_has_profile(user)
+
+
+@receiver(post_delete, sender=UserProfile)
+def forget_deleted_user_profile_receiver(sender, instance, *args, **kwargs):
+    _users_with_profile.discard(instance.user_id)
+
+
+def _remember_user_has_profile(user):
+    
+    if len(_users_with_profile) >= MAX_USERS_WITH_PROFILE:
+        _users_with_profile.clear()
+    _users_with_profile.add(user.pk)
         
 
 @receiver(post_save, sender=BillingAddress)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.test import Client, TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from user_profile import signals
+from user_profile.models import UserProfile
+
+
+class UserProfileSignalTests(TestCase):
+    
+    def setUp(self):
+        signals._users_with_profile.clear()
+        self.User = get_user_model()
+        self.user = self.User.objects.create_user(username="user", email="egbie@example.com", password="password")
+    
+    def test_saving_an_existing_user_does_not_touch_the_profile(self):
+        """Test that re-saving a user doesn't query or re-save the user profile"""
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        
+        profile_queries = [query["sql"] for query in queries.captured_queries if UserProfile._meta.db_table in query["sql"]]
+        self.assertEqual(profile_queries, [])
+    
+    def test_missing_profile_is_created_on_the_next_save(self):
+        """Test that a user without a profile (e.g a user created before profiles existed) gets one"""
+        
+        UserProfile.objects.filter(user=self.user).delete()
+        self.user.save()
+        
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+    
+    def test_login_query_count(self):
+        """
+        Regression test for the number of queries made by a login. The user is saved to
+        update `last_login`, that save must be a single UPDATE without a profile SELECT or UPDATE.
+        """
+        with self.assertNumQueries(1):
+            update_last_login(sender=None, user=self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            Client().force_login(self.user)
+        
+        profile_queries = [query["sql"] for query in queries.captured_queries if UserProfile._meta.db_table in query["sql"]]
+        self.assertEqual(profile_queries, [])
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from utils.distance_calculator import EARTH_RADIUS_KM, DEFAULT_ESCALATION_MARGIN, geodesic_distance
+
+import numpy as np
+
+
+HOURS_IN_SECONDS = 3600
+
+
+@dataclass
+class TravelScores:
+    """
+    The result of scoring a batch of journeys, every array has one entry per journey.
+
+    Attributes:
+        distances_km (np.ndarray): The distance travelled in kilometres.
+        hours (np.ndarray): The time taken in hours.
+        speeds_kmh (np.ndarray): The implied speed in km/h (`inf` when no time has passed).
+        is_impossible (np.ndarray): True where the implied speed is greater than the maximum speed.
+        refined (np.ndarray): True where the distance was recalculated with the geodesic formula
+                              because the haversine speed was too close to the maximum speed to call.
+    """
+    distances_km: np.ndarray
+    hours: np.ndarray
+    speeds_kmh: np.ndarray
+    is_impossible: np.ndarray
+    refined: np.ndarray
+
+
+def haversine_distances(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Calculates the great-circle distance in kilometres between each pair of coordinates in one vectorised pass.
+
+    The haversine formula treats the earth as a sphere, so the result can differ from the geodesic
+    (ellipsoidal) distance by up to ~0.5%.
+
+    Args:
+        lat1, lon1 (array-like): Latitudes and longitudes (in degrees) of the starting points.
+        lat2, lon2 (array-like): Latitudes and longitudes (in degrees) of the ending points.
+
+    Returns:
+        np.ndarray: The distance between each pair of points in kilometres.
+
+    Example usage:
+        >>> haversine_distances([40.7128], [-74.0060], [51.5074], [-0.1278])
+        array([5570.23...])
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(values, dtype=np.float64)) for values in (lat1, lon1, lat2, lon2))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def to_epoch_seconds(timestamps) -> np.ndarray:
+    """
+    Converts an array of timestamps into seconds since the epoch.
+
+    Args:
+        timestamps (array-like): Either `datetime64` values (or objects numpy can convert to them, such as
+                                 datetimes) or numbers that are already in seconds since the epoch.
+    """
+    timestamps = np.asarray(timestamps)
+
+    if np.issubdtype(timestamps.dtype, np.number):
+        return timestamps.astype(np.float64)
+
+    if timestamps.dtype == object:
+        return np.array([timestamp.timestamp() for timestamp in timestamps], dtype=np.float64)
+
+    return timestamps.astype("datetime64[us]").astype(np.int64) / 1_000_000
+
+
+def score_impossible_travel(lat1, lon1, timestamps1,
+                            lat2, lon2, timestamps2,
+                            max_speed_kmh:float,
+                            borderline_margin:float = DEFAULT_ESCALATION_MARGIN,
+                            ) -> TravelScores:
+    """
+    Scores a batch of journeys and flags the ones that would require travelling faster than `max_speed_kmh`.
+
+    This is the batch version of `utils.distance_calculator.is_travel_impossible`. The distance of every
+    journey is calculated with the vectorised haversine formula, then only the journeys whose implied
+    speed lies within `borderline_margin` of the maximum speed are recalculated with the slower but more
+    accurate geodesic formula, since those are the only ones where the ~0.5% error of haversine could
+    change the outcome.
+
+    Args:
+        lat1, lon1, timestamps1 (array-like): The starting coordinates and when the journey started.
+        lat2, lon2, timestamps2 (array-like): The ending coordinates and when the journey ended.
+        max_speed_kmh (float): The maximum speed possible in km/h (e.g 900 for an aeroplane).
+        borderline_margin (float): The relative distance to the maximum speed that is considered too close
+                                   to call with haversine e.g 0.01 means within 1%.
+
+    Returns:
+        TravelScores: The distances, durations, speeds and the impossible travel flags.
+
+    Raises:
+        ValueError: If the arrays don't have the same length.
+
+    Example usage:
+        >>> scores = score_impossible_travel(
+        ...     lat1=[40.7128], lon1=[-74.0060], timestamps1=[np.datetime64("2025-01-18T12:00")],
+        ...     lat2=[51.5074], lon2=[-0.1278],  timestamps2=[np.datetime64("2025-01-18T13:00")],
+        ...     max_speed_kmh=900,
+        ... )
+        >>> scores.is_impossible
+        array([ True])
+    """
+    lat1, lon1, lat2, lon2 = (np.asarray(values, dtype=np.float64) for values in (lat1, lon1, lat2, lon2))
+    seconds1, seconds2     = to_epoch_seconds(timestamps1), to_epoch_seconds(timestamps2)
+
+    if len({len(values) for values in (lat1, lon1, lat2, lon2, seconds1, seconds2)}) != 1:
+        raise ValueError("All the coordinate and timestamp arrays must have the same length")
+
+    distances_km = haversine_distances(lat1, lon1, lat2, lon2)
+    hours        = np.abs(seconds2 - seconds1) / HOURS_IN_SECONDS
+    speeds_kmh   = _calculate_speeds(distances_km, hours)
+
+    refined = np.abs(speeds_kmh - max_speed_kmh) <= max_speed_kmh * borderline_margin
+
+    for index in np.flatnonzero(refined):
+        distances_km[index] = geodesic_distance(lat1[index], lon1[index], lat2[index], lon2[index])
+
+    if refined.any():
+        speeds_kmh[refined] = _calculate_speeds(distances_km[refined], hours[refined])
+
+    return TravelScores(distances_km=distances_km,
+                        hours=hours,
+                        speeds_kmh=speeds_kmh,
+                        is_impossible=speeds_kmh > max_speed_kmh,
+                        refined=refined,
+                        )
+
+
+def _calculate_speeds(distances_km:np.ndarray, hours:np.ndarray) -> np.ndarray:
+    """speed = distance/time, instantaneous travel is impossible so a zero duration gives an infinite speed."""
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(hours > 0, distances_km / np.where(hours > 0, hours, 1), np.inf)
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+import pickle
+
+
+class TwoTierCache(BaseCache):
+    """
+    A cache backend that keeps a small per-process LRU cache in front of a shared cache.
+
+    Reads are served from process memory when possible, so the shared cache (file, database or
+    Redis) is only touched on a local miss. Writes go to both tiers.
+
+    Workers can't see each other's memory, so every write stores the value in the shared cache as a
+    `(token, value)` pair with a new random token, written with a single `set` so the token and the
+    value can never belong to different writes. A write only invalidates the key it wrote rather than
+    every worker's whole local tier. A worker reads the shared entry of a key it holds at most every
+    `VERSION_CHECK_INTERVAL` seconds and replaces its copy when the token has changed (or drops it when
+    the key is gone), on top of which local entries never live longer than `LOCAL_TIMEOUT` seconds.
+    Together they bound how stale a worker's copy can be, two workers writing the same key at the same
+    time may each keep their own value for up to `LOCAL_TIMEOUT` seconds.
+
+    Example settings:
+        CACHES = {
+            "default": {
+                "BACKEND": "utils.cache_backends.TwoTierCache",
+                "TIMEOUT": 86400,
+                "OPTIONS": {
+                    "SHARED_CACHE": "shared",        # the alias of the shared cache
+                    "LOCAL_MAX_ENTRIES": 1000,       # entries kept in each process
+                    "LOCAL_TIMEOUT": 60,             # seconds an entry may be served from memory
+                    "VERSION_CHECK_INTERVAL": 1,     # seconds between checks of an entry's version
+                },
+            },
+            "shared": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": CACHES_DIR,
+            },
+        }
+    """
+
+    def __init__(self, location, params) -> None:
+        super().__init__(params)
+
+        options = params.get("OPTIONS", {})
+
+        self.shared_alias           = options.get("SHARED_CACHE", "shared")
+        self.local_max_entries      = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self.local_timeout          = float(options.get("LOCAL_TIMEOUT", 60))
+        self.version_check_interval = float(options.get("VERSION_CHECK_INTERVAL", 1))
+
+        self._local = OrderedDict()
+        self._lock  = Lock()
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+
+        with self._lock:
+            entry = self._get_local_entry(local_key)
+
+            if entry is not None and monotonic() - entry[3] < self.version_check_interval:
+                self._local.move_to_end(local_key)
+                return pickle.loads(entry[0])
+
+        shared_entry = self._get_shared_entry(key, version)
+
+        if shared_entry is None:
+            self._delete_local(local_key)
+            return default
+
+        token, value = shared_entry
+
+        with self._lock:
+            entry = self._local.get(local_key)
+
+            # the copy in memory is still current, it only has to be marked as checked
+            if entry is not None and entry[2] == token:
+                entry[3] = monotonic()
+                return value
+
+        self._set_local(local_key, value, self.local_timeout, token)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        local_key = self.make_and_validate_key(key, version=version)
+        timeout   = self._get_timeout(timeout)
+        token     = uuid4().hex
+
+        self.shared.set(key, (token, value), timeout=timeout, version=version)
+        self._set_local(local_key, value, timeout, token)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        local_key = self.make_and_validate_key(key, version=version)
+        timeout   = self._get_timeout(timeout)
+        token     = uuid4().hex
+
+        if not self.shared.add(key, (token, value), timeout=timeout, version=version):
+            return False
+
+        self._set_local(local_key, value, timeout, token)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        self._delete_local(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, timeout=self._get_timeout(timeout), version=version)
+
+    def delete(self, key, version=None) -> bool:
+        # the other workers find the key gone at their next check
+        self._delete_local(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None) -> bool:
+        local_key = self.make_and_validate_key(key, version=version)
+
+        with self._lock:
+            entry = self._get_local_entry(local_key)
+
+            if entry is not None and monotonic() - entry[3] < self.version_check_interval:
+                return True
+        return self._get_shared_entry(key, version) is not None
+
+    # `incr` and `decr` are left to `BaseCache`, which reads the value and sets it back with a new token.
+    # Like the file and database backends they aren't atomic, counters that must be should use the shared cache.
+
+    def clear(self) -> None:
+        self.shared.clear()
+        self.clear_local()
+
+    def clear_local(self) -> None:
+        """Drops every entry held by this process without touching the shared cache."""
+
+        with self._lock:
+            self._local.clear()
+
+    def close(self, **kwargs) -> None:
+        self.shared.close(**kwargs)
+
+    def _get_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _set_local(self, local_key:str, value, timeout, token:str) -> None:
+
+        # a timeout of 0 or less means "expire immediately", there is nothing to keep
+        if timeout is not None and timeout <= 0:
+            self._delete_local(local_key)
+            return
+
+        local_timeout = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        pickled       = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now           = monotonic()
+
+        with self._lock:
+            # the value, when it stops being served from memory, its version and when the version was last checked
+            self._local[local_key] = [pickled, now + local_timeout, token, now]
+            self._local.move_to_end(local_key)
+
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _delete_local(self, local_key:str) -> None:
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def _get_local_entry(self, local_key:str):
+        # called with the lock held, drops the entry once it has been served from memory for long enough
+        entry = self._local.get(local_key)
+
+        if entry is not None and entry[1] <= monotonic():
+            del self._local[local_key]
+            return None
+        return entry
+
+    def _get_shared_entry(self, key, version):
+        entry = self.shared.get(key, version=version)
+
+        # anything else was written straight to the shared cache (or before it held tokens) and isn't trusted
+        if not isinstance(entry, tuple) or len(entry) != 2:
+            return None
+        return entry
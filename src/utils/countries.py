@@ -0,0 +1,25 @@
+from typing import Optional
+
+from utils.country_data import COUNTRIES
+
+
+# The country registry shared by every model and form with a country field.
+#
+# The countries are compiled ahead of time from `static/data/countries.txt` into `utils/country_data.py`
+# (see `python manage.py build_country_registry`), so importing them costs no file reads or parsing.
+
+
+# An immutable tuple of `(code, name)` pairs, ready to be used as `choices`
+COUNTRIES_CHOICES = COUNTRIES
+
+# Country names by code, for validation and display without scanning the choices
+COUNTRY_NAMES = dict(COUNTRIES_CHOICES)
+
+
+def get_country_name(code:str) -> Optional[str]:
+    """Returns the name of the country with the given code or None if the code is unknown."""
+    return COUNTRY_NAMES.get(code)
+
+
+def is_valid_country_code(code:str) -> bool:
+    return code in COUNTRY_NAMES
@@ -68,3 +68,33 @@ def _get_file_path(file_path):
         raise FileNotFoundError("The file was not found")
     return file_path
 
+
+
+def build_country_module(file_path, output_path):
+    """
+    Parses the country file once and writes the result as a Python module.
+
+    The generated module holds a single `COUNTRIES` tuple of `(code, name)` pairs, so the
+    country choices can be imported without a staticfiles lookup or a regex per line.
+    It is imported by `utils.countries`.
+
+    Args:
+        file_path (str): The static path of the country file e.g "data/countries.txt".
+        output_path (str): Where to write the module.
+
+    Returns:
+        int: The number of countries written.
+    """
+    countries = parse_country_file(file_path)
+    lines     = [
+        f"# Generated from static/{file_path} by `python manage.py build_country_registry`, do not edit.",
+        "",
+        "COUNTRIES = (",
+        *(f"    {country!r}," for country in countries),
+        ")",
+        "",
+    ]
+
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines))
+    return len(countries)
@@ -17,3 +17,13 @@ class IPAddressError(Exception):
     """Custom exception raised for invalid IP addresses."""
     pass
 
+
+
+class CircuitBreakerOpenError(Exception):
+    """Custom exception raised when a call to an external provider is rejected because its circuit breaker is open."""
+    pass
+
+
+class InvalidImageError(ValueError):
+    """Custom exception raised when a file isn't an accepted image, see `utils.image_header`."""
+    pass
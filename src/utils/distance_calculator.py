@@ -1,19 +1,60 @@
-from geopy.distance import geodesic
 from datetime import datetime
 from django.utils.timezone import is_aware, make_aware
 from decimal import Decimal
+from math import asin, atan2, cos, radians, sin, sqrt, tan
 
+from utils.lazy_import import lazy_import
 from utils.validator import validate_required_keys
 
 
-def is_travel_impossible(last_coordinates:dict, current_coordinates:dict, max_speed_kmh:int):
+# geopy is only needed for the geodesic distance, see `utils.lazy_import`
+geopy_distance = lazy_import("geopy.distance")
+
+
+# Distance modes, from fastest to most accurate:
+#
+#   haversine : great-circle distance on a sphere with the mean earth radius. Pure math, no allocations.
+#               Error is up to ~0.5% (about 5km per 1000km) because the earth is an ellipsoid.
+#   vincenty  : Vincenty's inverse formula on the WGS-84 ellipsoid. Accurate to ~0.5mm, but the iteration
+#               may not converge for nearly antipodal points, in which case geodesic is used instead.
+#   geodesic  : Karney's algorithm through geopy on the WGS-84 ellipsoid. Accurate to ~15 nanometres and
+#               always converges, but is the slowest and allocates `Point` objects on every call.
+HAVERSINE = "haversine"
+VINCENTY  = "vincenty"
+GEODESIC  = "geodesic"
+
+EARTH_RADIUS_KM     = 6371.0088  # mean earth radius (IUGG)
+KILOMETERS_TO_MILES = 0.621371192
+
+# WGS-84 ellipsoid
+_WGS84_A = 6378.137  # semi-major axis in km
+_WGS84_F = 1 / 298.257223563
+_WGS84_B = (1 - _WGS84_F) * _WGS84_A
+
+# Speeds within this fraction of the maximum speed are recalculated with the geodesic distance
+# since the error of the faster modes could change the result e.g 0.01 is within 1%
+DEFAULT_ESCALATION_MARGIN = 0.01
+
+
+def is_travel_impossible(last_coordinates:dict, 
+                         current_coordinates:dict, 
+                         max_speed_kmh:int, 
+                         mode:str = HAVERSINE, 
+                         escalation_margin:float = DEFAULT_ESCALATION_MARGIN,
+                         ):
     """
     Check if travel between two coordinates is physically impossible based on speed.
     
+    The distance is first calculated with the fast `mode` (haversine by default). Only when the
+    resulting speed is within `escalation_margin` of `max_speed_kmh`, where the error of the fast mode
+    could change the answer, is the distance recalculated with the exact geodesic distance.
+    
     Args:
         last_coordinates    (dict): Dictionary containing 'latitude', 'longitude', and 'timestamp' of the last session.
         current_coordinates (dict): Dictionary containing 'latitude', 'longitude', and 'timestamp' of the current session.
         max_speed_kmh (int): The maximum speed the object you are travelling can move. It must be in Kilometres
+        mode (str): The distance mode used for the first calculation (`haversine`, `vincenty` or `geodesic`).
+        escalation_margin (float): The fraction of `max_speed_kmh` within which the geodesic distance is used.
     
     Returns:
         bool: True if the travel is impossible, False otherwise.
@@ -54,6 +95,7 @@ def is_travel_impossible(last_coordinates:dict, current_coordinates:dict, max_sp
                                 lon1=last_coordinates["longitude"],
                                 lat2=current_coordinates["latitude"],
                                 lon2=current_coordinates["longitude"],
+                                mode=mode,
                                 )
 
     time_difference_in_hours = calculate_time_difference_in_hours(
@@ -66,6 +108,18 @@ def is_travel_impossible(last_coordinates:dict, current_coordinates:dict, max_sp
 
     required_speed = distance_in_kilometers / time_difference_in_hours  # speed = distance/time
     
+    if mode != GEODESIC and abs(required_speed - max_speed_kmh) <= max_speed_kmh * escalation_margin:
+        
+        # too close to call with the fast mode
+        distance_in_kilometers = calculate_distance(
+                                    lat1=last_coordinates["latitude"],
+                                    lon1=last_coordinates["longitude"],
+                                    lat2=current_coordinates["latitude"],
+                                    lon2=current_coordinates["longitude"],
+                                    mode=GEODESIC,
+                                    )
+        required_speed = distance_in_kilometers / time_difference_in_hours
+    
     if required_speed <= max_speed_kmh:
         return False 
     return True
@@ -74,22 +128,24 @@ def is_travel_impossible(last_coordinates:dict, current_coordinates:dict, max_sp
 def calculate_distance(lat1: Decimal| float,
                        lon1: Decimal|float, 
                        lat2: Decimal|float, lon2: float|Decimal,
-                       in_kilometers: bool = True) -> float:
+                       in_kilometers: bool = True,
+                       mode: str = GEODESIC) -> float:
     """
-    Calculates the geodesic distance between two sets of coordinates (latitude and longitude).
+    Calculates the distance between two sets of coordinates (latitude and longitude).
     
     The distance is returned in kilometers by default, but can be returned in miles if `in_kilometers` 
-    is set to False.
+    is set to False. See the distance modes at the top of the module for the accuracy of each mode.
 
     :Args:
         lat1 (float): Latitude of the starting point.
         lon1 (float): Longitude of the starting point.
         lat2 (float): Latitude of the ending point.
         lon2 (float): Longitude of the ending point.
+        mode (str): `haversine`, `vincenty` or `geodesic` (default).
 
     :Raises:
         ValueError: If any of the latitude or longitude values are not of type int or float,
-                    or if they are out of valid range for geographic coordinates.
+                    or if they are out of valid range for geographic coordinates, or if the mode is unknown.
     
     :Returns:
         float: The distance between the two coordinates in kilometers or miles.
@@ -105,7 +161,14 @@ def calculate_distance(lat1: Decimal| float,
         >>> calculate_distance(40.7128, -74.0060, 34.0522, -118.2437, False)
         >>> 2450.950344668338
         
+        # fast path
+        >>> calculate_distance(40.7128, -74.0060, 34.0522, -118.2437, mode="haversine")
+        >>> 3935.751690893986
+        
     """
+    if mode not in DISTANCE_MODES:
+        raise ValueError(f"Unknown distance mode <{mode}>. Expected one of {', '.join(DISTANCE_MODES)}")
+    
     for coordinate in [lat1, lon1, lat2, lon2]:
          if not isinstance(coordinate, (int, float, Decimal)):
             raise ValueError(f"The value <{coordinate}> is not an int, float, or Decimal. Type {type(coordinate)}")
@@ -116,9 +179,86 @@ def calculate_distance(lat1: Decimal| float,
     if not (-180 <= lon1 <= 180 and -180 <= lon2 <= 180):
         raise ValueError("Longitude values must be between -180 and 180 degrees.")
     
-    distance = geodesic((lat1, lon1), (lat2, lon2))
+    distance = DISTANCE_MODES[mode](float(lat1), float(lon1), float(lat2), float(lon2))
+    
+    return distance if in_kilometers else distance * KILOMETERS_TO_MILES
+
+
+def haversine_distance(lat1:float, lon1:float, lat2:float, lon2:float) -> float:
+    """Returns the great-circle distance in kilometres between two points on a spherical earth."""
+    
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+    
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, a)))
+
+
+def vincenty_distance(lat1:float, lon1:float, lat2:float, lon2:float, max_iterations:int = 200, tolerance:float = 1e-12) -> float:
+    """
+    Returns the distance in kilometres between two points on the WGS-84 ellipsoid using Vincenty's inverse formula.
+    
+    Falls back to the geodesic distance if the formula doesn't converge (nearly antipodal points).
+    """
+    if lat1 == lat2 and lon1 == lon2:
+        return 0.0
+    
+    U1 = atan2((1 - _WGS84_F) * tan(radians(lat1)), 1)
+    U2 = atan2((1 - _WGS84_F) * tan(radians(lat2)), 1)
+    L  = radians(lon2 - lon1)
+    
+    sin_U1, cos_U1 = sin(U1), cos(U1)
+    sin_U2, cos_U2 = sin(U2), cos(U2)
+    
+    lambda_ = L
+    
+    for _ in range(max_iterations):
+        sin_lambda, cos_lambda = sin(lambda_), cos(lambda_)
+        
+        sin_sigma = sqrt((cos_U2 * sin_lambda) ** 2 + (cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lambda) ** 2)
+        
+        if sin_sigma == 0:
+            return 0.0  # coincident points
+        
+        cos_sigma    = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lambda
+        sigma        = atan2(sin_sigma, cos_sigma)
+        sin_alpha    = cos_U1 * cos_U2 * sin_lambda / sin_sigma
+        cos_sq_alpha = 1 - sin_alpha ** 2
+        
+        # both points are on the equator
+        cos_2sigma_m = cos_sigma - 2 * sin_U1 * sin_U2 / cos_sq_alpha if cos_sq_alpha != 0 else 0.0
+        
+        C = _WGS84_F / 16 * cos_sq_alpha * (4 + _WGS84_F * (4 - 3 * cos_sq_alpha))
+        
+        previous_lambda = lambda_
+        lambda_ = L + (1 - C) * _WGS84_F * sin_alpha * (
+                  sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        
+        if abs(lambda_ - previous_lambda) < tolerance:
+            break
+    else:
+        return geodesic_distance(lat1, lon1, lat2, lon2)
+    
+    u_sq = cos_sq_alpha * (_WGS84_A ** 2 - _WGS84_B ** 2) / _WGS84_B ** 2
+    A    = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B    = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
     
-    return distance.kilometers if in_kilometers else distance.miles
+    delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+                  cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+                  B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    
+    return _WGS84_B * A * (sigma - delta_sigma)
+
+
+def geodesic_distance(lat1:float, lon1:float, lat2:float, lon2:float) -> float:
+    """Returns the distance in kilometres between two points on the WGS-84 ellipsoid using geopy (Karney's algorithm)."""
+    return geopy_distance.geodesic((lat1, lon1), (lat2, lon2)).kilometers
+
+
+DISTANCE_MODES = {
+    HAVERSINE: haversine_distance,
+    VINCENTY: vincenty_distance,
+    GEODESIC: geodesic_distance,
+}
 
 
 def calculate_time_difference_in_hours(datetime1, datetime2):
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_q.signing import SignedPackage
+from django_q.tasks import async_task
+
+from authentication.models import QueuedEmail
+from utils.hooks import process_email_batch_result
+from utils.send_email import send_email_batch
+
+import logging
+
+
+logger = logging.getLogger("custom_logger")
+
+
+def queue_email(message:dict) -> int:
+    """
+    Saves an email to the outbox and queues a django-q task to send it.
+
+    The email is written to the database first, so it is never lost if the process or a worker
+    dies before it is sent. The task doesn't send this email alone: it sends every email waiting
+    in the outbox, up to EMAIL_BATCH_SIZE at a time, over a single SMTP connection (see
+    `send_queued_emails`). Emails queued while a worker is busy are batched together by the
+    next task, and the tasks left with nothing to send finish straight away.
+
+    Args:
+        message (dict): The arguments of `utils.send_email.send_email` i.e `subject`, `from_email`,
+                        `to_email`, `email_template`, `text_template` and `context`.
+
+    Returns:
+        int: The id of the queued email.
+
+    Example usage:
+        >>> queue_email({"subject": "Welcome", "from_email": ..., "to_email": ..., "email_template": ...,
+        ...              "text_template": ..., "context": {...}})
+    """
+    # the context may hold model instances, so it is pickled (and signed) the same way django-q stores its tasks
+    queued_email = QueuedEmail.objects.create(to_email=message["to_email"], message=SignedPackage.dumps(message))
+
+    # the worker must be able to see the email, so the task is only queued once it has been committed
+    transaction.on_commit(lambda: async_task(send_queued_emails, hook=process_email_batch_result))
+    return queued_email.pk
+
+
+def send_queued_emails(batch_size:Optional[int] = None) -> list:
+    """
+    The django-q task that sends a batch of the emails waiting in the outbox over one SMTP connection.
+
+    The emails are claimed first so two workers never send the same batch, and are deleted once sent.
+    If the worker dies while sending them the claim expires after EMAIL_CLAIM_TIMEOUT seconds and
+    they are sent by a later task, so an email may be sent twice but is never lost.
+
+    Returns:
+        list: One result per email, see `utils.send_email.send_email_batch`.
+    """
+    queued_emails = _claim_queued_emails(batch_size or settings.EMAIL_BATCH_SIZE)
+
+    if not queued_emails:
+        return []
+
+    messages = []
+
+    for queued_email in queued_emails:
+        try:
+            messages.append(SignedPackage.loads(queued_email.message))
+        except Exception as e:
+            logger.error(f"The queued email to {queued_email.to_email} couldn't be read and won't be sent: {str(e)}")
+
+    results = send_email_batch(messages) if messages else []
+
+    QueuedEmail.objects.filter(pk__in=[queued_email.pk for queued_email in queued_emails]).delete()
+    return results
+
+
+def _claim_queued_emails(batch_size:int) -> list:
+    now     = timezone.now()
+    expired = now - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT)
+
+    with transaction.atomic():
+        queued_emails = list(QueuedEmail.objects
+                             .select_for_update(skip_locked=True)
+                             .filter(Q(claimed_on__isnull=True) | Q(claimed_on__lt=expired))
+                             .order_by("pk")[:batch_size]
+                             )
+        QueuedEmail.objects.filter(pk__in=[queued_email.pk for queued_email in queued_emails]).update(claimed_on=now)
+
+    return queued_emails
@@ -74,15 +74,18 @@ def _generate_url(request, user, verification_key, path):
     return f"{protocol}://{current_site}/{path}/{user.username}/{token}/"
 
 
-def generate_random_image_filename(base_image_name, image, basefolder=None):
-      
-    extenstion         = get_image_extenstion(image)
-    generated_filename = ""
+def generate_hashed_image_filename(base_image_name, image, file_hash, basefolder=None):
+    """
+    Names the image after the hash of its bytes, so uploading the same image twice stores it once.
+
+    Example:
+        >>> generate_hashed_image_filename("main_image", "/tmp/tmpk2/5e88...3c.png", "5e88...3c", "product_images")
+        'product_images/5e88...3c_main_image.png'
+    """
+    extenstion = get_image_extenstion(image)
+    filename   = f'{file_hash[:32]}_{base_image_name}.{extenstion}'
     
     if basefolder:
-         basefolder = basefolder[:-1] if basefolder.endswith("/") else basefolder
-         generated_filename = f'product_images/{generate_token()}_{base_image_name}.{extenstion}'
-    else:
-        generated_filename = f'{generate_token()}_{base_image_name}.{extenstion}'
-    return generated_filename
-    
\ No newline at end of file
+        basefolder = basefolder[:-1] if basefolder.endswith("/") else basefolder
+        return f'{basefolder}/{filename}'
+    return filename
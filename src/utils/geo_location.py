@@ -0,0 +1,244 @@
+from bisect import bisect_right
+from ipaddress import ip_address, ip_network, IPv4Address, IPv4Network
+from threading import Lock
+from typing import Iterable, Optional
+
+import logging
+import mmap
+import os
+import struct
+
+
+logger = logging.getLogger('custom_logger')
+
+
+# Binary layout of the geo-location table
+#
+#   header   : MAGIC (8 bytes) | number of ranges (uint32) | offset of the location pool (uint32)
+#   ranges   : sorted fixed-width records -> start key (16 bytes) | end key (16 bytes) | pool offset (uint32) | length (uint16)
+#   pool     : de-duplicated, tab separated location records encoded as utf-8
+#
+# Every address is stored as a 16 byte big-endian key (IPv4 addresses are mapped into
+# the ::ffff:0:0/96 block) so a plain byte comparison gives the same order as the numeric
+# value, which is what lets `bisect` search the memory-mapped file directly.
+MAGIC           = b"FVGEOIP1"
+HEADER          = struct.Struct("<8sII")
+RANGE_RECORD    = struct.Struct("<16s16sIH")
+KEY_SIZE        = 16
+LOCATION_FIELDS = ("city", "region", "country", "loc", "timezone", "org")
+
+_IPV4_MAPPED_PREFIX = 0xFFFF << 32
+
+
+class GeoLocationTableError(Exception):
+    """Raised when the geo-location table cannot be built or read."""
+    pass
+
+
+class _RangeStarts:
+    """
+    A read-only sequence view over the start key of each range in the memory-mapped table.
+
+    `bisect` only needs `__len__` and `__getitem__`, so the keys are sliced straight out of
+    the mapping on demand rather than being copied into a list.
+    """
+
+    def __init__(self, buffer, count:int) -> None:
+        self._buffer = buffer
+        self._count  = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index:int) -> bytes:
+        offset = HEADER.size + index * RANGE_RECORD.size
+        return self._buffer[offset:offset + KEY_SIZE]
+
+
+class GeoLocationTable:
+    """
+    An offline IP to geo-location lookup table backed by a memory-mapped file.
+
+    The table is a sorted list of non-overlapping IP ranges, each pointing to a location record.
+    A lookup is a single binary search, so no network round trip is needed to resolve an IP address.
+
+    Example usage:
+        >>> table = GeoLocationTable("geoip/geoip.bin")
+        >>> table.lookup("81.2.69.160")
+        {"ip": "81.2.69.160", "city": "London", "region": "England", "country": "GB",
+         "loc": "51.5142,-0.0931", "timezone": "Europe/London", "org": "AS20712 Andrews & Arnold Ltd"}
+    """
+
+    def __init__(self, file_path:str) -> None:
+        """
+        Opens and memory-maps the table stored at `file_path`.
+
+        Raises:
+            FileNotFoundError: If the table does not exist.
+            GeoLocationTableError: If the file is not a valid geo-location table.
+        """
+        self.file_path = file_path
+
+        with open(file_path, "rb") as file:
+            try:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise GeoLocationTableError(f"The geo-location table <{file_path}> is empty")
+
+        if len(self._buffer) < HEADER.size:
+            raise GeoLocationTableError(f"The geo-location table <{file_path}> is truncated")
+
+        magic, self._count, self._pool_offset = HEADER.unpack_from(self._buffer, 0)
+
+        if magic != MAGIC:
+            raise GeoLocationTableError(f"The file <{file_path}> is not a geo-location table")
+
+        self._starts = _RangeStarts(self._buffer, self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def lookup(self, ip:str) -> Optional[dict]:
+        """
+        Returns the geo-location for the given IPv4 or IPv6 address.
+
+        Args:
+            ip (str): The ip address to locate.
+
+        Returns:
+            dict | None: A dictionary with the same shape as the ipinfo.io response
+                         (`ip`, `city`, `region`, `country`, `loc`, `timezone`, `org`)
+                         or None if the address is not covered by the table.
+
+        Raises:
+            ValueError: If the ip is not a valid IPv4 or IPv6 address.
+        """
+        key   = _ip_to_key(ip_address(ip))
+        index = bisect_right(self._starts, key) - 1
+
+        if index < 0:
+            return None
+
+        _, end, location_offset, location_length = RANGE_RECORD.unpack_from(self._buffer, HEADER.size + index * RANGE_RECORD.size)
+
+        if key > end:
+            return None
+
+        start  = self._pool_offset + location_offset
+        values = self._buffer[start:start + location_length].decode("utf-8").split("\t")
+
+        location = {"ip": ip}
+        location.update((field, value or None) for field, value in zip(LOCATION_FIELDS, values))
+        return location
+
+
+def build_geo_location_table(rows:Iterable[dict], destination:str) -> int:
+    """
+    Compiles CIDR ranges and their locations into a binary table that can be read by `GeoLocationTable`.
+
+    Args:
+        rows (iterable of dict): Each row must contain a `network` key (e.g "81.2.69.0/24") and optionally
+                                 the keys `city`, `region`, `country`, `loc`, `timezone` and `org`.
+        destination (str): The path where the table will be written. The file is written to a temporary
+                           path first and then moved into place so readers never see a partial table.
+
+    Returns:
+        int: The number of ranges written to the table.
+
+    Raises:
+        GeoLocationTableError: If a network is invalid or two networks overlap.
+    """
+    ranges        = []
+    location_pool = {}
+    pool_size     = 0
+
+    for row in rows:
+        try:
+            network = ip_network(row["network"].strip(), strict=False)
+        except (KeyError, ValueError) as e:
+            raise GeoLocationTableError(f"Invalid network in row {row}: {e}")
+
+        location = "\t".join((row.get(field) or "").replace("\t", " ").strip() for field in LOCATION_FIELDS).encode("utf-8")
+
+        if location not in location_pool:
+            location_pool[location] = pool_size
+            pool_size += len(location)
+
+        start, end = _network_to_keys(network)
+        ranges.append((start, end, location_pool[location], len(location)))
+
+    ranges.sort()
+
+    for previous, current in zip(ranges, ranges[1:]):
+        if current[0] <= previous[1]:
+            raise GeoLocationTableError("The table contains overlapping networks, each IP address must resolve to a single location")
+
+    pool_offset = HEADER.size + len(ranges) * RANGE_RECORD.size
+    temp_path   = f"{destination}.tmp"
+    directory   = os.path.dirname(destination)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(ranges), pool_offset))
+
+        for record in ranges:
+            file.write(RANGE_RECORD.pack(*record))
+
+        # dicts keep insertion order, which is also the order the offsets were assigned in
+        for location in location_pool:
+            file.write(location)
+
+    os.replace(temp_path, destination)
+    return len(ranges)
+
+
+_tables     = {}
+_table_lock = Lock()
+
+
+def get_geo_location_table(file_path:str) -> Optional[GeoLocationTable]:
+    """
+    Returns the process wide table for `file_path`, opening it the first time it is requested.
+
+    Returns None if the table doesn't exist or cannot be read so the caller can fall back
+    to another source. The outcome is remembered, so a missing table is only reported once
+    per process instead of on every lookup.
+    """
+    try:
+        return _tables[file_path]
+    except KeyError:
+        pass
+
+    with _table_lock:
+        if file_path not in _tables:
+            try:
+                _tables[file_path] = GeoLocationTable(file_path)
+            except (FileNotFoundError, GeoLocationTableError) as e:
+                logger.warning(f"The offline geo-location table could not be loaded: {e}")
+                _tables[file_path] = None
+    return _tables[file_path]
+
+
+def _ip_to_key(address) -> bytes:
+    """Converts an IPv4 or IPv6 address into its 16 byte big-endian table key."""
+
+    value = int(address)
+    if isinstance(address, IPv4Address):
+        value |= _IPV4_MAPPED_PREFIX
+    return value.to_bytes(KEY_SIZE, "big")
+
+
+def _network_to_keys(network) -> tuple[bytes, bytes]:
+    """Returns the first and last key covered by the network."""
+
+    first, last = int(network.network_address), int(network.broadcast_address)
+
+    if isinstance(network, IPv4Network):
+        first |= _IPV4_MAPPED_PREFIX
+        last  |= _IPV4_MAPPED_PREFIX
+    return first.to_bytes(KEY_SIZE, "big"), last.to_bytes(KEY_SIZE, "big")
@@ -40,3 +40,25 @@ def process_email_result(result):
         logger.error(f"{SUCCESS_MSG} Unexpected result type: {result}")
     
     return is_sent 
+
+
+def process_email_batch_result(task):
+    """
+    The hook called after django-q has sent a batch of emails with `utils.send_email.send_email_batch`.
+    
+    The batch returns one result per email, each one is reported through `process_email_result`
+    exactly as if the email had been sent by its own task.
+
+    Parameters:
+        - task: The django-q task (or directly the list of results) of the batch.
+
+    Returns:
+        - list: The value returned by `process_email_result` for each email in the batch.
+    """
+    results = getattr(task, "result", task)
+    
+    if not isinstance(results, (list, tuple)):
+        logger.error(f"The email batch failed before any email was sent: {results}")
+        return []
+    
+    return [process_email_result(result) for result in results]
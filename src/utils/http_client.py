@@ -0,0 +1,237 @@
+from threading import Event, Lock
+from time import monotonic
+from typing import Callable
+
+from utils.custom_errors import CircuitBreakerOpenError
+from utils.lazy_import import lazy_import
+
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
+
+# requests (and urllib3) are only imported once the first client is created, see `utils.lazy_import`
+requests          = lazy_import("requests")
+requests_adapters = lazy_import("requests.adapters")
+urllib3_retry     = lazy_import("urllib3.util.retry")
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an unhealthy upstream provider so requests fail fast instead of waiting on timeouts.
+
+    The breaker starts `closed` and lets every call through. After `failure_threshold` consecutive
+    failures it `opens` and rejects every call for `reset_timeout` seconds. Once that time has passed
+    a single trial call is allowed through (`half-open`), if it succeeds the breaker closes again,
+    otherwise it re-opens for another `reset_timeout` seconds.
+
+    Example usage:
+        >>> breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        >>> if breaker.allow_request():
+        ...     try:
+        ...         response = call_provider()
+        ...     except Exception:
+        ...         breaker.record_failure()
+        ...     else:
+        ...         breaker.record_success()
+    """
+
+    CLOSED    = "closed"
+    OPEN      = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold:int = 5, reset_timeout:float = 30) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self._failures         = 0
+        self._opened_at        = None
+        self._trial_in_flight  = False
+        self._lock             = Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """Returns True if a call to the provider may be made."""
+
+        with self._lock:
+            state = self._state()
+
+            if state == self.CLOSED:
+                return True
+
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures        = 0
+            self._opened_at       = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures       += 1
+            self._trial_in_flight = False
+
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = monotonic()
+
+
+class _Flight:
+    """A single in-progress call shared by every caller waiting on the same key."""
+
+    def __init__(self) -> None:
+        self.done      = Event()
+        self.result    = None
+        self.exception = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single call.
+
+    The first caller for a key runs the function, every other caller that arrives while it is
+    still running waits for it to finish and receives the same result (or the same exception).
+    Once the call has finished the key is released, so the next call runs the function again.
+
+    Example usage:
+        >>> flights = SingleFlight()
+        >>> flights.do(f"geo_location_{ip}", fetch_location, ip)
+    """
+
+    def __init__(self) -> None:
+        self._flights = {}
+        self._lock    = Lock()
+
+    def do(self, key:str, func:Callable, *args, **kwargs):
+        with self._lock:
+            flight    = self._flights.get(key)
+            is_leader = flight is None
+
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return flight.result
+
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class HTTPClient:
+    """
+    A shared HTTP client for calls to external providers.
+
+    Connections are kept alive and pooled through a single `requests.Session`, every request is
+    bounded by a connect and a read timeout and a `CircuitBreaker` rejects calls while the provider
+    is failing, so a slow or unavailable provider cannot hold up a worker.
+    """
+
+    def __init__(self,
+                 name:str,
+                 connect_timeout:float = 2,
+                 read_timeout:float = 3,
+                 max_retries:int = 1,
+                 pool_size:int = 10,
+                 failure_threshold:int = 5,
+                 reset_timeout:float = 30,
+                 ) -> None:
+        """
+        Args:
+            name (str): The name of the provider, used in log and error messages.
+            connect_timeout (float): Seconds to wait for a connection to be established.
+            read_timeout (float): Seconds to wait for the provider to send a response.
+            max_retries (int): How many times a failed connection is retried. Reads are never retried
+                               since the provider may already be processing the request.
+            pool_size (int): The number of keep-alive connections kept per host.
+            failure_threshold (int): Consecutive failures before the circuit breaker opens.
+            reset_timeout (float): Seconds the breaker stays open before a trial call is allowed.
+        """
+        self.name    = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+        retry   = urllib3_retry.Retry(total=max_retries, connect=max_retries, read=0, status=0, backoff_factor=0.1, allowed_methods=["GET"])
+        adapter = requests_adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url:str, **kwargs) -> "requests.Response":
+        """
+        Sends a GET request through the pooled session.
+
+        Raises:
+            CircuitBreakerOpenError: If the provider has been failing and the breaker is open.
+            requests.exceptions.RequestException: If the request fails or times out.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitBreakerOpenError(f"The {self.name} provider is unavailable, the request was not sent")
+
+        kwargs.setdefault("timeout", self.timeout)
+
+        try:
+            response = self.session.get(url, **kwargs)
+        except Exception:
+            # any error, not only the `RequestException`s, must be recorded or a half-open trial is never released
+            self._record_failure()
+            raise
+
+        # the provider being unhealthy or rate limiting us should trip the breaker, client errors shouldn't
+        if response.status_code >= 500 or response.status_code == 429:
+            self._record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _record_failure(self) -> None:
+        self.breaker.record_failure()
+
+        if self.breaker.state == CircuitBreaker.OPEN:
+            logger.warning(f"The circuit breaker for the {self.name} provider is open, requests will fail fast for {self.breaker.reset_timeout} seconds")
+
+
+_clients      = {}
+_clients_lock = Lock()
+
+
+def get_http_client(name:str, **options) -> HTTPClient:
+    """
+    Returns the process wide client for the provider `name`, creating it with `options` on first use.
+
+    Sharing one client per provider is what allows connections to be re-used between requests
+    and lets the circuit breaker see every failure made by the worker.
+    """
+    client = _clients.get(name)
+
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = HTTPClient(name, **options)
+    return client
@@ -0,0 +1,250 @@
+from collections import namedtuple
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from utils.custom_errors import InvalidImageError
+from utils.lazy_import import lazy_import
+
+import struct
+
+
+# only needed once an upload's header has been accepted, see `utils.lazy_import`
+Image = lazy_import("PIL.Image")
+
+
+# The format (as used for the file's extension) and size in pixels read from an image's header
+ImageHeader = namedtuple("ImageHeader", ["format", "width", "height"])
+
+
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+PNG_SIGNATURE  = b"\x89PNG\r\n\x1a\n"
+
+# The JPEG "start of frame" markers that hold the image's size, C4 (DHT), C8 (JPG) and CC (DAC) aren't frames
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Markers that aren't followed by a length: TEM and the restart markers RST0 to RST7
+JPEG_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+
+# How far into a JPEG the frame header is looked for, the EXIF and other metadata segments come first
+# and may each be up to 64KB but are skipped over (with `seek`) rather than read
+JPEG_MAX_HEADER_OFFSET = 1024 * 1024
+
+
+def read_image_header(file) -> ImageHeader:
+    """
+    Returns the format, width and height of a JPEG, PNG or WebP image from the first bytes of the file.
+
+    Unlike `PIL.Image.open` nothing but the header is read, a few dozen bytes for PNG and WebP and the
+    segment markers before the frame header for JPEG, so a multi-megabyte image (or a file pretending to be
+    one) costs the same as a thumbnail. The file's position is restored afterwards.
+
+    Args:
+        file (str | file): A path or a binary file-like object, e.g an uploaded file.
+
+    Raises:
+        InvalidImageError: If the file isn't a JPEG, PNG or WebP image or its header is truncated.
+
+    Example usage:
+        >>> read_image_header("media/product_images/apple.png")
+        ImageHeader(format='png', width=1200, height=800)
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+        with open(file, "rb") as image_file:
+            return _read_header(image_file)
+
+    position = file.tell()
+
+    try:
+        file.seek(0)
+        return _read_header(file)
+    finally:
+        file.seek(position)
+
+
+def _read_header(file) -> ImageHeader:
+    start = file.read(32)
+
+    if start.startswith(PNG_SIGNATURE):
+        return _read_png_header(start)
+
+    if start.startswith(JPEG_SIGNATURE):
+        return _read_jpeg_header(file)
+
+    if start[:4] == b"RIFF" and start[8:12] == b"WEBP":
+        return _read_webp_header(start)
+
+    raise InvalidImageError("The file isn't a JPEG, PNG or WebP image")
+
+
+def _read_png_header(start:bytes) -> ImageHeader:
+    # the signature is followed by the IHDR chunk: length (4 bytes), type, width and height (4 bytes each)
+    if len(start) < 24 or start[12:16] != b"IHDR":
+        raise InvalidImageError("The PNG image's header is missing or truncated")
+
+    width, height = struct.unpack(">II", start[16:24])
+    return _create_header("png", width, height)
+
+
+def _read_webp_header(start:bytes) -> ImageHeader:
+    chunk = start[12:16]
+
+    if chunk == b"VP8 " and len(start) >= 30:
+        # lossy: a 3 byte frame tag and a 3 byte start code come before the 14 bit width and height
+        width, height = struct.unpack("<HH", start[26:30])
+        return _create_header("webp", width & 0x3FFF, height & 0x3FFF)
+
+    if chunk == b"VP8L" and len(start) >= 25:
+        # lossless: a signature byte then the width and height, less one, packed into 14 bits each
+        bits = struct.unpack("<I", start[21:25])[0]
+        return _create_header("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+
+    if chunk == b"VP8X" and len(start) >= 30:
+        # extended (animation, alpha or metadata): the canvas width and height, less one, in 24 bits each
+        return _create_header("webp", int.from_bytes(start[24:27], "little") + 1, int.from_bytes(start[27:30], "little") + 1)
+
+    raise InvalidImageError("The WebP image's header is missing or truncated")
+
+
+def _read_jpeg_header(file) -> ImageHeader:
+    file.seek(2)
+
+    while file.tell() < JPEG_MAX_HEADER_OFFSET:
+        byte = file.read(1)
+
+        # each segment starts with a marker, anything else means the file is corrupt
+        if byte != b"\xff":
+            break
+
+        marker = file.read(1)
+
+        # a marker may be padded with any number of 0xFF bytes
+        while marker == b"\xff":
+            marker = file.read(1)
+
+        if not marker:
+            break
+
+        marker = marker[0]
+
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+
+        length_bytes = file.read(2)
+
+        if len(length_bytes) < 2:
+            break
+
+        length = struct.unpack(">H", length_bytes)[0]
+
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+
+            if len(frame) < 5:
+                break
+
+            # the sample precision (1 byte) then the height and width (2 bytes each)
+            height, width = struct.unpack(">HH", frame[1:5])
+            return _create_header("jpeg", width, height)
+
+        # the start of scan (SOS) is the compressed image data, the frame header should have come before it
+        if marker == 0xDA or length < 2:
+            break
+
+        file.seek(length - 2, 1)
+
+    raise InvalidImageError("The JPEG image's frame header is missing or truncated")
+
+
+def _create_header(image_format:str, width:int, height:int) -> ImageHeader:
+    if not width or not height:
+        raise InvalidImageError(f"The {image_format.upper()} image has no width or height")
+    return ImageHeader(image_format, width, height)
+
+
+def check_image(file, allowed_formats=None, max_width:int = None, max_height:int = None, max_pixels:int = None) -> ImageHeader:
+    """
+    Checks an image's format and size from its header, before anything is decoded.
+
+    Rejecting images that are too large here, rather than when they are resized, stops a small
+    file that decompresses to an enormous image (a "decompression bomb") from exhausting a worker's memory.
+
+    Args:
+        file (str | file): A path or a binary file-like object.
+        allowed_formats (list): The formats that are accepted e.g `["jpeg", "png"]`, like
+                                `CKEDITOR_5_UPLOAD_FILE_TYPES`. Every format that can be read is accepted by default.
+        max_width (int), max_height (int), max_pixels (int): The largest size accepted, not checked by default.
+
+    Raises:
+        InvalidImageError: If the file isn't an image, isn't an allowed format or is too large.
+    """
+    header = read_image_header(file)
+
+    if allowed_formats is not None and header.format not in {image_format.lower() for image_format in allowed_formats}:
+        raise InvalidImageError(f"{header.format.upper()} images aren't accepted, upload one of: {', '.join(allowed_formats).upper()}")
+
+    if max_width and header.width > max_width:
+        raise InvalidImageError(f"The image is {header.width} pixels wide, it can't be wider than {max_width} pixels")
+
+    if max_height and header.height > max_height:
+        raise InvalidImageError(f"The image is {header.height} pixels high, it can't be higher than {max_height} pixels")
+
+    if max_pixels and header.width * header.height > max_pixels:
+        raise InvalidImageError(f"The image is {header.width}x{header.height} pixels, it can't have more than {max_pixels} pixels")
+
+    return header
+
+
+def verify_image(file, image_format:str = None) -> None:
+    """
+    Checks the rest of the image with Pillow, the same check `forms.ImageField` makes.
+
+    The header only shows the file starts like an image, `verify` reads the rest of it (e.g the PNG
+    chunks and their checksums) without decoding the pixels, so a valid header followed by junk is
+    rejected. Only call it once `check_image` has accepted the image's size. The file's position is restored afterwards.
+
+    Args:
+        file (str | file): A path or a binary file-like object.
+        image_format (str): The format read from the header, Pillow must agree with it.
+
+    Raises:
+        InvalidImageError: If Pillow can't read the image or reads it as another format.
+    """
+    is_path  = isinstance(file, (str, bytes)) or hasattr(file, "__fspath__")
+    position = None if is_path else file.tell()
+
+    try:
+        if not is_path:
+            file.seek(0)
+
+        with Image.open(file) as image:
+            pillow_format = (image.format or "").lower()
+            image.verify()
+    except Exception as e:
+        raise InvalidImageError(f"The image is corrupt or isn't really an image: {e}")
+    finally:
+        if position is not None:
+            file.seek(position)
+
+    if image_format and pillow_format != image_format:
+        raise InvalidImageError(f"The file's header says {image_format.upper()} but it is a {pillow_format.upper() or 'unknown'} image")
+
+
+def validate_product_image(file) -> None:
+    """
+    A form field validator that checks an uploaded product image against PRODUCT_IMAGE_UPLOAD_FILE_TYPES,
+    PRODUCT_IMAGE_MAX_DIMENSION and PRODUCT_IMAGE_MAX_PIXELS from its header (see `check_image`), then
+    verifies the whole image with Pillow (see `verify_image`) once its size is known to be safe.
+
+    Example usage:
+        >>> primary_image = forms.FileField(validators=[validate_product_image])
+    """
+    try:
+        header = check_image(file,
+                             allowed_formats=settings.PRODUCT_IMAGE_UPLOAD_FILE_TYPES,
+                             max_width=settings.PRODUCT_IMAGE_MAX_DIMENSION,
+                             max_height=settings.PRODUCT_IMAGE_MAX_DIMENSION,
+                             max_pixels=settings.PRODUCT_IMAGE_MAX_PIXELS,
+                             )
+        verify_image(file, header.format)
+    except InvalidImageError as e:
+        raise ValidationError(str(e), code="invalid_image")
@@ -0,0 +1,142 @@
+from collections import namedtuple
+from typing import Iterable
+
+import json
+import subprocess
+import sys
+
+
+# `self_us` is the time spent importing the module itself and `cumulative_us` includes the modules it imported
+ImportTime = namedtuple("ImportTime", ["name", "self_us", "cumulative_us"])
+
+
+# The least a module's budget is allowed over its measured time, in milliseconds
+MIN_HEADROOM_MS = 10
+
+
+# What a worker imports before it can answer its first request: the apps, their models and every view in the URLconf
+STARTUP_SCRIPT = "import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns"
+
+
+def parse_import_times(output:str) -> dict:
+    """
+    Parses the report printed to stderr by `python -X importtime`.
+
+    Args:
+        output (str): The stderr of the interpreter, lines look like
+                      `import time:       354 |     170886 | django.urls`
+
+    Returns:
+        dict: An `ImportTime` for each imported module, keyed on the module's name.
+    """
+    times = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times[name.strip()] = ImportTime(name.strip(), int(self_us), int(cumulative_us))
+        except ValueError:
+            # the header row (`self [us] | cumulative | imported package`) and any unrelated output
+            continue
+    return times
+
+
+def measure_import_times(script:str = STARTUP_SCRIPT, repeat:int = 3, env:dict = None, cwd:str = None) -> dict:
+    """
+    Runs `script` in a fresh interpreter with `-X importtime` `repeat` times and returns the fastest time
+    seen for each module, which filters out most of the noise from other processes on the machine.
+
+    Raises:
+        RuntimeError: If the script fails.
+    """
+    fastest = {}
+
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, env=env, cwd=cwd)
+
+        if result.returncode != 0:
+            raise RuntimeError(f"The start up script failed:\n{result.stderr[-2000:]}")
+
+        for name, time in parse_import_times(result.stderr).items():
+            if name not in fastest or time.cumulative_us < fastest[name].cumulative_us:
+                fastest[name] = time
+    return fastest
+
+
+def get_total_import_time_ms(times:dict) -> float:
+    return sum(time.self_us for time in times.values()) / 1000
+
+
+def get_package_import_time_ms(times:dict, package:str):
+    """
+    Returns the time spent importing the package and its submodules, or None if none of them were imported.
+
+    The package's own line in the report isn't reliable on its own (its cumulative time is charged to whichever
+    module imported it first), so the self time of every module in the package is added up instead.
+    """
+    prefix  = f"{package}."
+    modules = [time for name, time in times.items() if name == package or name.startswith(prefix)]
+
+    if not modules:
+        return None
+    return sum(time.self_us for time in modules) / 1000
+
+
+def check_import_budget(times:dict, budget:dict) -> list:
+    """
+    Compares the measured import times against the budget and returns a message for each overrun.
+
+    The budget has a `total_ms` for the whole start up and a `modules` dictionary of the time (in
+    milliseconds) each module, with its submodules, may take (see `get_package_import_time_ms`).
+    A budget of 0 means the module must not be imported at start up at all, which is how the lazily
+    imported libraries (see `utils.lazy_import`) are kept lazy.
+
+    Example budget:
+        {"total_ms": 1500, "modules": {"django_q": 120, "google.generativeai": 0}}
+    """
+    overruns = []
+    total_ms = get_total_import_time_ms(times)
+
+    if "total_ms" in budget and total_ms > budget["total_ms"]:
+        overruns.append(f"Start up took {total_ms:.0f}ms, the budget is {budget['total_ms']}ms")
+
+    for name, budget_ms in budget.get("modules", {}).items():
+        time_ms = get_package_import_time_ms(times, name)
+
+        if time_ms is None:
+            continue
+
+        if budget_ms == 0:
+            overruns.append(f"<{name}> is imported at start up ({time_ms:.0f}ms), it should be imported lazily")
+        elif time_ms > budget_ms:
+            overruns.append(f"<{name}> took {time_ms:.0f}ms to import, the budget is {budget_ms}ms")
+    return overruns
+
+
+def build_import_budget(times:dict, modules:Iterable[str], headroom:float = 0.25) -> dict:
+    """
+    Returns a budget allowing the measured times plus `headroom` (a fraction, and at least `MIN_HEADROOM_MS`
+    so modules that only take a few milliseconds don't fail on noise). Modules that weren't imported at
+    start up are given a budget of 0 so they stay that way.
+    """
+    budget_modules = {}
+
+    for name in modules:
+        time_ms = get_package_import_time_ms(times, name)
+        budget_modules[name] = 0 if time_ms is None else round(max(time_ms * (1 + headroom), time_ms + MIN_HEADROOM_MS))
+
+    return {"total_ms": round(get_total_import_time_ms(times) * (1 + headroom)), "modules": budget_modules}
+
+
+def load_import_budget(file_path:str) -> dict:
+    with open(file_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_import_budget(file_path:str, budget:dict) -> None:
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(budget, file, indent=4)
+        file.write("\n")
@@ -0,0 +1,62 @@
+from importlib import import_module
+from threading import Lock
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    A stand-in for a module that is only imported the first time one of its attributes is used.
+
+    Heavy libraries that are only needed by one feature (e.g the Gemini client used by the FAQ bot)
+    would otherwise be imported by every worker at start up, which is felt on every cold start of
+    the serverless deployment. Assigning the stand-in to the name the module would have been
+    imported as keeps the calling code unchanged:
+
+    Example usage:
+        >>> genai = LazyModule("google.generativeai")      # instead of `import google.generativeai as genai`
+        >>> genai.configure(api_key=api_key)                # google.generativeai is imported here
+
+    Only attribute access triggers the import, so the stand-in can be used in annotations and
+    `except` clauses (which are only evaluated when an exception is raised) without loading the module.
+    """
+
+    def __init__(self, name:str) -> None:
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"]   = Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = self.__dict__["_module"] = import_module(self.__name__)
+        return module
+
+    def __getattr__(self, name:str):
+        # only called for attributes the stand-in doesn't have itself, i.e the module's own attributes
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name:str, value) -> None:
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name:str) -> None:
+        delattr(self._load(), name)
+
+    def __dir__(self) -> list:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name:str) -> LazyModule:
+    """Returns a stand-in for the module `name` that imports it on first use, see `LazyModule`."""
+    return LazyModule(name)
@@ -0,0 +1,85 @@
+from django.conf import settings
+from socket import gethostname, gethostbyname
+from threading import Event, Lock, Thread
+from typing import Callable
+
+import logging
+import os
+
+
+logger = logging.getLogger('custom_logger')
+
+
+FALLBACK_IP_ADDRESS = "127.0.0.1"
+
+
+class LocalIPResolver:
+    """
+    Keeps the local IP address of the machine in memory and refreshes it in the background.
+
+    Resolving the local IP address is a DNS lookup (`gethostbyname(gethostname())`) which, with a
+    slow resolver, can take seconds. The address is therefore resolved once when the worker starts
+    (see `fruit_and_veg.wsgi`) and then re-resolved every `refresh_interval` seconds by a daemon
+    thread, so a request thread only ever reads the last known address and is never held up by the
+    resolver. A process that wasn't started that way (a forked worker, a management command) resolves
+    it on its first `get`, which waits for that one lookup so the first address saved or emailed is
+    never the fallback. Processes that never ask for it (migrations, tests) never resolve it at all.
+
+    If every resolution has failed `FALLBACK_IP_ADDRESS` is returned.
+
+    Example usage:
+        >>> resolver = LocalIPResolver(refresh_interval=300)
+        >>> resolver.get()
+        "192.168.0.12"
+    """
+
+    def __init__(self, refresh_interval:float = 300, resolve:Callable[[], str] = None) -> None:
+        self.refresh_interval = refresh_interval
+        self._resolve         = resolve or (lambda: gethostbyname(gethostname()))
+        self._ip_address      = None
+        self._pid             = None
+        self._stop            = Event()
+        self._lock            = Lock()
+
+    def start(self) -> None:
+        """Resolves the address and starts the background refresh for the current process."""
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            # resolved under the lock so concurrent first calls wait for this lookup instead of making their own
+            self.refresh()
+            self._pid  = os.getpid()
+            self._stop = Event()
+
+        Thread(target=self._refresh_periodically, args=(self._stop,), name="local-ip-resolver", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+        with self._lock:
+            self._pid = None
+
+    def get(self) -> str:
+        """Returns the last resolved local IP address, only waiting on the resolver if it hasn't been started."""
+
+        # started on first use, and again in a forked worker since threads don't survive a fork
+        if self._pid != os.getpid():
+            self.start()
+        return self._ip_address or FALLBACK_IP_ADDRESS
+
+    def refresh(self) -> None:
+        """Resolves the local IP address, keeping the last known address if the resolution fails."""
+
+        try:
+            self._ip_address = self._resolve()
+        except OSError as e:
+            logger.warning(f"The local IP address could not be resolved, using <{self._ip_address or FALLBACK_IP_ADDRESS}>: {e}")
+
+    def _refresh_periodically(self, stop:Event) -> None:
+        while not stop.wait(self.refresh_interval):
+            self.refresh()
+
+
+local_ip_resolver = LocalIPResolver(refresh_interval=getattr(settings, "LOCAL_IP_REFRESH_INTERVAL", 300))
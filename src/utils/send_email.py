@@ -1,14 +1,18 @@
 from types import NoneType
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 
 from typing import Optional
-from requests import RequestException
+
+from utils.lazy_import import lazy_import
 
 import logging
 
 logger = logging.getLogger("custom_logger")
 
+# only needed when a send fails, see `utils.lazy_import`
+requests = lazy_import("requests")
+
 def send_email(subject:str, 
                from_email:str, 
                to_email:str, 
@@ -30,17 +34,9 @@ def send_email(subject:str,
         None
     """
     
-    html_content = render_to_string(email_template, context)
-    
-    if text_template:
-        text_content = render_to_string(text_template, context)
-    else:
-        text_content = ''
+    msg = _build_email(subject, from_email, to_email, email_template, text_template, context)
 
     try:
-        msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email])
-        msg.attach_alternative(html_content, "text/html")
-        
         resp = msg.send()
         if resp:
             logger.info(f"Successful sent email to user with email: {to_email}")
@@ -48,7 +44,7 @@ def send_email(subject:str,
             logger.critical(f"Failed to sent email to user with email: {to_email}")
         return resp
     
-    except RequestException as e:
+    except requests.RequestException as e:
         logger.error(f"Network error while sending email to {to_email}: {str(e)}")
         return f"Network error: {str(e)}"
     
@@ -59,4 +55,80 @@ def send_email(subject:str,
     except NoneType as e:
         logger.error(f"Unspecified error received while sending email to {to_email}: {str(e)}")
         
-    return False
\ No newline at end of file
+    return False
+
+
+def send_email_batch(messages:list[dict]) -> list:
+    """
+    Send a batch of emails over a single SMTP connection.
+
+    Opening a connection (and negotiating TLS) costs more than sending a message, so the
+    connection is opened once for the whole batch instead of once per email.
+
+    Args:
+        messages (list[dict]): Each dictionary holds the arguments of `send_email` i.e `subject`, `from_email`,
+                               `to_email`, `email_template`, `text_template` and `context`.
+
+    Returns:
+        list: One result per message, in the same order, in the same format returned by `send_email`
+              (True/False or an error message) so each can be passed to `utils.hooks.process_email_result`.
+    """
+    results    = [None] * len(messages)
+    emails     = []
+    connection = get_connection()
+    
+    for index, message in enumerate(messages):
+        try:
+            emails.append((index, message["to_email"], _build_email(**message, connection=connection)))
+        except Exception as e:
+            logger.error(f"Failed to render the email for {message.get('to_email')}: {str(e)}")
+            results[index] = f"Failed to send email: {e}"
+    
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Failed to open a connection to send a batch of {len(emails)} emails: {str(e)}")
+        
+        for index, _, _ in emails:
+            results[index] = f"Failed to send email: {e}"
+        return results
+    
+    try:
+        for index, to_email, email in emails:
+            try:
+                resp = bool(connection.send_messages([email]))
+            except Exception as e:
+                logger.error(f"General error received while trying to sent an email to user with email: {to_email}")
+                results[index] = f"Failed to send email: {e}"
+                continue
+            
+            if resp:
+                logger.info(f"Successful sent email to user with email: {to_email}")
+            else:
+                logger.critical(f"Failed to sent email to user with email: {to_email}")
+            results[index] = resp
+    finally:
+        connection.close()
+    
+    return results
+
+
+def _build_email(subject:str, 
+                 from_email:str, 
+                 to_email:str, 
+                 email_template:str, 
+                 text_template:Optional[str]=None, 
+                 context:dict = None,
+                 connection=None) -> EmailMultiAlternatives:
+    """Render the templates and return the email, ready to be sent."""
+    
+    html_content = render_to_string(email_template, context)
+    
+    if text_template:
+        text_content = render_to_string(text_template, context)
+    else:
+        text_content = ''
+    
+    msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email], connection=connection)
+    msg.attach_alternative(html_content, "text/html")
+    return msg
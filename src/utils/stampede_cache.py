@@ -0,0 +1,237 @@
+from collections import namedtuple
+from functools import wraps
+from math import log
+from random import random
+from time import monotonic, sleep, time
+from typing import Callable, Optional, Union
+
+from django.core.cache import caches
+
+from utils.http_client import SingleFlight
+
+import hashlib
+import logging
+import uuid
+
+
+logger = logging.getLogger('custom_logger')
+
+
+# `delta` is how long (in seconds) the value took to compute and `expires_at` the (wall clock) time it
+# stops being fresh. The entry itself stays in the cache for a further `stale_timeout` seconds.
+_Entry = namedtuple("_Entry", ["value", "delta", "expires_at"])
+
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+# threads of the same worker missing on the same key share a single computation
+_flights = SingleFlight()
+
+
+def get_or_compute(key:str,
+                   compute:Callable[[], object],
+                   timeout:float,
+                   stale_timeout:float = 0,
+                   negative_timeout:float = None,
+                   beta:float = 1.0,
+                   lock_timeout:float = 10,
+                   version:int = None,
+                   cache_alias:str = "default",
+                   ):
+    """
+    Returns the value cached under `key`, calling `compute` to (re)create it when needed.
+
+    Unlike a plain `cache.get` followed by `cache.set`, a hot key expiring doesn't send every
+    worker to `compute` at once:
+
+        - A value is recomputed slightly *before* it expires, with a probability that grows as the
+          expiry gets closer and with how long the value took to compute (XFetch), so one request
+          usually refreshes it while everyone else is still served the cached value.
+        - Only the worker holding the key's lock (a `cache.add` with a `lock_timeout` expiry) recomputes.
+          Every other worker keeps serving the value it has, even once it has expired, as long as it
+          is less than `stale_timeout` seconds past its expiry (stale-while-revalidate).
+        - When nothing is cached at all, the workers that didn't get the lock wait for the one that did
+          (up to `lock_timeout` seconds) instead of computing the value themselves.
+        - A `None` result is cached for `negative_timeout` seconds, so a lookup that finds nothing isn't
+          repeated on every request. When `negative_timeout` is not set `None` isn't cached.
+
+    If `compute` raises while a stale value is available, the stale value is returned (and the
+    error logged), otherwise the exception is raised to the caller.
+
+    Args:
+        key (str): The cache key.
+        compute (callable): Called without arguments to create the value.
+        timeout (float): The number of seconds the value is fresh for.
+        stale_timeout (float): The number of seconds an expired value may still be served while it is being recomputed.
+        negative_timeout (float): The number of seconds a `None` result is cached for.
+        beta (float): How eagerly values are recomputed before they expire, 0 turns early recomputation off.
+        lock_timeout (float): The longest time a worker may hold the key's lock and the longest a worker waits on it.
+        version (int): The cache key version, bumping it makes every value stored with an older version unreachable.
+        cache_alias (str): The cache to use.
+
+    Example usage:
+        >>> get_or_compute(f"client_ip_geo_location_{ip}", lambda: lookup_geo_location(ip), timeout=3600, stale_timeout=600)
+    """
+    cache = caches[cache_alias]
+    entry = _get_entry(cache, key, version)
+
+    if entry is not None and not _should_recompute(entry, beta):
+        return entry.value
+
+    options = dict(timeout=timeout, stale_timeout=stale_timeout, negative_timeout=negative_timeout, lock_timeout=lock_timeout, version=version)
+
+    if entry is not None:
+        return _refresh(cache, key, compute, entry, **options)
+
+    return _flights.do(f"{cache_alias}:{version}:{key}", _compute_on_miss, cache, key, compute, **options)
+
+
+def invalidate(key:str, version:int = None, cache_alias:str = "default") -> None:
+    """Removes the value cached under `key`, the next `get_or_compute` call recomputes it."""
+    caches[cache_alias].delete(key, version=version)
+
+
+def cached(timeout:float, key:Union[str, Callable[..., str]] = None, **options) -> Callable:
+    """
+    Decorator version of `get_or_compute`, caching the function's result for each set of arguments.
+
+    `key` is either a format string filled in with the function's arguments, a callable that takes the
+    function's arguments and returns the key, or None to build the key from the function's name and
+    a hash of its arguments. The decorated function gets an `invalidate` method taking the same arguments.
+
+    Example usage:
+        >>> @cached(timeout=3600, key="product_rating_{0}", stale_timeout=300)
+        ... def get_product_rating(product_id):
+        ...     ...
+        >>> get_product_rating.invalidate(product_id)
+    """
+    def decorator(func:Callable) -> Callable:
+
+        def make_key(*args, **kwargs) -> str:
+            if key is None:
+                return _get_default_key(func, args, kwargs)
+            if isinstance(key, str):
+                return key.format(*args, **kwargs)
+            return key(*args, **kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_compute(make_key(*args, **kwargs), lambda: func(*args, **kwargs), timeout, **options)
+
+        def invalidate_for(*args, **kwargs) -> None:
+            invalidate(make_key(*args, **kwargs), version=options.get("version"), cache_alias=options.get("cache_alias", "default"))
+
+        wrapper.invalidate = invalidate_for
+        return wrapper
+
+    return decorator
+
+
+def _should_recompute(entry:_Entry, beta:float) -> bool:
+
+    # XFetch: recompute early when `now + delta * beta * -log(rand)` passes the expiry. `1 - random()`
+    # keeps the argument of the log in (0, 1], the further the expiry the less likely this is
+    return time() - entry.delta * beta * log(1 - random()) >= entry.expires_at
+
+
+def _refresh(cache, key:str, compute:Callable, entry:_Entry, lock_timeout:float, version:Optional[int], **options):
+    lock = _acquire_lock(cache, key, lock_timeout, version)
+
+    # another worker is already recomputing the value, serve the one we have in the meantime
+    if lock is None:
+        return entry.value
+
+    try:
+        return _compute_and_store(cache, key, compute, version=version, **options)
+    except Exception as e:
+        logger.error(f"Failed to recompute the cached value <{key}>, serving the stale value: {e}")
+        return entry.value
+    finally:
+        _release_lock(cache, key, lock, version)
+
+
+def _compute_on_miss(cache, key:str, compute:Callable, lock_timeout:float, version:Optional[int], **options):
+
+    # another thread of this worker may have just stored the value
+    entry = _get_entry(cache, key, version)
+    if entry is not None:
+        return entry.value
+
+    lock = _acquire_lock(cache, key, lock_timeout, version)
+
+    if lock is None:
+        entry = _wait_for_entry(cache, key, lock_timeout, version)
+        if entry is not None:
+            return entry.value
+
+        # the worker holding the lock failed, died or is taking too long, stop waiting on it
+        logger.warning(f"No value was stored for <{key}> by the worker holding its lock, computing it instead")
+        return _compute_and_store(cache, key, compute, version=version, **options)
+
+    try:
+        return _compute_and_store(cache, key, compute, version=version, **options)
+    finally:
+        _release_lock(cache, key, lock, version)
+
+
+def _compute_and_store(cache, key:str, compute:Callable, timeout:float, stale_timeout:float, negative_timeout:Optional[float], version:Optional[int]):
+    started_at = monotonic()
+    value      = compute()
+    delta      = monotonic() - started_at
+
+    if value is None:
+        if negative_timeout:
+            cache.set(key, _Entry(None, delta, time() + negative_timeout), timeout=negative_timeout, version=version)
+        return None
+
+    cache.set(key, _Entry(value, delta, time() + timeout), timeout=timeout + stale_timeout, version=version)
+    return value
+
+
+def _wait_for_entry(cache, key:str, lock_timeout:float, version:Optional[int]) -> Optional[_Entry]:
+    deadline = monotonic() + lock_timeout
+
+    while monotonic() < deadline:
+        sleep(LOCK_POLL_INTERVAL)
+
+        entry = _get_entry(cache, key, version)
+        if entry is not None:
+            return entry
+
+        # the lock was released without a value being stored, e.g the computation failed
+        if cache.get(_get_lock_key(key), version=version) is None:
+            return None
+    return None
+
+
+def _get_entry(cache, key:str, version:Optional[int]) -> Optional[_Entry]:
+    entry = cache.get(key, version=version)
+
+    # a value cached under the same key before it was managed by `get_or_compute` is treated as a miss
+    return entry if isinstance(entry, _Entry) else None
+
+
+def _acquire_lock(cache, key:str, lock_timeout:float, version:Optional[int]) -> Optional[str]:
+    token = uuid.uuid4().hex
+
+    if cache.add(_get_lock_key(key), token, timeout=lock_timeout, version=version):
+        return token
+    return None
+
+
+def _release_lock(cache, key:str, token:str, version:Optional[int]) -> None:
+    lock_key = _get_lock_key(key)
+
+    # the lock may have expired and been taken by another worker, only delete our own
+    if cache.get(lock_key, version=version) == token:
+        cache.delete(lock_key, version=version)
+
+
+def _get_lock_key(key:str) -> str:
+    return f"{key}_lock"
+
+
+def _get_default_key(func:Callable, args:tuple, kwargs:dict) -> str:
+    arguments = hashlib.blake2b(repr((args, sorted(kwargs.items()))).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}_{arguments}"
@@ -0,0 +1,176 @@
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from random import random
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+
+
+# The attributes every `LogRecord` has, anything else on a record was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "sample_rate"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats each record as a single line of JSON so the log file can be searched and aggregated.
+
+    Besides the timestamp, level, logger, module, line and message, any field passed with `extra=`
+    is included as is (or as its `str()` if it can't be serialised).
+
+    Example output:
+        {"timestamp": "2026-10-18T10:34:30.120000+00:00", "level": "WARNING", "logger": "custom_logger",
+         "module": "views", "line": 67, "message": "Failed login attempt", "username": "egbie"}
+    """
+
+    def format(self, record:logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records from noisy loggers.
+
+    `rates` maps a logger name to the fraction of its records (and its children's) that are kept, the most
+    specific name wins. Records above `max_level` are always kept so warnings and errors are never lost.
+    A single call can also choose its own rate with `extra={"sample_rate": 0.01}`.
+
+    Example usage:
+        >>> SamplingFilter(rates={"custom_logger.geo_location": 0.1})
+    """
+
+    def __init__(self, rates:dict = None, max_level:str = "INFO") -> None:
+        super().__init__()
+        self.rates     = rates or {}
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+
+    def filter(self, record:logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        rate = getattr(record, "sample_rate", None)
+
+        if rate is None:
+            rate = self._get_rate(record.name)
+        return rate >= 1 or random() < rate
+
+    def _get_rate(self, name:str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread instead of writing them on the thread that logged them.
+
+    The handler puts each record on a bounded queue and its own `QueueListener` thread passes them to
+    the real handlers, so a slow disk never holds up a request. If the queue is full the record is
+    dropped (and counted in `dropped`) rather than wait.
+
+    The listener is built by the handler itself rather than by `dictConfig` (which only learnt to build
+    one in Python 3.12), so configure it with `()` and refer to the real handlers with `cfg://`. They are
+    looked up when the first record is logged, by which point every handler has been configured.
+
+    The listener is started on the first record, replaced in a forked worker (threads don't survive a fork)
+    and stopped at exit after the queue has been drained.
+
+    Example settings:
+        "queue": {
+            "()": "utils.structured_logging.NonBlockingQueueHandler",
+            "handlers": ["cfg://handlers.console", "cfg://handlers.file"],
+            "maxsize": 10000,
+            "respect_handler_level": True,
+        }
+    """
+
+    def __init__(self, handlers:list, maxsize:int = 10000, respect_handler_level:bool = False) -> None:
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped               = 0
+        self.listener              = None
+        self.target_handlers       = handlers
+        self.respect_handler_level = respect_handler_level
+        self._pid                  = None
+        self._is_listening         = False
+
+    def emit(self, record:logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def enqueue(self, record:logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        # merges the arguments into the message and the traceback into `exc_text` (the traceback itself may hold
+        # on to large objects), but unlike `QueueHandler.prepare` keeps them apart so they can be formatted as JSON
+        record = copy.copy(record)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+
+        record.message  = record.getMessage()
+        record.msg      = record.message
+        record.args     = None
+        record.exc_info = None
+        return record
+
+    def _start_listener(self) -> None:
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+
+            if self._pid is not None:
+                # a forked worker, the parent's queue (and anything on it) and its listener belong to the parent
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            else:
+                atexit.register(self._stop_listener)
+
+            self.listener = QueueListener(self.queue, *self._get_target_handlers(), respect_handler_level=self.respect_handler_level)
+            self.listener.start()
+
+            self._pid          = os.getpid()
+            self._is_listening = True
+
+    def _stop_listener(self) -> None:
+        with self.lock:
+            if self._pid != os.getpid() or not self._is_listening:
+                return
+            self._is_listening = False
+
+        self.listener.stop()
+
+    def _get_target_handlers(self) -> list:
+        # indexing (unlike iterating) resolves the `cfg://` references, each to the handler `dictConfig` has configured by now
+        handlers = [self.target_handlers[index] for index in range(len(self.target_handlers))]
+
+        for handler in handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(f"The queue handler needs handlers to write to, not {handler!r}")
+        return handlers
@@ -1,13 +1,10 @@
 from django.conf import settings
 from django.utils import timezone
-from django_q.tasks import async_task
 
+from utils.email_dispatcher import queue_email
 from utils.utils import get_local_ip_address
-from utils.send_email import send_email
 
 
-from utils.hooks import process_email_result
-
 def send_registration_email(subject, from_email, user, verification_url):
     """
     Sends a registration email to a new user with a verification link.
@@ -269,7 +266,8 @@ def _send_email_helper(email_template_html, email_template_text, context={}, **k
         - verification_url (str): The verification URL to be included in the email.
 
     Returns:
-        - bool: True if the email was sent successfully, False otherwise.
+        - int: The id of the queued email, it is sent by a django-q worker in a batch with the
+               other emails waiting to be sent, see `utils.email_dispatcher.queue_email`.
     """
     
     if not isinstance(context, dict):
@@ -285,16 +283,11 @@ def _send_email_helper(email_template_html, email_template_text, context={}, **k
                 "unsubscriber": kwargs.get("unsubscriber"),
             }
     
-    task_id = async_task(
-        send_email,  
-        kwargs["subject"], 
-        kwargs["from_email"], 
-        kwargs["to_email"], 
-        email_template_html,  
-        email_template_text,  
-        context,
-        hook=process_email_result,
-    )
-
-    return task_id 
-
+    return queue_email({
+        "subject": kwargs["subject"],
+        "from_email": kwargs["from_email"],
+        "to_email": kwargs["to_email"],
+        "email_template": email_template_html,
+        "text_template": email_template_text,
+        "context": context,
+    })
@@ -0,0 +1,175 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch
+
+from utils.cache_backends import TwoTierCache
+
+
+SHARED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "two-tier-default"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "two-tier-shared"},
+}
+
+
+def create_two_tier_cache(**options) -> TwoTierCache:
+    return TwoTierCache(None, {"TIMEOUT": 300, "OPTIONS": {"SHARED_CACHE": "shared", "VERSION_CHECK_INTERVAL": 0, **options}})
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TwoTierCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def test_value_is_served_from_memory_after_it_is_set(self):
+        """Test that a value that was just set is read back without touching the shared cache"""
+
+        cache = create_two_tier_cache(VERSION_CHECK_INTERVAL=60)
+        cache.set("fruit", "apple")
+
+        with patch.object(caches["shared"], "get", wraps=caches["shared"].get) as shared_get:
+            self.assertEqual(cache.get("fruit"), "apple")
+
+        shared_get.assert_not_called()
+
+    def test_value_is_read_from_the_shared_cache_on_a_local_miss(self):
+        """Test that a value missing from memory is read from the shared cache and then kept in memory"""
+
+        cache = create_two_tier_cache(VERSION_CHECK_INTERVAL=60)
+        cache.set("fruit", "apple")
+        cache.clear_local()
+
+        with patch.object(caches["shared"], "get", wraps=caches["shared"].get) as shared_get:
+            self.assertEqual(cache.get("fruit"), "apple")
+            self.assertEqual(cache.get("fruit"), "apple")
+            self.assertEqual(cache.get("vegetable", "none"), "none")
+
+        self.assertEqual(shared_get.call_count, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the local tier never grows past its maximum size"""
+
+        cache = create_two_tier_cache(LOCAL_MAX_ENTRIES=2, VERSION_CHECK_INTERVAL=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(list(cache._local), [cache.make_key("a"), cache.make_key("c")])
+
+        # the evicted entry is still in the shared cache
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_local_entry_expires_after_the_local_timeout(self):
+        """Test that an entry is only served from memory for `LOCAL_TIMEOUT` seconds"""
+
+        cache = create_two_tier_cache(LOCAL_TIMEOUT=10, VERSION_CHECK_INTERVAL=10 ** 10)
+        cache.set("fruit", "apple")
+
+        with patch("utils.cache_backends.monotonic", return_value=10 ** 9):
+            with patch.object(caches["shared"], "get", wraps=caches["shared"].get) as shared_get:
+                self.assertEqual(cache.get("fruit"), "apple")
+
+        shared_get.assert_called_once()
+
+    def test_write_from_another_worker_invalidates_the_local_tier(self):
+        """Test that a worker drops its local copies once another worker writes to the shared cache"""
+
+        worker, other_worker = create_two_tier_cache(), create_two_tier_cache()
+
+        worker.set("fruit", "apple")
+        self.assertEqual(worker.get("fruit"), "apple")
+
+        other_worker.set("fruit", "pear")
+
+        self.assertEqual(worker.get("fruit"), "pear")
+
+    def test_write_to_another_key_keeps_the_local_tier(self):
+        """Test that a write only invalidates the key it wrote in the other workers' memory"""
+
+        worker, other_worker = create_two_tier_cache(), create_two_tier_cache()
+
+        worker.set("fruit", "apple")
+        local_entry = worker._local[worker.make_key("fruit")]
+
+        other_worker.set("vegetable", "carrot")
+
+        self.assertEqual(worker.get("fruit"), "apple")
+        self.assertIs(worker._local[worker.make_key("fruit")], local_entry)
+
+    def test_token_is_written_with_the_value(self):
+        """Test that a write is a single shared `set` of the token and the value, never a shared counter"""
+
+        cache = create_two_tier_cache()
+
+        with patch.object(caches["shared"], "incr") as shared_incr:
+            with patch.object(caches["shared"], "set", wraps=caches["shared"].set) as shared_set:
+                cache.set("fruit", "apple")
+                cache.add("vegetable", "carrot")
+                cache.delete("fruit")
+
+        shared_incr.assert_not_called()
+        shared_set.assert_called_once()
+
+        token, value = caches["shared"].get("vegetable")
+        self.assertEqual((len(token), value), (32, "carrot"))
+
+    def test_culled_entry_is_not_served_from_memory(self):
+        """Test that an entry culled from the shared cache, or replaced there without a token, is read as a miss"""
+
+        worker, other_worker = create_two_tier_cache(), create_two_tier_cache()
+
+        worker.set("fruit", "apple")
+        worker.set("vegetable", "carrot")
+        self.assertEqual(other_worker.get("fruit"), "apple")
+        self.assertEqual(other_worker.get("vegetable"), "carrot")
+
+        caches["shared"].delete("fruit")
+        caches["shared"].set("vegetable", "leek")
+
+        self.assertIsNone(other_worker.get("fruit"))
+        self.assertIsNone(other_worker.get("vegetable"))
+
+    def test_delete_is_seen_by_another_worker(self):
+        """Test that a key deleted by one worker is no longer served from another worker's memory"""
+
+        worker, other_worker = create_two_tier_cache(), create_two_tier_cache()
+
+        worker.set("fruit", "apple")
+        self.assertEqual(other_worker.get("fruit"), "apple")
+
+        worker.delete("fruit")
+
+        self.assertIsNone(other_worker.get("fruit"))
+
+    def test_version_is_only_checked_every_interval(self):
+        """Test that the shared version isn't read on every lookup"""
+
+        cache = create_two_tier_cache(VERSION_CHECK_INTERVAL=60)
+        cache.set("fruit", "apple")
+        cache.get("fruit")
+
+        with patch.object(caches["shared"], "get", wraps=caches["shared"].get) as shared_get:
+            cache.get("fruit")
+
+        shared_get.assert_not_called()
+
+    def test_mutable_values_are_copied(self):
+        """Test that changing a returned value doesn't change the cached value"""
+
+        cache = create_two_tier_cache()
+        cache.set("basket", ["apple"])
+
+        cache.get("basket").append("pear")
+
+        self.assertEqual(cache.get("basket"), ["apple"])
+
+    def test_incr_and_add_go_through_the_shared_cache(self):
+        """Test that counters and `add` behave like any other cache backend"""
+
+        cache = create_two_tier_cache()
+
+        self.assertTrue(cache.add("counter", 1))
+        self.assertFalse(cache.add("counter", 5))
+        self.assertEqual(cache.incr("counter"), 2)
+        self.assertEqual(cache.get("counter"), 2)
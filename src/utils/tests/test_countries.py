@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from utils.countries import COUNTRIES_CHOICES, get_country_name, is_valid_country_code
+from utils.country_parser import parse_country_file
+
+
+class CountryRegistryTest(SimpleTestCase):
+
+    def test_compiled_countries_match_the_country_file(self):
+        """Test that utils/country_data.py is up to date, run `python manage.py build_country_registry` if not"""
+
+        self.assertEqual(COUNTRIES_CHOICES, tuple(parse_country_file("data/countries.txt")))
+
+    def test_choices_are_immutable(self):
+        """Test that the shared choices can't be modified by one of the models or forms using them"""
+
+        self.assertIsInstance(COUNTRIES_CHOICES, tuple)
+
+    def test_country_name_is_found_by_code(self):
+        """Test that a country's name is looked up by its code"""
+
+        code, name = COUNTRIES_CHOICES[0]
+
+        self.assertEqual(get_country_name(code), name)
+        self.assertTrue(is_valid_country_code(code))
+        self.assertIsNone(get_country_name("(XX)"))
+        self.assertFalse(is_valid_country_code("(XX)"))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from django.test import TestCase
+
+from utils.distance_calculator import (calculate_distance, 
+                                       is_travel_impossible, 
+                                       HAVERSINE, 
+                                       VINCENTY, 
+                                       GEODESIC,
+                                       )
+
+
+NEW_YORK    = (40.7128, -74.0060)
+LONDON      = (51.5074, -0.1278)
+LOS_ANGELES = (34.0522, -118.2437)
+
+
+class DistanceModesTest(TestCase):
+
+    def test_modes_are_within_their_error_bounds(self):
+        """Test that haversine is within 0.5% and vincenty within a millimetre of the geodesic distance"""
+
+        for start, end in [(NEW_YORK, LONDON), (NEW_YORK, LOS_ANGELES), (LONDON, LOS_ANGELES)]:
+            geodesic_km = calculate_distance(*start, *end, mode=GEODESIC)
+
+            self.assertAlmostEqual(calculate_distance(*start, *end, mode=HAVERSINE), geodesic_km, delta=geodesic_km * 0.005)
+            self.assertAlmostEqual(calculate_distance(*start, *end, mode=VINCENTY), geodesic_km, delta=0.000001)
+
+    def test_nearly_antipodal_points_fall_back_to_geodesic(self):
+        """Test that vincenty still returns a distance when its iteration cannot converge"""
+
+        self.assertAlmostEqual(calculate_distance(0, 0, 0.5, 179.7, mode=VINCENTY), 
+                               calculate_distance(0, 0, 0.5, 179.7, mode=GEODESIC))
+
+    def test_distance_in_miles(self):
+        """Test that every mode converts to miles"""
+
+        for mode in [HAVERSINE, VINCENTY, GEODESIC]:
+            kilometers = calculate_distance(*NEW_YORK, *LONDON, mode=mode)
+            miles      = calculate_distance(*NEW_YORK, *LONDON, in_kilometers=False, mode=mode)
+            self.assertAlmostEqual(miles, kilometers * 0.621371192)
+
+    def test_unknown_mode_is_rejected(self):
+        """Test that an unknown mode raises a ValueError"""
+
+        with self.assertRaises(ValueError):
+            calculate_distance(*NEW_YORK, *LONDON, mode="flat-earth")
+
+
+class ImpossibleTravelEscalationTest(TestCase):
+
+    def _coordinates(self, location, timestamp):
+        return {"latitude": location[0], "longitude": location[1], "timestamp": timestamp}
+
+    def test_borderline_speed_is_escalated_to_geodesic(self):
+        """
+        Test that a journey that haversine would allow, but is actually just faster than the maximum
+        speed, is caught by escalating to the geodesic distance.
+        """
+        geodesic_km = calculate_distance(*NEW_YORK, *LONDON, mode=GEODESIC)
+        departure   = datetime(2025, 1, 18, 12, 0)
+        arrival     = departure + timedelta(hours=geodesic_km / 901)   # 901 km/h over the geodesic distance
+
+        last_coordinates    = self._coordinates(NEW_YORK, departure)
+        current_coordinates = self._coordinates(LONDON, arrival)
+
+        # haversine on its own under-estimates the distance enough to call the journey possible
+        self.assertFalse(is_travel_impossible(last_coordinates, current_coordinates, 900, escalation_margin=0))
+        self.assertTrue(is_travel_impossible(last_coordinates, current_coordinates, 900))
+
+    def test_clear_cut_journeys_are_decided_by_the_fast_mode(self):
+        """Test that journeys far from the maximum speed give the same answer in every mode"""
+
+        departure = datetime(2025, 1, 18, 12, 0)
+
+        for hours, expected in [(1, True), (12, False)]:
+            last_coordinates    = self._coordinates(NEW_YORK, departure)
+            current_coordinates = self._coordinates(LONDON, departure + timedelta(hours=hours))
+
+            for mode in [HAVERSINE, VINCENTY, GEODESIC]:
+                self.assertEqual(is_travel_impossible(last_coordinates, current_coordinates, 900, mode=mode), expected)
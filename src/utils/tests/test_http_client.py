@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from threading import Barrier, Event, Thread
+from unittest.mock import patch, MagicMock
+
+from authentication.views_helper import get_cached_geo_location_or_from_ip
+from utils.custom_errors import CircuitBreakerOpenError
+from utils.http_client import CircuitBreaker, HTTPClient, SingleFlight
+
+import requests
+
+
+class CircuitBreakerTest(TestCase):
+
+    def test_breaker_opens_after_the_failure_threshold(self):
+        """Test that the breaker rejects calls once the number of consecutive failures reaches the threshold"""
+
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        for _ in range(2):
+            breaker.record_failure()
+            self.assertTrue(breaker.allow_request())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_success_resets_the_failure_count(self):
+        """Test that failures must be consecutive for the breaker to open"""
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_breaker_allows_a_single_trial_call(self):
+        """Test that only one trial call is allowed after the reset timeout and a success closes the breaker"""
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class HTTPClientTest(TestCase):
+
+    def test_requests_are_sent_with_connect_and_read_timeouts(self):
+        """Test that every request is bounded by the client timeouts"""
+
+        client = HTTPClient("test", connect_timeout=1, read_timeout=2)
+
+        with patch.object(client.session, "get", return_value=MagicMock(status_code=200)) as session_get:
+            client.get("https://example.com")
+
+        session_get.assert_called_once_with("https://example.com", timeout=(1, 2))
+
+    def test_client_fails_fast_when_the_provider_is_unhealthy(self):
+        """Test that the provider is no longer called once the breaker is open"""
+
+        client = HTTPClient("test", failure_threshold=2, reset_timeout=60)
+
+        with patch.object(client.session, "get", side_effect=requests.exceptions.ConnectTimeout) as session_get:
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.ConnectTimeout):
+                    client.get("https://example.com")
+
+            with self.assertRaises(CircuitBreakerOpenError):
+                client.get("https://example.com")
+
+        self.assertEqual(session_get.call_count, 2)
+
+    def test_unexpected_error_in_a_trial_call_releases_the_trial(self):
+        """Test that an error that isn't a `RequestException` doesn't leave the breaker stuck open"""
+
+        client = HTTPClient("test", failure_threshold=1, reset_timeout=0)
+        client.breaker.record_failure()
+
+        with patch.object(client.session, "get", side_effect=ValueError("bad url")):
+            with self.assertRaises(ValueError):
+                client.get("https://example.com")
+
+        with patch.object(client.session, "get", return_value=MagicMock(status_code=200)):
+            client.get("https://example.com")
+
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+
+class SingleFlightTest(TestCase):
+
+    def test_concurrent_calls_for_the_same_key_are_coalesced(self):
+        """Test that callers arriving while a call is in flight share its result"""
+
+        THREADS = 5
+        flights = SingleFlight()
+        barrier = Barrier(THREADS)
+        calls   = []
+        results = []
+
+        def slow_call():
+            calls.append(1)
+            # keep the call in flight long enough for the other threads to join it
+            Event().wait(0.2)
+            return "result"
+
+        def caller():
+            barrier.wait()
+            results.append(flights.do("key", slow_call))
+
+        threads = [Thread(target=caller) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * THREADS)
+
+    def test_key_is_released_once_the_call_finishes(self):
+        """Test that a later call for the same key runs the function again"""
+
+        flights = SingleFlight()
+
+        self.assertEqual(flights.do("key", lambda: 1), 1)
+        self.assertEqual(flights.do("key", lambda: 2), 2)
+
+    def test_exception_is_raised_to_the_caller(self):
+        """Test that an exception raised by the call reaches the caller and releases the key"""
+
+        flights = SingleFlight()
+
+        def failing_call():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            flights.do("key", failing_call)
+
+        self.assertEqual(flights._flights, {})
+
+
+class CoalescedGeoLocationTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    @override_settings(GEOIP_DATABASE_PATH="missing-geoip-table.bin", GEOIP_REMOTE_FALLBACK=True)
+    def test_concurrent_logins_from_the_same_ip_make_one_upstream_call(self):
+        """Test that N concurrent lookups for an uncached ip only call the ipinfo.io API once"""
+
+        THREADS = 4
+        barrier = Barrier(THREADS)
+        results = []
+
+        def fake_remote_lookup(ip_address):
+            # keep the call in flight long enough for the other threads to join it
+            Event().wait(0.2)
+            return {"ip": ip_address, "loc": "51.5142,-0.0931"}
+
+        def login():
+            barrier.wait()
+            results.append(get_cached_geo_location_or_from_ip("81.2.69.160"))
+
+        with patch("authentication.views_helper._get_location_from_ip", side_effect=fake_remote_lookup) as remote_lookup:
+            threads = [Thread(target=login) for _ in range(THREADS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(remote_lookup.call_count, 1)
+        self.assertEqual(len(results), THREADS)
+        self.assertTrue(all(result["ip"] == "81.2.69.160" for result in results))
@@ -0,0 +1,147 @@
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from io import BytesIO
+from PIL import Image
+
+from utils.custom_errors import InvalidImageError
+from utils.image_header import ImageHeader, check_image, read_image_header, validate_product_image, verify_image
+from utils.utils import get_image_extenstion
+
+
+def create_image_bytes(image_format, size=(120, 80), mode="RGB", **options):
+    buffer = BytesIO()
+    Image.new(mode, size, "green").save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+class CountingBytesIO(BytesIO):
+    """Counts the bytes read, to check only the header is."""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class ReadImageHeaderTest(SimpleTestCase):
+
+    def test_formats_and_sizes_match_pillow(self):
+        """Test that the format and size are read for each JPEG, PNG and WebP variant"""
+
+        exif = Image.Exif()
+        exif[0x010F] = "Phone maker"
+
+        images = {
+            "baseline jpeg": (create_image_bytes("JPEG", exif=exif), "jpeg"),
+            "progressive jpeg": (create_image_bytes("JPEG", progressive=True), "jpeg"),
+            "png": (create_image_bytes("PNG"), "png"),
+            "lossy webp": (create_image_bytes("WEBP"), "webp"),
+            "lossless webp": (create_image_bytes("WEBP", lossless=True), "webp"),
+            "extended webp": (create_image_bytes("WEBP", mode="RGBA"), "webp"),
+        }
+
+        for name, (image_bytes, image_format) in images.items():
+            with self.subTest(name):
+                self.assertEqual(read_image_header(BytesIO(image_bytes)), ImageHeader(image_format, 120, 80))
+
+    def test_only_the_header_is_read(self):
+        """Test that a large image costs no more to read than its header"""
+
+        image = CountingBytesIO(create_image_bytes("PNG", size=(3000, 3000)))
+
+        read_image_header(image)
+
+        self.assertLessEqual(image.bytes_read, 32)
+
+    def test_file_position_is_restored(self):
+        """Test that the file can still be read from where it was after its header is read"""
+
+        image = BytesIO(create_image_bytes("JPEG"))
+        image.seek(10)
+
+        read_image_header(image)
+
+        self.assertEqual(image.tell(), 10)
+
+    def test_files_that_arent_images_are_rejected(self):
+        """Test that text, GIFs and truncated images raise an error"""
+
+        jpeg = create_image_bytes("JPEG")
+
+        for name, content in {"text": b"not an image", "gif": create_image_bytes("GIF"), "truncated jpeg": jpeg[:20], "empty": b""}.items():
+            with self.subTest(name), self.assertRaises(InvalidImageError):
+                read_image_header(BytesIO(content))
+
+    def test_get_image_extenstion(self):
+        """Test that the extension comes from the header and is empty when the file isn't an image"""
+
+        self.assertEqual(get_image_extenstion(BytesIO(create_image_bytes("WEBP"))), "webp")
+        self.assertEqual(get_image_extenstion(BytesIO(b"not an image")), "")
+        self.assertEqual(get_image_extenstion("/does/not/exist.png"), "")
+
+
+class CheckImageTest(SimpleTestCase):
+
+    def test_format_must_be_allowed(self):
+        """Test that a format left out of the allowlist is rejected"""
+
+        with self.assertRaisesRegex(InvalidImageError, "WEBP images aren't accepted"):
+            check_image(BytesIO(create_image_bytes("WEBP")), allowed_formats=["jpeg", "png"])
+
+        self.assertEqual(check_image(BytesIO(create_image_bytes("PNG")), allowed_formats=["JPEG", "PNG"]).format, "png")
+
+    def test_oversized_images_are_rejected(self):
+        """Test that the width, height and pixel limits are enforced"""
+
+        image_bytes = create_image_bytes("PNG", size=(400, 300))
+
+        with self.assertRaises(InvalidImageError):
+            check_image(BytesIO(image_bytes), max_width=399)
+
+        with self.assertRaises(InvalidImageError):
+            check_image(BytesIO(image_bytes), max_height=299)
+
+        with self.assertRaises(InvalidImageError):
+            check_image(BytesIO(image_bytes), max_pixels=400 * 300 - 1)
+
+        self.assertEqual(check_image(BytesIO(image_bytes), max_width=400, max_height=300, max_pixels=400 * 300), ImageHeader("png", 400, 300))
+
+    @override_settings(PRODUCT_IMAGE_UPLOAD_FILE_TYPES=["jpeg", "png"], PRODUCT_IMAGE_MAX_DIMENSION=200, PRODUCT_IMAGE_MAX_PIXELS=None)
+    def test_product_image_validator(self):
+        """Test that the validator raises a form `ValidationError` from the settings"""
+
+        validate_product_image(SimpleUploadedFile("apple.png", create_image_bytes("PNG")))
+
+        for name, content in {"apple.webp": create_image_bytes("WEBP"), "apple.jpg": create_image_bytes("JPEG", size=(201, 10))}.items():
+            with self.subTest(name), self.assertRaises(ValidationError):
+                validate_product_image(SimpleUploadedFile(name, content))
+
+    @override_settings(PRODUCT_IMAGE_UPLOAD_FILE_TYPES=["jpeg", "png"], PRODUCT_IMAGE_MAX_DIMENSION=200, PRODUCT_IMAGE_MAX_PIXELS=None)
+    def test_valid_header_followed_by_junk_is_rejected(self):
+        """Test that the validator still verifies the image with Pillow once the header is accepted"""
+
+        png = create_image_bytes("PNG")
+
+        with self.assertRaises(ValidationError):
+            validate_product_image(SimpleUploadedFile("apple.png", png[:33] + b"junk" * 50))
+
+
+class VerifyImageTest(SimpleTestCase):
+
+    def test_complete_image_is_accepted(self):
+        image = BytesIO(create_image_bytes("PNG"))
+        image.seek(5)
+
+        verify_image(image, "png")
+
+        self.assertEqual(image.tell(), 5)
+
+    def test_image_pillow_reads_as_another_format_is_rejected(self):
+        """Test that a header can't claim a format the rest of the file doesn't match"""
+
+        with self.assertRaises(InvalidImageError):
+            verify_image(BytesIO(create_image_bytes("PNG")), "jpeg")
+
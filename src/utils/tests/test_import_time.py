@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase
+
+from utils.import_time import build_import_budget, check_import_budget, get_package_import_time_ms, parse_import_times
+
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     django.utils.version
+import time:      5000 |       5300 |   django
+import time:      2000 |       2000 |     geopy.point
+import time:     40000 |      42000 |   geopy.distance
+some unrelated output
+"""
+
+
+class ImportTimeTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.times = parse_import_times(IMPORT_TIME_OUTPUT)
+
+    def test_report_is_parsed(self):
+        """Test that every module in the `-X importtime` report is parsed and the header is skipped"""
+
+        self.assertEqual(set(self.times), {"django.utils.version", "django", "geopy.point", "geopy.distance"})
+        self.assertEqual(self.times["geopy.distance"].self_us, 40000)
+        self.assertEqual(self.times["geopy.distance"].cumulative_us, 42000)
+
+    def test_package_time_includes_its_submodules(self):
+        """Test that a package is charged for all of its modules and a missing package for nothing"""
+
+        self.assertEqual(get_package_import_time_ms(self.times, "geopy"), 42)
+        self.assertEqual(get_package_import_time_ms(self.times, "django"), 5.3)
+        self.assertIsNone(get_package_import_time_ms(self.times, "requests"))
+
+    def test_modules_that_should_be_lazy_are_reported(self):
+        """Test that a module with a budget of 0 fails the check as soon as it is imported at start up"""
+
+        overruns = check_import_budget(self.times, {"modules": {"geopy": 0, "requests": 0}})
+
+        self.assertEqual(len(overruns), 1)
+        self.assertIn("<geopy> is imported at start up", overruns[0])
+
+    def test_regressions_are_reported(self):
+        """Test that the total and the per module budgets are checked"""
+
+        self.assertEqual(check_import_budget(self.times, {"total_ms": 100, "modules": {"django": 10}}), [])
+        self.assertEqual(len(check_import_budget(self.times, {"total_ms": 40, "modules": {"django": 5}})), 2)
+
+    def test_budget_is_built_from_the_measured_times(self):
+        """Test that the built budget allows the measured times plus headroom"""
+
+        budget = build_import_budget(self.times, ["geopy", "requests"], headroom=0.5)
+
+        self.assertEqual(budget, {"total_ms": 71, "modules": {"geopy": 63, "requests": 0}})
+        self.assertEqual(check_import_budget(self.times, budget), [])
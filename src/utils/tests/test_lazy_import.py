@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from utils.lazy_import import lazy_import
+
+import sys
+
+
+class LazyImportTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        sys.modules.pop("colorsys", None)
+
+    def test_module_is_not_imported_until_it_is_used(self):
+        """Test that creating the stand-in doesn't import the module"""
+
+        colorsys = lazy_import("colorsys")
+
+        self.assertFalse(colorsys.is_loaded)
+        self.assertNotIn("colorsys", sys.modules)
+
+    def test_module_is_imported_on_first_attribute_access(self):
+        """Test that the module's attributes are available through the stand-in"""
+
+        colorsys = lazy_import("colorsys")
+
+        self.assertEqual(colorsys.rgb_to_hsv(1, 0, 0), (0, 1, 1))
+        self.assertTrue(colorsys.is_loaded)
+        self.assertIn("colorsys", sys.modules)
+
+    def test_missing_module_is_only_reported_when_used(self):
+        """Test that a module that isn't installed only raises once the feature using it is used"""
+
+        missing = lazy_import("a_module_that_does_not_exist")
+
+        with self.assertRaises(ModuleNotFoundError):
+            missing.anything
@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase
+from time import monotonic, sleep
+
+from utils.local_ip import FALLBACK_IP_ADDRESS, LocalIPResolver
+
+
+class LocalIPResolverTest(SimpleTestCase):
+
+    def test_address_is_resolved_once_at_start(self):
+        """Test that reading the address doesn't trigger another resolution"""
+
+        calls    = []
+        resolver = LocalIPResolver(refresh_interval=60, resolve=lambda: calls.append(1) or "192.168.0.12")
+        resolver.start()
+        self.addCleanup(resolver.stop)
+
+        for _ in range(10):
+            self.assertEqual(resolver.get(), "192.168.0.12")
+        self.assertEqual(len(calls), 1)
+
+    def test_first_get_waits_for_the_address(self):
+        """Test that the first read resolves the address instead of returning the fallback"""
+
+        resolver = LocalIPResolver(refresh_interval=60, resolve=lambda: sleep(0.05) or "10.0.0.5")
+        self.addCleanup(resolver.stop)
+
+        self.assertEqual(resolver.get(), "10.0.0.5")
+
+    def test_fallback_is_returned_when_the_first_resolution_fails(self):
+
+        def resolve():
+            raise OSError("Name or service not known")
+
+        resolver = LocalIPResolver(refresh_interval=60, resolve=resolve)
+        self.addCleanup(resolver.stop)
+
+        self.assertEqual(resolver.get(), FALLBACK_IP_ADDRESS)
+
+    def test_address_is_refreshed_in_the_background(self):
+        addresses = iter(["10.0.0.1"])
+        resolver  = LocalIPResolver(refresh_interval=0.01, resolve=lambda: next(addresses, "10.0.0.2"))
+        resolver.start()
+        self.addCleanup(resolver.stop)
+
+        deadline = monotonic() + 2
+        while resolver.get() != "10.0.0.2" and monotonic() < deadline:
+            sleep(0.01)
+
+        self.assertEqual(resolver.get(), "10.0.0.2")
+
+    def test_last_known_address_is_kept_when_the_resolution_fails(self):
+
+        def resolve():
+            raise OSError("Name or service not known")
+
+        resolver = LocalIPResolver(refresh_interval=60, resolve=lambda: "192.168.0.12")
+        resolver.start()
+        self.addCleanup(resolver.stop)
+
+        resolver._resolve = resolve
+        resolver.refresh()
+
+        self.assertEqual(resolver.get(), "192.168.0.12")
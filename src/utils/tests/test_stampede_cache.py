@@ -0,0 +1,178 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from threading import Barrier, Event, Thread
+from unittest.mock import MagicMock, patch
+
+from utils.stampede_cache import cached, get_or_compute, invalidate
+
+
+class GetOrComputeTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_value_is_only_computed_once_while_fresh(self):
+        """Test that a cached value is returned without calling `compute` again"""
+
+        compute = MagicMock(return_value="apple")
+
+        self.assertEqual(get_or_compute("fruit", compute, timeout=60, beta=0), "apple")
+        self.assertEqual(get_or_compute("fruit", compute, timeout=60, beta=0), "apple")
+
+        compute.assert_called_once()
+
+    def test_concurrent_misses_compute_the_value_once(self):
+        """Test that N concurrent callers missing on the same key only compute the value once"""
+
+        THREADS = 4
+        barrier = Barrier(THREADS)
+        results = []
+
+        def slow_compute():
+            Event().wait(0.2)
+            return "apple"
+
+        compute = MagicMock(side_effect=slow_compute)
+
+        def lookup():
+            barrier.wait()
+            results.append(get_or_compute("fruit", compute, timeout=60))
+
+        threads = [Thread(target=lookup) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(results, ["apple"] * THREADS)
+
+    def test_stale_value_is_served_while_another_worker_recomputes(self):
+        """Test that an expired value is served, without recomputing, while the key's lock is held"""
+
+        get_or_compute("fruit", lambda: "apple", timeout=60, stale_timeout=60)
+        cache.add("fruit_lock", "another worker", timeout=10)
+        compute = MagicMock(return_value="pear")
+
+        with patch("utils.stampede_cache.time", return_value=10 ** 10):
+            self.assertEqual(get_or_compute("fruit", compute, timeout=60, stale_timeout=60), "apple")
+
+        compute.assert_not_called()
+
+    def test_expired_value_is_recomputed_by_the_lock_holder(self):
+        """Test that the worker that gets the lock replaces an expired value"""
+
+        get_or_compute("fruit", lambda: "apple", timeout=60, stale_timeout=60)
+
+        with patch("utils.stampede_cache.time", return_value=10 ** 10):
+            self.assertEqual(get_or_compute("fruit", lambda: "pear", timeout=60, stale_timeout=60), "pear")
+
+        self.assertIsNone(cache.get("fruit_lock"))
+
+    def test_stale_value_is_served_when_the_recomputation_fails(self):
+        """Test that a failing recomputation falls back on the stale value"""
+
+        get_or_compute("fruit", lambda: "apple", timeout=60, stale_timeout=60)
+
+        with patch("utils.stampede_cache.time", return_value=10 ** 10):
+            value = get_or_compute("fruit", MagicMock(side_effect=ValueError("unavailable")), timeout=60, stale_timeout=60)
+
+        self.assertEqual(value, "apple")
+
+    def test_error_is_raised_when_there_is_no_stale_value(self):
+        """Test that a failing computation on a miss is raised to the caller and doesn't leave the lock behind"""
+
+        with self.assertRaises(ValueError):
+            get_or_compute("fruit", MagicMock(side_effect=ValueError("unavailable")), timeout=60)
+
+        self.assertIsNone(cache.get("fruit_lock"))
+
+    def test_value_is_recomputed_early_as_the_expiry_approaches(self):
+        """Test that XFetch recomputes a value that is about to expire"""
+
+        with patch("utils.stampede_cache.monotonic", side_effect=[0, 5]):
+            get_or_compute("fruit", lambda: "apple", timeout=60)
+
+        compute = MagicMock(return_value="pear")
+
+        # the value took 5 seconds to compute and expires in 1 second, a random draw of 0.5 triggers a recompute
+        with patch("utils.stampede_cache.time", return_value=cache.get("fruit").expires_at - 1), \
+             patch("utils.stampede_cache.random", return_value=0.5):
+            self.assertEqual(get_or_compute("fruit", compute, timeout=60), "pear")
+
+    def test_none_is_only_cached_with_a_negative_timeout(self):
+        """Test that a `None` result is cached when negative caching is enabled"""
+
+        compute = MagicMock(return_value=None)
+
+        get_or_compute("fruit", compute, timeout=60)
+        get_or_compute("fruit", compute, timeout=60)
+        self.assertEqual(compute.call_count, 2)
+
+        get_or_compute("vegetable", compute, timeout=60, negative_timeout=30)
+        get_or_compute("vegetable", compute, timeout=60, negative_timeout=30)
+        self.assertEqual(compute.call_count, 3)
+
+    def test_versions_are_cached_separately(self):
+        """Test that bumping the version makes the old value unreachable"""
+
+        get_or_compute("fruit", lambda: "apple", timeout=60, version=1)
+
+        self.assertEqual(get_or_compute("fruit", lambda: "pear", timeout=60, version=2), "pear")
+        self.assertEqual(get_or_compute("fruit", lambda: "pear", timeout=60, version=1, beta=0), "apple")
+
+    def test_value_cached_before_it_was_managed_is_treated_as_a_miss(self):
+        """Test that a raw value stored under the key by older code is replaced"""
+
+        cache.set("fruit", {"name": "apple"})
+
+        self.assertEqual(get_or_compute("fruit", lambda: {"name": "pear"}, timeout=60), {"name": "pear"})
+
+    def test_invalidate_removes_the_value(self):
+        """Test that the next call after `invalidate` recomputes the value"""
+
+        get_or_compute("fruit", lambda: "apple", timeout=60)
+        invalidate("fruit")
+
+        self.assertEqual(get_or_compute("fruit", lambda: "pear", timeout=60), "pear")
+
+
+class CachedDecoratorTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_result_is_cached_per_argument(self):
+        """Test that the decorated function is only called once for each set of arguments"""
+
+        calls = []
+
+        @cached(timeout=60, key="fruit_{0}", beta=0)
+        def get_fruit(fruit_id):
+            calls.append(fruit_id)
+            return f"fruit {fruit_id}"
+
+        self.assertEqual(get_fruit(1), "fruit 1")
+        self.assertEqual(get_fruit(1), "fruit 1")
+        self.assertEqual(get_fruit(2), "fruit 2")
+
+        self.assertEqual(calls, [1, 2])
+        self.assertIsNotNone(cache.get("fruit_1"))
+
+    def test_invalidate_uses_the_same_key(self):
+        """Test that `invalidate` on the decorated function removes the cached result"""
+
+        compute = MagicMock(return_value="apple")
+        get_fruit = cached(timeout=60, beta=0)(lambda fruit_id: compute())
+
+        get_fruit(1)
+        get_fruit.invalidate(1)
+        get_fruit(1)
+
+        self.assertEqual(compute.call_count, 2)
@@ -0,0 +1,146 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from utils.structured_logging import JSONFormatter, NonBlockingQueueHandler, SamplingFilter
+
+import json
+import logging
+import logging.config
+import os
+import sys
+
+
+class CollectingHandler(logging.Handler):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+
+    def emit(self, record:logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def create_record(name:str = "custom_logger", level:int = logging.INFO, msg:str = "Hello %s", args:tuple = ("egbie",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 10, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class JSONFormatterTest(SimpleTestCase):
+
+    def test_record_is_formatted_as_json(self):
+        """Test that the record and its extra fields are written as a single JSON object"""
+
+        entry = json.loads(JSONFormatter().format(create_record(username="egbie")))
+
+        self.assertEqual(entry["message"], "Hello egbie")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "custom_logger")
+        self.assertEqual(entry["username"], "egbie")
+
+    def test_exception_is_included(self):
+        """Test that the traceback of a logged exception is kept in its own field"""
+
+        try:
+            raise ValueError("Something went wrong")
+        except ValueError:
+            record = logging.LogRecord("custom_logger", logging.ERROR, __file__, 10, "Failed", None, sys.exc_info())
+
+        entry = json.loads(JSONFormatter().format(record))
+
+        self.assertIn("ValueError: Something went wrong", entry["exception"])
+
+
+class SamplingFilterTest(SimpleTestCase):
+
+    def test_noisy_logger_is_sampled(self):
+        """Test that the most specific rate applies to a logger and its children"""
+
+        sampling = SamplingFilter(rates={"custom_logger.geo_location": 0.1})
+
+        with patch("utils.structured_logging.random", return_value=0.5):
+            self.assertFalse(sampling.filter(create_record("custom_logger.geo_location")))
+            self.assertFalse(sampling.filter(create_record("custom_logger.geo_location.api")))
+            self.assertTrue(sampling.filter(create_record("custom_logger")))
+
+        with patch("utils.structured_logging.random", return_value=0.05):
+            self.assertTrue(sampling.filter(create_record("custom_logger.geo_location")))
+
+    def test_warnings_are_never_sampled(self):
+        """Test that records above `max_level` are always kept"""
+
+        sampling = SamplingFilter(rates={"custom_logger": 0})
+
+        self.assertTrue(sampling.filter(create_record(level=logging.WARNING)))
+        self.assertFalse(sampling.filter(create_record(level=logging.INFO)))
+
+    def test_record_can_choose_its_own_rate(self):
+        """Test that `extra={"sample_rate": ...}` overrides the logger's rate"""
+
+        self.assertFalse(SamplingFilter().filter(create_record(sample_rate=0)))
+
+
+class NonBlockingQueueHandlerTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.target  = CollectingHandler()
+        self.handler = NonBlockingQueueHandler([self.target], maxsize=2)
+
+    def tearDown(self) -> None:
+        self.handler._stop_listener()
+
+    def test_records_are_written_by_the_listener(self):
+        """Test that records are handed over to the target handlers by the background listener"""
+
+        self.handler.handle(create_record())
+        self.handler._stop_listener()
+
+        self.assertEqual(len(self.target.records), 1)
+        self.assertEqual(self.target.records[0].getMessage(), "Hello egbie")
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        """Test that a full queue drops the record instead of blocking the caller"""
+
+        # the listener isn't started, so nothing is taken off the queue
+        self.handler._pid = os.getpid()
+
+        for _ in range(3):
+            self.handler.handle(create_record())
+
+        self.assertEqual(self.handler.dropped, 1)
+        self.handler._pid = None
+
+    def test_handler_is_configured_from_dict_config(self):
+        """Test that the listener is built from the named handlers without relying on Python 3.12's dictConfig"""
+
+        target       = CollectingHandler()
+        configurator = logging.config.DictConfigurator({
+            "version": 1,
+            "handlers": {
+                "queue": {"()": "utils.structured_logging.NonBlockingQueueHandler", "handlers": ["cfg://handlers.target"], "maxsize": 10},
+                "target": target,
+            },
+        })
+
+        # configured the way `dictConfig` does, without replacing the handlers of the loggers used by the other tests
+        handler = configurator.configure_handler(configurator.config["handlers"]["queue"])
+
+        handler.handle(create_record())
+        handler._stop_listener()
+
+        self.assertEqual([record.getMessage() for record in target.records], ["Hello egbie"])
+
+    def test_forked_worker_gets_its_own_listener(self):
+        """Test that a worker started with fork replaces the parent's queue and listener instead of reusing them"""
+
+        self.handler.handle(create_record())
+        parent_queue, parent_listener = self.handler.queue, self.handler.listener
+
+        with patch("utils.structured_logging.os.getpid", return_value=os.getpid() + 1):
+            self.handler.handle(create_record())
+            self.assertIsNot(self.handler.queue, parent_queue)
+            self.assertIsNot(self.handler.listener, parent_listener)
+            self.handler._stop_listener()
+
+        parent_listener.stop()
+        self.assertEqual(len(self.target.records), 2)
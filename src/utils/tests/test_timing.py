@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from utils.structured_logging import JSONFormatter
+from utils.timing import Histogram, Span, Trace, get_timing_histograms, reset_timing_histograms
+
+import json
+
+
+class HistogramTest(TestCase):
+
+    def test_observations_are_counted_into_buckets(self):
+        """Test that the count, mean and percentiles are derived from the observations"""
+
+        histogram = Histogram()
+
+        for duration in [0.5, 3, 3, 40, 700]:
+            histogram.observe(duration)
+
+        snapshot = histogram.snapshot()
+
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(snapshot["min_ms"], 0.5)
+        self.assertEqual(snapshot["max_ms"], 700)
+        self.assertEqual(snapshot["p50_ms"], 5)
+        self.assertEqual(snapshot["p99_ms"], 1000)
+        self.assertEqual(snapshot["buckets"]["<=5ms"], 2)
+
+    def test_empty_histogram_has_no_percentiles(self):
+        """Test that percentiles are None when nothing has been recorded"""
+        self.assertIsNone(Histogram().snapshot()["p95_ms"])
+
+
+class SpanAndTraceTest(TestCase):
+
+    def setUp(self) -> None:
+        reset_timing_histograms()
+
+    def tearDown(self) -> None:
+        reset_timing_histograms()
+
+    def test_span_as_context_manager_records_duration(self):
+        """Test that a span used outside a trace records into its own histogram"""
+
+        with Span("stage") as span:
+            pass
+
+        self.assertIsNotNone(span.duration_ms)
+        self.assertEqual(get_timing_histograms()["stage"]["count"], 1)
+
+    def test_span_as_decorator_records_every_call(self):
+        """Test that a decorated function records one observation per call and keeps its return value"""
+
+        @Span("decorated")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(add(2, 2), 4)
+        self.assertEqual(get_timing_histograms()["decorated"]["count"], 2)
+
+    def test_trace_logs_each_stage_as_structured_record(self):
+        """Test that a trace writes a single record with every stage duration as its fields"""
+
+        with self.assertLogs("custom_logger", level="INFO") as logs:
+            with Trace("login") as trace:
+                with Span("authenticate"):
+                    pass
+                with Span("process_user_device"):
+                    pass
+                trace.annotate(outcome="success")
+
+        record = logs.records[-1]
+
+        self.assertEqual(record.event, "stage_timings")
+        self.assertEqual(record.trace, "login")
+        self.assertEqual(record.outcome, "success")
+        self.assertEqual(set(record.stages), {"authenticate", "process_user_device"})
+
+        formatted = json.loads(JSONFormatter().format(record))
+        self.assertEqual(formatted["stages"], record.stages)
+        self.assertTrue(formatted["message"].startswith("login took"))
+
+        histograms = get_timing_histograms()
+        self.assertIn("login.authenticate", histograms)
+        self.assertIn("login.total", histograms)
+        self.assertNotIn("authenticate", histograms)
+
+    def test_trace_records_the_exception_name(self):
+        """Test that a failing stage is still timed and the error is included in the record"""
+
+        with self.assertLogs("custom_logger", level="INFO") as logs:
+            with self.assertRaises(ValueError):
+                with Trace("login"):
+                    with Span("authenticate"):
+                        raise ValueError("failed")
+
+        record = logs.records[-1]
+        self.assertEqual(record.error, "ValueError")
+        self.assertIn("authenticate", record.stages)
+
+    def test_annotation_named_like_a_record_attribute_is_renamed(self):
+        """Test that an annotation such as `name` doesn't clash with the log record's own attribute"""
+
+        with self.assertLogs("custom_logger", level="INFO") as logs:
+            with Trace("login") as trace:
+                trace.annotate(name="egbie")
+
+        self.assertEqual(logs.records[-1].name_, "egbie")
+
+
+class LoginTimingsViewTest(TestCase):
+
+    def setUp(self) -> None:
+        reset_timing_histograms()
+        self.User = get_user_model()
+
+    def test_login_timings_requires_an_admin(self):
+        """Test that anonymous users are redirected away from the timings"""
+
+        response = self.client.get(reverse("login_timings"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_login_timings_returns_login_histograms(self):
+        """Test that admins receive the login stage histograms"""
+
+        admin = self.User.objects.create_superuser(username="admin", email="admin@example.com", password="password")
+        self.client.force_login(admin)
+
+        with self.assertLogs("custom_logger", level="INFO"):
+            with Trace("login"):
+                with Span("authenticate"):
+                    pass
+
+        response = self.client.get(reverse("login_timings"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["login.authenticate"]["count"], 1)
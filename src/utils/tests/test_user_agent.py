@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from unittest.mock import patch
+
+from utils.user_agent import UserAgentCache, clear_user_agent_cache, get_user_agent_cache_stats, parse_user_agent
+from utils.utils import get_device
+
+
+CHROME_ON_WINDOWS = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+
+
+class UserAgentCacheTest(TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache never grows past its maximum size and evicts the oldest unused entry"""
+
+        user_agents = UserAgentCache(max_size=2)
+        user_agents.set("a", {"device_type": "desktop"})
+        user_agents.set("b", {"device_type": "smartphone"})
+
+        user_agents.get("a")
+        user_agents.set("c", {"device_type": "tablet"})
+
+        self.assertIsNone(user_agents.get("b"))
+        self.assertIsNotNone(user_agents.get("a"))
+        self.assertEqual(user_agents.stats()["size"], 2)
+
+    def test_hits_and_misses_are_counted(self):
+        """Test that the counters reflect every lookup"""
+
+        user_agents = UserAgentCache()
+        user_agents.get("a")
+        user_agents.set("a", {"device_type": "desktop"})
+        user_agents.get("a")
+
+        stats = user_agents.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+class ParseUserAgentTest(TestCase):
+
+    def setUp(self) -> None:
+        clear_user_agent_cache()
+        cache.clear()
+
+    def tearDown(self) -> None:
+        clear_user_agent_cache()
+        cache.clear()
+
+    def test_user_agent_is_parsed_into_device_browser_and_os(self):
+        parsed = parse_user_agent(CHROME_ON_WINDOWS)
+
+        self.assertEqual(parsed["device_type"], "desktop")
+        self.assertEqual(parsed["browser"], "Chrome")
+        self.assertEqual(parsed["os"], "Windows")
+        self.assertFalse(parsed["is_bot"])
+
+    def test_user_agent_is_only_parsed_once(self):
+        """Test that a repeated user-agent is served from the cache instead of being parsed again"""
+
+        parse_user_agent(CHROME_ON_WINDOWS)
+
+        with patch("device_detector.DeviceDetector") as device_detector:
+            parsed = parse_user_agent(CHROME_ON_WINDOWS)
+
+        device_detector.assert_not_called()
+        self.assertEqual(parsed["device_type"], "desktop")
+        self.assertEqual(get_user_agent_cache_stats()["hits"], 1)
+
+    @override_settings(USER_AGENT_SHARED_CACHE_TIMEOUT=60)
+    def test_shared_cache_is_used_when_the_process_cache_misses(self):
+        """Test that another worker's parsed user-agent is re-used through the shared cache"""
+
+        parse_user_agent(CHROME_ON_WINDOWS)
+        clear_user_agent_cache()
+
+        with patch("device_detector.DeviceDetector") as device_detector:
+            parsed = parse_user_agent(CHROME_ON_WINDOWS)
+
+        device_detector.assert_not_called()
+        self.assertEqual(parsed["browser"], "Chrome")
+        self.assertEqual(get_user_agent_cache_stats()["shared_hits"], 1)
+
+    def test_get_device_returns_the_device_type(self):
+        request = RequestFactory().get("/", HTTP_USER_AGENT=CHROME_ON_WINDOWS)
+        self.assertEqual(get_device(request), "desktop")
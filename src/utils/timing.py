@@ -0,0 +1,218 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+import logging
+
+
+logger = logging.getLogger('custom_logger')
+
+
+# The attributes every `LogRecord` has (plus the ones `Formatter` sets), `extra` fields can't use these names
+_LOG_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+# Upper bound (in milliseconds) of each histogram bucket, anything slower lands in the last (overflow) bucket
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram of durations in milliseconds.
+
+    Observations are counted into buckets rather than stored, so memory use stays constant no
+    matter how much traffic is recorded. Percentiles are therefore approximate, they are reported
+    as the upper bound of the bucket the percentile falls in.
+    """
+
+    def __init__(self) -> None:
+        self.counts   = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count    = 0
+        self.total_ms = 0.0
+        self.min_ms   = None
+        self.max_ms   = None
+        self._lock    = Lock()
+
+    def observe(self, duration_ms:float) -> None:
+        with self._lock:
+            self.counts[bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+            self.count    += 1
+            self.total_ms += duration_ms
+            self.min_ms    = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+            self.max_ms    = duration_ms if self.max_ms is None else max(self.max_ms, duration_ms)
+
+    def percentile(self, percent:float) -> float | None:
+        """Returns the upper bound of the bucket containing the given percentile, or the max if it is in the overflow bucket."""
+
+        if not self.count:
+            return None
+
+        target     = self.count * percent / 100
+        cumulative = 0
+
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"<={bound}ms": count for bound, count in zip(BUCKET_BOUNDS_MS, self.counts)}
+            buckets[f">{BUCKET_BOUNDS_MS[-1]}ms"] = self.counts[-1]
+
+            return {
+                "count": self.count,
+                "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+                "min_ms": self.min_ms,
+                "max_ms": self.max_ms,
+                "p50_ms": self.percentile(50),
+                "p95_ms": self.percentile(95),
+                "p99_ms": self.percentile(99),
+                "buckets": buckets,
+            }
+
+
+_histograms      = {}
+_histograms_lock = Lock()
+_current_trace   = ContextVar("current_trace", default=None)
+
+
+def get_histogram(name:str) -> Histogram:
+    """Returns the process wide histogram for `name`, creating it on first use."""
+
+    histogram = _histograms.get(name)
+
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(name, Histogram())
+    return histogram
+
+
+def get_timing_histograms() -> dict:
+    """
+    Returns a snapshot of every histogram recorded by this process, keyed by `<trace>.<stage>`.
+
+    Example:
+        >>> get_timing_histograms()["login.authenticate"]
+        {"count": 120, "mean_ms": 212.4, "p50_ms": 250, "p95_ms": 250, "p99_ms": 500, ...}
+    """
+    return {name: histogram.snapshot() for name, histogram in sorted(_histograms.items())}
+
+
+def reset_timing_histograms() -> None:
+    with _histograms_lock:
+        _histograms.clear()
+
+
+class Span:
+    """
+    Times a single stage of a pipeline, usable as a context manager or a decorator.
+
+    When used inside a `Trace` the duration is recorded against the trace (so it appears in
+    the trace's log record) and in the `<trace>.<stage>` histogram. Outside a trace the duration
+    is only recorded in the `<stage>` histogram.
+
+    Example usage:
+        >>> with Span("authenticate"):
+        ...     user = authenticate(request, email=email, password=password)
+
+        >>> @Span("process_user_device")
+        ... def process_user_device(...):
+        ...     ...
+    """
+
+    def __init__(self, name:str) -> None:
+        self.name        = name
+        self.duration_ms = None
+        self._start      = None
+
+    def __enter__(self) -> "Span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.duration_ms = (perf_counter() - self._start) * 1000
+        trace            = _current_trace.get()
+
+        if trace is None:
+            get_histogram(self.name).observe(self.duration_ms)
+        else:
+            trace.add_stage(self.name, self.duration_ms)
+        return False
+
+    def __call__(self, func):
+
+        # a new span is created for every call so concurrent calls don't share the start time
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Trace:
+    """
+    Groups the stages of one run of a pipeline (e.g one login).
+
+    When the trace exits, a single log record is written with the duration of every stage as its
+    `extra` fields (written as JSON by `utils.structured_logging.JSONFormatter`) and the total duration
+    is recorded in the `<trace>.total` histogram.
+
+    Example usage:
+        >>> with Trace("login") as trace:
+        ...     with Span("authenticate"):
+        ...         ...
+        ...     trace.annotate(outcome="success")
+
+        logs -> {..., "message": "login took 251.3ms", "event": "stage_timings", "trace": "login",
+                 "total_ms": 251.3, "stages": {"authenticate": 240.1}, "outcome": "success"}
+    """
+
+    def __init__(self, name:str) -> None:
+        self.name        = name
+        self.stages      = {}
+        self.fields      = {}
+        self.duration_ms = None
+        self._start      = None
+        self._token      = None
+
+    def add_stage(self, stage:str, duration_ms:float) -> None:
+        """Records a stage duration, stages that run more than once in a trace are summed."""
+
+        self.stages[stage] = self.stages.get(stage, 0) + duration_ms
+        get_histogram(f"{self.name}.{stage}").observe(duration_ms)
+
+    def annotate(self, **fields) -> None:
+        """Adds extra fields to the trace's log record."""
+        self.fields.update(fields)
+
+    def __enter__(self) -> "Trace":
+        self._token = _current_trace.set(self)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> bool:
+        self.duration_ms = (perf_counter() - self._start) * 1000
+        _current_trace.reset(self._token)
+
+        get_histogram(f"{self.name}.total").observe(self.duration_ms)
+
+        if exc_type is not None:
+            self.fields.setdefault("error", exc_type.__name__)
+
+        record = {
+            "event": "stage_timings",
+            "trace": self.name,
+            "total_ms": round(self.duration_ms, 3),
+            "stages": {stage: round(duration, 3) for stage, duration in self.stages.items()},
+        }
+
+        # an annotation named like a `LogRecord` attribute (e.g `name`) can't be passed through `extra`
+        for field, value in self.fields.items():
+            record[f"{field}_" if field in _LOG_RECORD_ATTRIBUTES else field] = value
+
+        logger.info(f"{self.name} took {self.duration_ms:.1f}ms", extra=record)
+        return False
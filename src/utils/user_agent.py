@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.lazy_import import lazy_import
+
+import hashlib
+
+
+# device_detector loads its regular expressions on import, it is only needed for an unseen user-agent
+device_detector = lazy_import("device_detector")
+
+
+class UserAgentCache:
+    """
+    A bounded, thread safe, least recently used cache of parsed user-agent strings.
+
+    Parsing a user-agent with `DeviceDetector` runs a long list of regular expressions, yet the
+    number of distinct user-agents seen by the site is small compared to the number of requests,
+    so each one only needs to be parsed once. Entries are keyed on a hash of the user-agent
+    rather than the string itself, which keeps the keys short no matter how long a client makes
+    its user-agent. Once `max_size` entries are stored the least recently used one is evicted.
+
+    Example usage:
+        >>> user_agents = UserAgentCache(max_size=1024)
+        >>> user_agents.set(key, {"device_type": "desktop", ...})
+        >>> user_agents.get(key)
+        {"device_type": "desktop", ...}
+    """
+
+    def __init__(self, max_size:int = 1024) -> None:
+        self.max_size    = max_size
+        self.hits        = 0
+        self.misses      = 0
+        self.shared_hits = 0
+        self._entries    = OrderedDict()
+        self._lock       = Lock()
+
+    def get(self, key:str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key:str, entry:dict) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def record_shared_hit(self, key:str, entry:dict) -> None:
+        """Stores an entry that was found in the shared cache tier and counts it as a shared hit."""
+        self.set(key, entry)
+
+        with self._lock:
+            self.shared_hits += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.shared_hits = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+_user_agents = UserAgentCache(max_size=getattr(settings, "USER_AGENT_CACHE_SIZE", 1024))
+
+
+def parse_user_agent(user_agent_string:str) -> dict:
+    """
+    Parses a user-agent string into the device type, browser and operating system.
+
+    The result is looked up in the process wide LRU cache first, then (if `USER_AGENT_SHARED_CACHE_TIMEOUT`
+    is set) in the shared Django cache so workers can re-use each other's work, and the user-agent is
+    only parsed when neither tier has it. The returned dictionary is shared between callers and must
+    not be modified.
+
+    Args:
+        user_agent_string (str): The raw `User-Agent` header sent by the client.
+
+    Returns:
+        dict: A dictionary with the keys `device_type`, `browser`, `browser_version`, `os`, `os_version`
+              and `is_bot`, the string values are empty when they couldn't be determined.
+
+    Example usage:
+        >>> parse_user_agent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) ... Chrome/131.0.0.0 Safari/537.36")
+        {"device_type": "desktop", "browser": "Chrome", "browser_version": "131.0.0.0",
+         "os": "Windows", "os_version": "10", "is_bot": False}
+    """
+    key    = _get_user_agent_key(user_agent_string)
+    parsed = _user_agents.get(key)
+
+    if parsed is not None:
+        return parsed
+
+    shared_timeout = getattr(settings, "USER_AGENT_SHARED_CACHE_TIMEOUT", None)
+
+    if shared_timeout:
+        parsed = cache.get(f"user_agent_{key}")
+        if parsed is not None:
+            _user_agents.record_shared_hit(key, parsed)
+            return parsed
+
+    device = device_detector.DeviceDetector(user_agent_string).parse()
+    parsed = {
+        "device_type": device.device_type(),
+        "browser": device.client_name(),
+        "browser_version": device.client_version(),
+        "os": device.os_name(),
+        "os_version": device.os_version(),
+        "is_bot": device.is_bot(),
+    }
+
+    _user_agents.set(key, parsed)
+
+    if shared_timeout:
+        cache.set(f"user_agent_{key}", parsed, timeout=shared_timeout)
+    return parsed
+
+
+def get_user_agent_cache_stats() -> dict:
+    """Returns the hit, miss and size counters of the process wide user-agent cache."""
+    return _user_agents.stats()
+
+
+def clear_user_agent_cache() -> None:
+    """Empties the process wide user-agent cache and resets its counters."""
+    _user_agents.clear()
+
+
+def _get_user_agent_key(user_agent_string:str) -> str:
+    return hashlib.blake2b(user_agent_string.encode("utf-8", "replace"), digest_size=16).hexdigest()
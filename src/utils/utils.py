@@ -1,28 +1,29 @@
 from django.http import HttpRequest
-from PIL import Image
-from socket import gethostname, gethostbyname
 
-from device_detector import DeviceDetector
+from utils.custom_errors import InvalidImageError
+from utils.image_header import read_image_header
+from utils.local_ip import local_ip_resolver
+from utils.user_agent import parse_user_agent
 
-import requests
 import hmac
 import hashlib
 
 
-def get_image_extenstion(image: Image) -> str:  
+def get_image_extenstion(image) -> str:  
     """
-    Takes an PIL image and returns the extenstion in lowercase.
+    Takes an image and returns the extenstion in lowercase (jpeg, png or webp).
+    
+    Only the image's header is read, see `utils.image_header.read_image_header`.
     
     Args:
-        Image: The PIL Image that will be used to extract the format.
+        image: A path to the image or the image file.
         
     Returns:
         Returns the format if found or returns an empty string if not found.
     """  
     try:
-        image = Image.open(image)
-        return image.format.lower()
-    except ValueError:
+        return read_image_header(image).format
+    except (InvalidImageError, OSError):
         return ''
 
 
@@ -34,8 +35,11 @@ def get_local_ip_address() -> str:
     (typically something like 192.168.x.x or 10.x.x.x), as opposed to the global IP 
     address used for internet communication. This method uses the `socket` library to 
     obtain the local IP address of the machine running the code.
+
+    The address is resolved once when the worker starts and refreshed in the background
+    (see `utils.local_ip.LocalIPResolver`), so calling this never waits on a DNS lookup.
     """
-    return gethostbyname(gethostname())
+    return local_ip_resolver.get()
 
 
 def get_device(request: HttpRequest) -> str:
@@ -48,12 +52,15 @@ def get_device(request: HttpRequest) -> str:
     Returns:
         str: The type of device (e.g., "Desktop", "Laptop") or "Unknown device" if the type cannot be determined.
 
+    Note:
+        Parsed user-agents are cached (see `utils.user_agent.parse_user_agent`) so a
+        returning browser isn't parsed again on every login.
     """
     user_agent_string = request.META.get('HTTP_USER_AGENT', '')
-    device_type       = DeviceDetector(user_agent_string).parse()
+    parsed_user_agent = parse_user_agent(user_agent_string)
     
-    if device_type:
-        return device_type.device_type()
+    if parsed_user_agent:
+        return parsed_user_agent["device_type"]
     
     return "Unknow device"
 